@@ -0,0 +1 @@
+# Local Finder X - Benchmarks
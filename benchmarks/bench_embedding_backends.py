@@ -0,0 +1,90 @@
+"""
+Local Finder X v2.0 - Embedding Backend Benchmark
+
+Compares the ONNX Runtime (int8) backend against the PyTorch reference:
+- model load time
+- encoding throughput (texts/sec) on CPU
+- cosine agreement between the two backends' embeddings
+
+Usage:
+    python -m benchmarks.bench_embedding_backends [--model BAAI/bge-m3] [--export]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.core.embedding import DEFAULT_MODEL_NAME
+from src.core.embedding_backends import (
+    TorchBackend, OnnxBackend, export_onnx_model, get_onnx_model_dir, has_onnx_model,
+)
+
+
+SAMPLE_SENTENCES = [
+    "2024년 하반기 마케팅 예산 집행 현황",
+    "Quarterly revenue grew 12% year over year, driven by enterprise renewals.",
+    "계약서 제3조에 따라 납품 기한은 발주일로부터 30일 이내로 한다.",
+    "Slide 4: Roadmap",
+    "The migration plan covers the file server, the shared mailbox and the legacy CRM export.",
+    "회의록: 신규 프로젝트 킥오프, 담당자 배정 및 일정 확정",
+]
+
+
+def make_texts(n: int, seed: int = 0) -> list:
+    """Texts of mixed length, from slide titles to full paragraphs."""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(n):
+        parts = rng.integers(1, 8)
+        texts.append(" ".join(rng.choice(SAMPLE_SENTENCES, size=parts)))
+    return texts
+
+
+def time_encode(backend, texts: list, batch_size: int) -> tuple:
+    """Encode texts once to warm up, then time a full pass."""
+    backend.encode(texts[:batch_size], batch_size=batch_size)
+    start = time.perf_counter()
+    embeddings = backend.encode(texts, batch_size=batch_size)
+    return np.asarray(embeddings, dtype=np.float32), time.perf_counter() - start
+
+
+def run(model_name: str, n_texts: int, batch_size: int, export: bool) -> None:
+    if export or not has_onnx_model(model_name):
+        export_onnx_model(model_name)
+    
+    texts = make_texts(n_texts)
+    print(f"{model_name}: {n_texts} texts, batch size {batch_size}, CPU")
+    print(f"{'backend':<8}{'load s':>9}{'texts/s':>10}")
+    
+    start = time.perf_counter()
+    torch_backend = TorchBackend(model_name, device="cpu")
+    torch_load = time.perf_counter() - start
+    reference, torch_elapsed = time_encode(torch_backend, texts, batch_size)
+    print(f"{'torch':<8}{torch_load:>9.2f}{n_texts / torch_elapsed:>10.1f}")
+    
+    start = time.perf_counter()
+    onnx_backend = OnnxBackend(get_onnx_model_dir(model_name))
+    onnx_load = time.perf_counter() - start
+    embeddings, onnx_elapsed = time_encode(onnx_backend, texts, batch_size)
+    print(f"{'onnx':<8}{onnx_load:>9.2f}{n_texts / onnx_elapsed:>10.1f}")
+    
+    cosines = np.einsum("ij,ij->i", reference, embeddings)
+    print(
+        f"\nspeedup {torch_elapsed / onnx_elapsed:.2f}x, cosine agreement "
+        f"mean {cosines.mean():.4f} / min {cosines.min():.4f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--export", action="store_true", help="re-export the ONNX model first")
+    args = parser.parse_args()
+    run(args.model, args.texts, args.batch_size, args.export)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Local Finder X v2.0 - Batch Search Throughput Benchmark
+
+Compares a loop over SearchEngine.search with one
+SearchEngine.search_many call on the current index:
+- queries per second of both
+- whether both return the same ranking
+
+The result and query embedding caches are cleared before each run so
+both pay for encoding every query.
+
+Usage:
+    python -m benchmarks.bench_search_many [--index DIR ...] [--queries FILE] [--repeat 50]
+"""
+
+import argparse
+import time
+
+from src.core.indexer import IndexingOrchestrator
+from src.core.query_cache import get_query_cache
+from src.core.search_engine import SearchEngine
+from benchmarks.bench_search_modes import SAMPLE_QUERIES, load_queries
+
+
+def make_batch(queries: list, repeat: int) -> list:
+    """Distinct variants of the queries (numbered, so no cache hits)."""
+    return [f"{query} {i}" for i in range(repeat) for query in queries]
+
+
+def ranking(response) -> list:
+    return [hit.file.file_id for hit in response.results]
+
+
+def run(index_dirs: list, queries: list, repeat: int) -> None:
+    if index_dirs:
+        print(f"Indexing {', '.join(index_dirs)}...")
+        print(IndexingOrchestrator().index_directories(index_dirs))
+    
+    engine = SearchEngine()
+    batch = make_batch(queries, repeat)
+    engine.search(batch[0])  # load indexes and model
+    
+    engine.clear_result_cache()
+    get_query_cache().clear()
+    start = time.perf_counter()
+    looped = [engine.search(query, deadline_ms=0) for query in batch]
+    loop_s = time.perf_counter() - start
+    
+    engine.clear_result_cache()
+    get_query_cache().clear()
+    start = time.perf_counter()
+    batched = engine.search_many(batch)
+    batch_s = time.perf_counter() - start
+    
+    same = sum(ranking(a) == ranking(b) for a, b in zip(looped, batched))
+    print(f"\n{len(batch)} queries")
+    print(f"{'':<14}{'total s':>9}{'queries/s':>11}")
+    print(f"{'search loop':<14}{loop_s:>9.2f}{len(batch) / loop_s:>11.1f}")
+    print(f"{'search_many':<14}{batch_s:>9.2f}{len(batch) / batch_s:>11.1f}")
+    print(f"speedup {loop_s / batch_s:.1f}x, same ranking for {same}/{len(batch)} queries")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index", nargs="*", default=[], help="directories to index first")
+    parser.add_argument("--queries", help="file with one query per line")
+    parser.add_argument("--repeat", type=int, default=50, help="variants per query")
+    args = parser.parse_args()
+    queries = load_queries(args.queries) if args.queries else SAMPLE_QUERIES
+    run(args.index, queries, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
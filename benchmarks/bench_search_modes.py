@@ -0,0 +1,93 @@
+"""
+Local Finder X v2.0 - Search Mode Latency Benchmark
+
+Measures end-to-end SearchEngine.search latency of the FAST, SMART and
+ASSIST execution plans on the current index:
+- p50 / p95 / max latency per mode
+- share of partial responses (stages skipped at the deadline)
+
+Each query is run once to warm the query embedding cache (which FAST
+relies on) before timing. The result cache is bypassed so every timed
+call runs the full plan.
+
+Usage:
+    python -m benchmarks.bench_search_modes [--index DIR ...] [--queries FILE] [--runs 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.config.settings import get_settings
+from src.core.indexer import IndexingOrchestrator
+from src.core.search_engine import SearchEngine, SEARCH_MODES
+
+
+SAMPLE_QUERIES = [
+    "예산",
+    "마케팅 예산 집행 현황",
+    "계약서 납품 기한",
+    "회의록 프로젝트 킥오프",
+    "quarterly revenue",
+    "migration plan for the file server",
+    "invoice",
+    "신규 프로젝트 담당자 배정 및 일정",
+]
+
+
+def load_queries(path: str) -> list:
+    """One query per non-empty line."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def time_mode(engine: SearchEngine, mode: str, queries: list, runs: int) -> tuple:
+    """Time every query runs times. Returns (latencies in ms, partial count)."""
+    for query in queries:
+        engine.search(query, mode=mode)
+    
+    latencies = []
+    partial = 0
+    for _ in range(runs):
+        for query in queries:
+            engine.clear_result_cache()
+            start = time.perf_counter()
+            response = engine.search(query, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            partial += response.is_partial
+    return np.array(latencies), partial
+
+
+def run(index_dirs: list, queries: list, runs: int) -> None:
+    if index_dirs:
+        print(f"Indexing {', '.join(index_dirs)}...")
+        print(IndexingOrchestrator().index_directories(index_dirs))
+    
+    engine = SearchEngine()
+    settings = get_settings().search
+    print(
+        f"\n{len(queries)} queries x {runs} runs, deadline {settings.deadline_ms} ms, "
+        f"rerank {'on' if settings.rerank else 'off'} (SMART)"
+    )
+    print(f"{'mode':<8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'partial':>9}")
+    for mode in SEARCH_MODES:
+        latencies, partial = time_mode(engine, mode, queries, runs)
+        print(
+            f"{mode:<8}{np.percentile(latencies, 50):>9.1f}{np.percentile(latencies, 95):>9.1f}"
+            f"{latencies.max():>9.1f}{partial / len(latencies):>9.0%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index", nargs="*", default=[], help="directories to index first")
+    parser.add_argument("--queries", help="file with one query per line")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    queries = load_queries(args.queries) if args.queries else SAMPLE_QUERIES
+    run(args.index, queries, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Local Finder X v2.0 - Vector Encoding Benchmark
+
+Compares the chunks-table vector encodings (float32, float16, int8,
+binary + float16 rerank) on:
+- vector bytes per chunk (what must fit in the page cache for search)
+- on-disk size of the LanceDB table
+- recall@k against exact float32 search
+- mean query latency
+
+Usage:
+    python -m benchmarks.bench_vector_encodings [--chunks 20000] [--dim 1024]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from src.storage.lancedb_store import LanceDBStore
+from src.storage.quantization import VECTOR_ENCODINGS, ENCODING_INT8, ENCODING_BINARY
+
+
+def make_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered, normalized vectors resembling sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 200, 1), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)]
+    vectors += 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def search_bytes_per_vector(encoding: str, dim: int) -> int:
+    """Bytes per chunk read by the first search stage."""
+    if encoding == "float32":
+        return dim * 4
+    if encoding == "float16":
+        return dim * 2
+    if encoding == ENCODING_INT8:
+        return dim + 4
+    return (dim + 7) // 8
+
+
+def dir_size(path: Path) -> int:
+    """Total size of files below a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def run(n_chunks: int, dim: int, n_queries: int, top_k: int) -> None:
+    vectors = make_vectors(n_chunks, dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, n_chunks, n_queries)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    
+    chunk_ids = [str(uuid.uuid4()) for _ in range(n_chunks)]
+    exact = [set(np.argsort(-(vectors @ q))[:top_k]) for q in queries]
+    id_to_index = {cid: i for i, cid in enumerate(chunk_ids)}
+    
+    print(f"{n_chunks} chunks x {dim}d, {n_queries} queries, recall@{top_k}")
+    print(f"{'encoding':<10}{'search B/vec':>14}{'disk MB':>10}{'recall':>9}{'ms/query':>10}")
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="lfx-bench-"))
+    try:
+        for encoding in VECTOR_ENCODINGS:
+            store = LanceDBStore(work_dir / encoding, vector_encoding=encoding)
+            batch = 5000
+            for start in range(0, n_chunks, batch):
+                store.add_chunks([
+                    {
+                        "chunk_id": chunk_ids[i],
+                        "file_id": "bench",
+                        "chunk_index": i,
+                        "text": "",
+                        "vector": vectors[i].tolist(),
+                        "metadata": None,
+                        "content_indexed": True,
+                    }
+                    for i in range(start, min(start + batch, n_chunks))
+                ])
+            
+            recalls = []
+            start_time = time.perf_counter()
+            for q, truth in zip(queries, exact):
+                results = store.search_chunks(q.tolist(), top_k=top_k)
+                found = {id_to_index[r["chunk_id"]] for r in results}
+                recalls.append(len(found & truth) / top_k)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000 / n_queries
+            
+            print(
+                f"{encoding:<10}"
+                f"{search_bytes_per_vector(encoding, dim):>14}"
+                f"{dir_size(work_dir / encoding / 'chunks.lance') / 1e6:>10.1f}"
+                f"{np.mean(recalls):>9.3f}"
+                f"{elapsed_ms:>10.1f}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(
+        f"\n{ENCODING_INT8} and {ENCODING_BINARY} also store a float16 rerank column "
+        f"({dim * 2} B/vec on disk, read only for the top candidates)."
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    run(args.chunks, args.dim, args.queries, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,15 @@ Local Finder X v2.0 - Main Entry Point
 Launches the application with PyQt6 UI.
 """
 
+import multiprocessing
 import sys
 
 
 def main():
     """Application entry point."""
+    # Required for the embedding worker process in frozen builds
+    multiprocessing.freeze_support()
+    
     print("=" * 50)
     print("Local Finder X v2.0")
     print("Explainable Hybrid Local Search Engine")
@@ -69,11 +69,40 @@ def get_bm25_path() -> Path:
     return get_data_dir() / "bm25.bin"
 
 
+def get_shards_dir() -> Path:
+    """Get the directory holding per-root index shards."""
+    shards_dir = get_data_dir() / "shards"
+    shards_dir.mkdir(parents=True, exist_ok=True)
+    return shards_dir
+
+
 def get_manifest_path() -> Path:
-    """Get the manifest file path."""
+    """Get the legacy JSON manifest file path."""
     return get_data_dir() / "manifest.json"
 
 
+def get_manifest_db_path() -> Path:
+    """Get the SQLite manifest database path."""
+    return get_data_dir() / "manifest.db"
+
+
+def get_query_cache_path() -> Path:
+    """Get the persistent query embedding cache path."""
+    return get_data_dir() / "query_cache.db"
+
+
+def get_rescore_db_path() -> Path:
+    """Get the two-tier rescoring vector cache path."""
+    return get_data_dir() / "rescore_vectors.db"
+
+
+def get_models_dir() -> Path:
+    """Get the directory for locally exported models (e.g. ONNX)."""
+    models_dir = get_app_data_dir() / "models"
+    models_dir.mkdir(parents=True, exist_ok=True)
+    return models_dir
+
+
 def get_settings_path() -> Path:
     """Get the settings file path."""
     return get_config_dir() / "settings.json"
@@ -87,6 +116,11 @@ __all__ = [
     "get_config_dir",
     "get_lancedb_path",
     "get_bm25_path",
+    "get_shards_dir",
     "get_manifest_path",
+    "get_manifest_db_path",
+    "get_query_cache_path",
+    "get_rescore_db_path",
+    "get_models_dir",
     "get_settings_path",
 ]
@@ -20,6 +20,14 @@ class IndexingSettings:
     parallel_workers: int = 4
     chunk_size: int = 1000
     chunk_overlap: int = 100
+    vector_encoding: str = "float32"  # float32, float16, int8, binary
+    projection: str = "none"  # none, pca, truncate
+    projection_dim: int = 512
+    embedding_model: str = ""  # "" = default model (BAAI/bge-m3)
+    rescore_model: str = ""  # large model for two-tier search, "" = off
+    embedding_backend: str = "auto"  # auto, onnx, torch
+    embedding_worker: bool = True  # run the model in a separate process
+    embedding_idle_timeout: float = 300.0  # idle seconds before the worker frees the model (not in the foreground)
 
 
 @dataclass
@@ -30,6 +38,15 @@ class SearchSettings:
     top_n_bm25: int = 50
     rrf_k: int = 60
     max_evidences_per_file: int = 5
+    rescore_top_n: int = 30  # dense candidates rescored by the large model
+    rerank: bool = False  # cross-encoder rerank after RRF
+    rerank_model: str = "BAAI/bge-reranker-v2-m3"
+    rerank_top_n: int = 20  # chunk candidates scored by the cross-encoder
+    rerank_budget_ms: int = 300  # skip reranking beyond this latency
+    deadline_ms: int = 3000  # per-query latency budget, 0 = none
+    result_cache_size: int = 128  # cached search responses, 0 = off
+    query_cache_size: int = 1024
+    persist_query_cache: bool = True
 
 
 @dataclass
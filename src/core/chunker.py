@@ -3,22 +3,182 @@ Local Finder X v2.0 - Structural Chunker
 
 File-type-specific chunking with location metadata.
 Based on Master Plan Phase 3 specifications.
+
+Chunk sizes are measured in tokens of the embedding model, so chunks
+fill the model's input without being truncated. Tokens are counted
+with the model's own (fast) tokenizer when it is available locally,
+otherwise with a cheap byte-based estimate.
 """
 
+import bisect
+import importlib.util
 import re
+import threading
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
 
 from src.core.file_classifier import FileType, get_file_type
 from src.core.extractors import ExtractorResult
+from src.core.embedding import estimate_token_count, DEFAULT_MODEL_NAME, FALLBACK_MODEL_NAME
+from src.core.embedding_backends import get_onnx_model_dir, ONNX_TOKENIZER_FILENAME
+
+
+TOKENIZERS_AVAILABLE = importlib.util.find_spec("tokenizers") is not None
+HF_HUB_AVAILABLE = importlib.util.find_spec("huggingface_hub") is not None
 
 
 # =============================================================================
 # Configuration
 # =============================================================================
 
-DEFAULT_CHUNK_SIZE = 1000  # characters
-DEFAULT_CHUNK_OVERLAP = 100  # characters
+DEFAULT_CHUNK_SIZE = 256  # model tokens
+DEFAULT_CHUNK_OVERLAP = 32  # model tokens
+
+# Special tokens ([CLS]/[SEP], <s>/</s>) added by the model to every input
+SPECIAL_TOKENS = 2
+
+
+@dataclass(frozen=True)
+class ChunkProfile:
+    """Chunk size and overlap in model tokens."""
+    chunk_size: int
+    chunk_overlap: int
+
+
+# Per-model chunk sizes, within each model's max sequence length
+MODEL_CHUNK_PROFILES: Dict[str, ChunkProfile] = {
+    # 8192-token context; 512 keeps evidences focused and batches dense
+    DEFAULT_MODEL_NAME: ChunkProfile(chunk_size=512, chunk_overlap=64),
+    # 128-token context
+    FALLBACK_MODEL_NAME: ChunkProfile(chunk_size=126, chunk_overlap=16),
+    "sentence-transformers/all-MiniLM-L6-v2": ChunkProfile(chunk_size=254, chunk_overlap=32),
+    "intfloat/multilingual-e5-small": ChunkProfile(chunk_size=510, chunk_overlap=64),
+}
+
+DEFAULT_CHUNK_PROFILE = ChunkProfile(DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP)
+
+
+def get_chunk_profile(model_name: Optional[str]) -> ChunkProfile:
+    """Get the chunk profile for an embedding model."""
+    return MODEL_CHUNK_PROFILES.get(model_name or "", DEFAULT_CHUNK_PROFILE)
+
+
+# =============================================================================
+# Token Counters
+# =============================================================================
+
+class TokenCounter:
+    """
+    Fast approximate token counter (see estimate_token_count).
+    
+    Used when the model's tokenizer is not available; about four UTF-8
+    bytes per token for English and Korean text.
+    """
+    
+    name = "approx"
+    
+    def count(self, text: str) -> int:
+        """Count tokens of text, including special tokens."""
+        return estimate_token_count(text)
+    
+    def advance(self, text: str, start: int, max_tokens: int) -> int:
+        """
+        Find the end offset of a span starting at start.
+        
+        Returns:
+            Character offset end such that text[start:end] has at most
+            max_tokens tokens (at least one character is consumed).
+        """
+        budget = max(1, max_tokens - SPECIAL_TOKENS) * 4
+        window = text[start:start + budget].encode("utf-8")[:budget]
+        return start + max(1, len(window.decode("utf-8", errors="ignore")))
+
+
+class TokenizerCounter(TokenCounter):
+    """
+    Exact token counter using the model's fast tokenizer.
+    
+    The text being chunked is tokenized once; span ends are found by
+    binary search over the token character offsets.
+    """
+    
+    name = "tokenizer"
+    
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.tokenizer.no_truncation()
+        self.tokenizer.no_padding()
+        self._lock = threading.Lock()
+        self._text: Optional[str] = None
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+    
+    def count(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids) + SPECIAL_TOKENS
+    
+    def _offsets(self, text: str):
+        """Token (start, end) character offsets of text (cached for the last text)."""
+        if text is not self._text:
+            offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+            self._starts = [o[0] for o in offsets]
+            self._ends = [o[1] for o in offsets]
+            self._text = text
+        return self._starts, self._ends
+    
+    def advance(self, text: str, start: int, max_tokens: int) -> int:
+        with self._lock:
+            starts, ends = self._offsets(text)
+            first = bisect.bisect_left(starts, start)
+            last = first + max(1, max_tokens - SPECIAL_TOKENS)
+            if last >= len(starts):
+                return len(text)
+            # End where the first token past the budget begins
+            return max(start + 1, starts[last])
+
+
+def _find_tokenizer_file(model_name: str) -> Optional[Path]:
+    """Find a local tokenizer.json for a model (ONNX export or HF cache)."""
+    path = get_onnx_model_dir(model_name) / ONNX_TOKENIZER_FILENAME
+    if path.exists():
+        return path
+    
+    if HF_HUB_AVAILABLE:
+        from huggingface_hub import try_to_load_from_cache
+        cached = try_to_load_from_cache(model_name, "tokenizer.json")
+        if isinstance(cached, str):
+            return Path(cached)
+    return None
+
+
+# Counters per model name
+_token_counters: Dict[str, TokenCounter] = {}
+
+
+def get_token_counter(model_name: Optional[str] = None) -> TokenCounter:
+    """
+    Get the token counter for an embedding model.
+    
+    Uses the model's tokenizer.json when it is available locally (never
+    downloads), otherwise the approximate counter.
+    """
+    model_name = model_name or ""
+    counter = _token_counters.get(model_name)
+    if counter is not None:
+        return counter
+    
+    counter = TokenCounter()
+    if TOKENIZERS_AVAILABLE and model_name:
+        try:
+            path = _find_tokenizer_file(model_name)
+            if path is not None:
+                from tokenizers import Tokenizer
+                counter = TokenizerCounter(Tokenizer.from_file(str(path)))
+        except Exception as e:
+            print(f"Warning: Could not load tokenizer for {model_name}, using estimate: {e}")
+    
+    _token_counters[model_name] = counter
+    return counter
 
 
 # =============================================================================
@@ -55,15 +215,24 @@ class Chunk:
 # =============================================================================
 
 class BaseChunker:
-    """Base chunker with simple text splitting."""
+    """Base chunker with simple text splitting (sizes in model tokens)."""
     
     def __init__(
         self,
         chunk_size: int = DEFAULT_CHUNK_SIZE,
         chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        counter: Optional[TokenCounter] = None,
     ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.counter = counter or TokenCounter()
+    
+    def fits(self, text: str) -> bool:
+        """Check if text fits in a single chunk."""
+        # Cheap upper bound first: a token covers at least one character
+        if len(text) + SPECIAL_TOKENS <= self.chunk_size:
+            return True
+        return self.counter.count(text) <= self.chunk_size
     
     def chunk(
         self,
@@ -83,7 +252,7 @@ class BaseChunker:
         return self._simple_chunk(text)
     
     def _simple_chunk(self, text: str) -> List[Chunk]:
-        """Simple character-based chunking with overlap."""
+        """Token-budgeted chunking with overlap, breaking at boundaries."""
         if not text.strip():
             return []
         
@@ -92,13 +261,15 @@ class BaseChunker:
         chunk_idx = 0
         
         while start < len(text):
-            end = start + self.chunk_size
+            end = self.counter.advance(text, start, self.chunk_size)
+            full_end = end
             
             # Try to break at a sentence or paragraph boundary
             if end < len(text):
+                half = start + (end - start) // 2
                 # Look for paragraph break
                 para_break = text.rfind("\n\n", start, end)
-                if para_break > start + self.chunk_size // 2:
+                if para_break > half:
                     end = para_break + 2
                 else:
                     # Look for sentence break
@@ -108,7 +279,7 @@ class BaseChunker:
                         text.rfind("?", start, end),
                         text.rfind("。", start, end),  # Korean/Chinese period
                     )
-                    if sentence_break > start + self.chunk_size // 2:
+                    if sentence_break > half:
                         end = sentence_break + 1
             
             chunk_text = text[start:end].strip()
@@ -119,9 +290,12 @@ class BaseChunker:
                 ))
                 chunk_idx += 1
             
-            start = end - self.chunk_overlap
-            if start >= len(text):
+            if end >= len(text):
                 break
+            
+            # Overlap proportional to the span's characters per token
+            overlap = (full_end - start) * self.chunk_overlap // max(self.chunk_size, 1)
+            start = max(end - overlap, start + 1)
         
         return chunks
 
@@ -188,14 +362,17 @@ class SlideChunker(BaseChunker):
             if not slide_content.strip():
                 continue
             
-            # Create single chunk per slide (slides are usually short)
-            chunks.append(Chunk(
-                text=slide_content,
-                chunk_index=chunk_idx,
-                slide=slide_num,
-                slide_title=slide_title,
-            ))
-            chunk_idx += 1
+            # Single chunk per slide (slides are usually short)
+            if self.fits(slide_content):
+                slide_chunks = [Chunk(text=slide_content, chunk_index=chunk_idx)]
+            else:
+                slide_chunks = self._simple_chunk(slide_content)
+            for chunk in slide_chunks:
+                chunk.chunk_index = chunk_idx
+                chunk.slide = slide_num
+                chunk.slide_title = slide_title
+                chunks.append(chunk)
+                chunk_idx += 1
         
         return chunks
 
@@ -227,7 +404,7 @@ class ExcelChunker(BaseChunker):
                 continue
             
             # For large sheets, split into chunks
-            if len(sheet_content) > self.chunk_size:
+            if not self.fits(sheet_content):
                 sheet_chunks = self._simple_chunk(sheet_content)
                 for chunk in sheet_chunks:
                     chunk.chunk_index = chunk_idx
@@ -280,7 +457,7 @@ class HeadingChunker(BaseChunker):
                 continue
             
             # Chunk this section
-            if len(section_text) > self.chunk_size:
+            if not self.fits(section_text):
                 section_chunks = self._simple_chunk(section_text)
                 for chunk in section_chunks:
                     chunk.chunk_index = chunk_idx
@@ -319,8 +496,9 @@ def get_chunker_for_file_type(file_type: FileType) -> BaseChunker:
 def chunk_content(
     file_path: str,
     extractor_result: ExtractorResult,
-    chunk_size: int = DEFAULT_CHUNK_SIZE,
-    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    model_name: Optional[str] = None,
 ) -> List[Chunk]:
     """
     Chunk extracted content using file-type-specific logic.
@@ -328,16 +506,20 @@ def chunk_content(
     Args:
         file_path: Path to the file.
         extractor_result: Result from content extraction.
-        chunk_size: Maximum chunk size in characters.
-        chunk_overlap: Overlap between chunks.
+        chunk_size: Maximum chunk size in model tokens. Uses the model's
+            profile if None.
+        chunk_overlap: Overlap between chunks in model tokens.
+        model_name: Embedding model the chunks are sized for.
     
     Returns:
         List of Chunk objects.
     """
+    profile = get_chunk_profile(model_name)
     file_type = get_file_type(file_path)
     chunker = get_chunker_for_file_type(file_type)
-    chunker.chunk_size = chunk_size
-    chunker.chunk_overlap = chunk_overlap
+    chunker.chunk_size = chunk_size or profile.chunk_size
+    chunker.chunk_overlap = chunk_overlap if chunk_overlap is not None else profile.chunk_overlap
+    chunker.counter = get_token_counter(model_name)
     
     return chunker.chunk(
         extractor_result.text,
@@ -352,8 +534,15 @@ __all__ = [
     "SlideChunker",
     "ExcelChunker",
     "HeadingChunker",
+    "ChunkProfile",
+    "TokenCounter",
+    "TokenizerCounter",
     "get_chunker_for_file_type",
+    "get_chunk_profile",
+    "get_token_counter",
     "chunk_content",
+    "MODEL_CHUNK_PROFILES",
     "DEFAULT_CHUNK_SIZE",
     "DEFAULT_CHUNK_OVERLAP",
+    "TOKENIZERS_AVAILABLE",
 ]
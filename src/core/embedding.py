@@ -1,27 +1,22 @@
 """
 Local Finder X v2.0 - Embedding Model Wrapper
 
-Singleton wrapper for SentenceTransformer with device auto-detection.
+Singleton wrapper for the embedding model with device auto-detection.
+Inference runs on a pluggable backend (PyTorch SentenceTransformer or
+an exported ONNX model), see src/core/embedding_backends.py.
 Based on Master Plan Phase 3 specifications.
 """
 
 import os
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 import numpy as np
 
-try:
-    import torch
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
-    torch = None
-
-try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
-    SentenceTransformer = None
+from src.config.settings import get_settings
+from src.core.embedding_backends import (
+    TORCH_AVAILABLE, SENTENCE_TRANSFORMERS_AVAILABLE, ONNXRUNTIME_AVAILABLE,
+    BACKEND_AUTO, BACKEND_ONNX, EmbeddingBackend, TorchBackend, OnnxBackend,
+    get_onnx_model_dir, has_onnx_model,
+)
 
 
 # =============================================================================
@@ -36,6 +31,16 @@ FALLBACK_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-
 # Embedding dimension for BGE-M3
 EMBEDDING_DIM = 1024
 
+# Dynamic batching: padded tokens per batch (batch size x longest text)
+DEFAULT_TOKEN_BUDGET = 8192
+MAX_BATCH_SIZE = 128
+MAX_SEQ_TOKENS = 512
+
+# Projection kinds for stored embeddings
+PROJECTION_NONE = "none"
+PROJECTION_PCA = "pca"
+PROJECTION_TRUNCATE = "truncate"  # Matryoshka-style prefix, only for models trained for it
+
 
 # =============================================================================
 # Device Detection
@@ -53,6 +58,8 @@ def get_best_device() -> str:
     if not TORCH_AVAILABLE:
         return "cpu"
     
+    import torch
+    
     # Check CUDA
     if torch.cuda.is_available():
         return "cuda"
@@ -64,33 +71,91 @@ def get_best_device() -> str:
     return "cpu"
 
 
+# =============================================================================
+# Dynamic Batching
+# =============================================================================
+
+def estimate_token_count(text: str) -> int:
+    """
+    Cheap token count estimate for batching.
+    
+    About four UTF-8 bytes per subword token for both English and Korean
+    (three bytes per Hangul syllable), plus the special tokens.
+    """
+    return len(text.encode("utf-8")) // 4 + 2
+
+
+def plan_token_batches(
+    lengths: List[int],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> List[List[int]]:
+    """
+    Group texts into batches of similar length under a token budget.
+    
+    Texts are sorted by estimated length so each batch pads to a length
+    close to its own texts; a batch grows while (size x longest) stays
+    within the budget.
+    
+    Args:
+        lengths: Estimated token length per text.
+        token_budget: Maximum padded tokens per batch.
+        max_batch_size: Maximum texts per batch.
+    
+    Returns:
+        Batches as lists of indices into lengths.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for index in order:
+        padded_length = min(lengths[index], MAX_SEQ_TOKENS)
+        if batch and (
+            (len(batch) + 1) * padded_length > token_budget or len(batch) >= max_batch_size
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 # =============================================================================
 # Embedding Model Singleton
 # =============================================================================
 
 class EmbeddingModel:
     """
-    Singleton wrapper for embedding model.
+    Singleton wrapper for embedding model (one instance per model name).
+    
+    EmbeddingModel() is the configured indexing/recall model;
+    EmbeddingModel(name) is a specific model, e.g. the two-tier
+    rescoring model.
     
     Features:
     - Automatic device detection (CUDA/MPS/CPU)
     - Lazy loading (model loaded on first use)
     - Offline mode support via local_files_only
+    - ONNX Runtime backend with automatic fallback to PyTorch
     """
     
-    _instance: Optional["EmbeddingModel"] = None
+    _instances: Dict[str, "EmbeddingModel"] = {}
     
-    def __new__(cls) -> "EmbeddingModel":
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    def __new__(cls, model_name: Optional[str] = None) -> "EmbeddingModel":
+        key = model_name or ""
+        if key not in cls._instances:
+            instance = super().__new__(cls)
+            instance._initialized = False
+            cls._instances[key] = instance
+        return cls._instances[key]
     
-    def __init__(self):
+    def __init__(self, model_name: Optional[str] = None):
         if self._initialized:
             return
         
-        self._model: Optional[SentenceTransformer] = None
+        self._requested_model_name = model_name
+        self._model: Optional[EmbeddingBackend] = None
         self._model_name: Optional[str] = None
         self._device: Optional[str] = None
         self._initialized = True
@@ -103,8 +168,8 @@ class EmbeddingModel:
         return self._device
     
     @property
-    def model(self) -> Optional[SentenceTransformer]:
-        """Lazy-load the model."""
+    def model(self) -> Optional[EmbeddingBackend]:
+        """Lazy-load the model (its inference backend)."""
         if self._model is None:
             self._load_model()
         return self._model
@@ -113,9 +178,49 @@ class EmbeddingModel:
     def model_name(self) -> str:
         """Get the current model name."""
         if self._model_name is None:
-            self._model_name = DEFAULT_MODEL_NAME
+            self._model_name = self._default_model_name()
         return self._model_name
     
+    def _default_model_name(self) -> str:
+        """Requested model, else the configured one, else the default."""
+        return (
+            self._requested_model_name
+            or get_settings().indexing.embedding_model
+            or DEFAULT_MODEL_NAME
+        )
+    
+    @property
+    def backend_name(self) -> Optional[str]:
+        """Get the name of the loaded inference backend."""
+        return self._model.name if self._model is not None else None
+    
+    def _create_backend(self, model_name: str) -> Optional[EmbeddingBackend]:
+        """
+        Create the inference backend for a model.
+        
+        The ONNX backend is used when preferred and an exported model
+        exists; any failure falls back to PyTorch.
+        """
+        preference = get_settings().indexing.embedding_backend
+        
+        if preference in (BACKEND_AUTO, BACKEND_ONNX):
+            if ONNXRUNTIME_AVAILABLE and has_onnx_model(model_name):
+                try:
+                    backend = OnnxBackend(get_onnx_model_dir(model_name))
+                    print(f"Loading embedding model: {model_name} (onnx, cpu)")
+                    return backend
+                except Exception as e:
+                    print(f"Error loading ONNX model {model_name}, falling back to torch: {e}")
+            elif preference == BACKEND_ONNX:
+                print(f"Warning: no ONNX model for {model_name}, falling back to torch")
+        
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            print("Warning: sentence-transformers not installed")
+            return None
+        
+        print(f"Loading embedding model: {model_name} on {self.device}")
+        return TorchBackend(model_name, self.device)
+    
     def _load_model(
         self,
         model_name: Optional[str] = None,
@@ -128,35 +233,24 @@ class EmbeddingModel:
             model_name: Model name or path. Uses default if None.
             local_files_only: If True, only use cached/local models.
         """
-        if not SENTENCE_TRANSFORMERS_AVAILABLE:
-            print("Warning: sentence-transformers not installed")
-            return
-        
-        model_name = model_name or DEFAULT_MODEL_NAME
-        device = self.device
+        model_name = model_name or self._default_model_name()
         
         try:
-            print(f"Loading embedding model: {model_name} on {device}")
-            
-            self._model = SentenceTransformer(
-                model_name,
-                device=device,
-            )
+            self._model = self._create_backend(model_name)
+            if self._model is None:
+                return
             self._model_name = model_name
             
             print(f"Model loaded successfully")
-            
+        
         except Exception as e:
             print(f"Error loading model {model_name}: {e}")
             
-            # Try fallback model
-            if model_name != FALLBACK_MODEL_NAME:
+            # Try fallback model (not for an explicitly requested model)
+            if model_name != FALLBACK_MODEL_NAME and self._requested_model_name is None:
                 print(f"Trying fallback model: {FALLBACK_MODEL_NAME}")
                 try:
-                    self._model = SentenceTransformer(
-                        FALLBACK_MODEL_NAME,
-                        device=device,
-                    )
+                    self._model = self._create_backend(FALLBACK_MODEL_NAME)
                     self._model_name = FALLBACK_MODEL_NAME
                     print(f"Fallback model loaded successfully")
                 except Exception as e2:
@@ -189,7 +283,7 @@ class EmbeddingModel:
         try:
             embeddings = self.model.encode(
                 texts,
-                normalize_embeddings=normalize,
+                normalize=normalize,
                 show_progress_bar=show_progress_bar,
             )
             return embeddings
@@ -197,6 +291,50 @@ class EmbeddingModel:
             print(f"Error encoding: {e}")
             return None
     
+    def encode_batched(
+        self,
+        texts: List[str],
+        normalize: bool = True,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+    ) -> Optional[np.ndarray]:
+        """
+        Encode many texts in length-bucketed batches.
+        
+        Batches are sized by a padded-token budget instead of an item
+        count, so short slide titles are not padded to paragraph length.
+        The output keeps the input order.
+        
+        Args:
+            texts: Texts to encode.
+            normalize: Whether to normalize embeddings.
+            token_budget: Maximum padded tokens per batch.
+        
+        Returns:
+            Array of shape (len(texts), dimension), or None if failed.
+        """
+        if self.model is None:
+            return None
+        
+        lengths = [estimate_token_count(text) for text in texts]
+        embeddings: Optional[np.ndarray] = None
+        try:
+            for batch in plan_token_batches(lengths, token_budget):
+                batch_embeddings = self.model.encode(
+                    [texts[i] for i in batch],
+                    normalize=normalize,
+                    batch_size=len(batch),
+                )
+                if embeddings is None:
+                    embeddings = np.zeros((len(texts), batch_embeddings.shape[1]), dtype=np.float32)
+                embeddings[batch] = batch_embeddings
+        except Exception as e:
+            print(f"Error encoding: {e}")
+            return None
+        
+        if embeddings is None:
+            return np.zeros((0, self.get_dimension()), dtype=np.float32)
+        return embeddings
+    
     def encode_query(self, query: str) -> Optional[List[float]]:
         """
         Encode a single query and return as list.
@@ -215,7 +353,7 @@ class EmbeddingModel:
     def get_dimension(self) -> int:
         """Get embedding dimension."""
         if self.model is not None:
-            return self.model.get_sentence_embedding_dimension()
+            return self.model.get_dimension()
         return EMBEDDING_DIM
     
     def is_available(self) -> bool:
@@ -223,13 +361,119 @@ class EmbeddingModel:
         return self.model is not None
 
 
+# =============================================================================
+# Dimensionality Reduction
+# =============================================================================
+
+class EmbeddingProjection:
+    """
+    Linear projection of embeddings to fewer dimensions.
+    
+    - pca: centered projection onto the top principal components of a
+      corpus sample (fitted offline with NumPy)
+    - truncate: keep the first output_dim dimensions
+    
+    Projected vectors are re-normalized, so distances stay cosine-like.
+    The same parameters must be applied to stored chunks and to queries.
+    """
+    
+    def __init__(
+        self,
+        kind: str,
+        input_dim: int,
+        output_dim: int,
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+    ):
+        self.kind = kind
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.mean = mean
+        self.components = components
+    
+    @classmethod
+    def truncation(cls, input_dim: int, output_dim: int) -> "EmbeddingProjection":
+        """Create a prefix-truncation projection."""
+        return cls(PROJECTION_TRUNCATE, input_dim, min(output_dim, input_dim))
+    
+    @classmethod
+    def fit_pca(cls, sample: np.ndarray, output_dim: int) -> "EmbeddingProjection":
+        """
+        Fit a PCA projection from a sample of embeddings.
+        
+        Args:
+            sample: Array of shape (n_samples, input_dim).
+            output_dim: Number of principal components to keep.
+        """
+        sample = np.asarray(sample, dtype=np.float32)
+        output_dim = min(output_dim, sample.shape[0], sample.shape[1])
+        mean = sample.mean(axis=0)
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        return cls(
+            PROJECTION_PCA,
+            input_dim=sample.shape[1],
+            output_dim=output_dim,
+            mean=mean,
+            components=vt[:output_dim].astype(np.float32),
+        )
+    
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Project and re-normalize one vector or a batch of vectors.
+        
+        Returns:
+            Array of shape (..., output_dim).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.kind == PROJECTION_PCA:
+            projected = (vectors - self.mean) @ self.components.T
+        else:
+            projected = vectors[..., :self.output_dim]
+        
+        norms = np.linalg.norm(projected, axis=-1, keepdims=True)
+        return projected / np.where(norms > 0, norms, 1.0)
+    
+    def save(self, path) -> None:
+        """Save the projection parameters to an .npz file."""
+        arrays = {}
+        if self.kind == PROJECTION_PCA:
+            arrays = {"mean": self.mean, "components": self.components}
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                kind=np.array(self.kind),
+                input_dim=np.array(self.input_dim),
+                output_dim=np.array(self.output_dim),
+                **arrays,
+            )
+    
+    @classmethod
+    def load(cls, path) -> Optional["EmbeddingProjection"]:
+        """Load projection parameters, or None if the file is missing or invalid."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                kind = str(data["kind"])
+                return cls(
+                    kind,
+                    input_dim=int(data["input_dim"]),
+                    output_dim=int(data["output_dim"]),
+                    mean=data["mean"] if kind == PROJECTION_PCA else None,
+                    components=data["components"] if kind == PROJECTION_PCA else None,
+                )
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Warning: Could not load embedding projection: {e}")
+            return None
+
+
 # =============================================================================
 # Convenience Functions
 # =============================================================================
 
-def get_embedding_model() -> EmbeddingModel:
-    """Get the singleton embedding model instance."""
-    return EmbeddingModel()
+def get_embedding_model(model_name: Optional[str] = None) -> EmbeddingModel:
+    """Get the singleton embedding model instance (of a model name)."""
+    return EmbeddingModel(model_name)
 
 
 def encode_texts(texts: Union[str, List[str]]) -> Optional[np.ndarray]:
@@ -245,9 +489,17 @@ def encode_query(query: str) -> Optional[List[float]]:
 __all__ = [
     "TORCH_AVAILABLE",
     "SENTENCE_TRANSFORMERS_AVAILABLE",
+    "ONNXRUNTIME_AVAILABLE",
     "DEFAULT_MODEL_NAME",
     "FALLBACK_MODEL_NAME",
     "EMBEDDING_DIM",
+    "PROJECTION_NONE",
+    "PROJECTION_PCA",
+    "PROJECTION_TRUNCATE",
+    "EmbeddingProjection",
+    "DEFAULT_TOKEN_BUDGET",
+    "estimate_token_count",
+    "plan_token_batches",
     "get_best_device",
     "EmbeddingModel",
     "get_embedding_model",
@@ -0,0 +1,277 @@
+"""
+Local Finder X v2.0 - Embedding Inference Backends
+
+Pluggable inference backends for EmbeddingModel.
+- torch: SentenceTransformer on PyTorch (CUDA / MPS / CPU)
+- onnx:  exported, int8-quantized model on ONNX Runtime (CPU)
+
+The ONNX backend never imports torch, which saves seconds of startup
+and most of the model RAM on CPU-only machines. Models are exported
+once with export_onnx_model() (this step does need torch).
+"""
+
+import importlib.util
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from src.config.paths import get_models_dir
+
+
+TORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+ONNXRUNTIME_AVAILABLE = (
+    importlib.util.find_spec("onnxruntime") is not None
+    and importlib.util.find_spec("tokenizers") is not None
+)
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+BACKEND_AUTO = "auto"    # ONNX if an exported model exists, else torch
+BACKEND_ONNX = "onnx"
+BACKEND_TORCH = "torch"
+
+# Files of an exported ONNX model directory
+ONNX_MODEL_FILENAME = "model_int8.onnx"
+ONNX_TOKENIZER_FILENAME = "tokenizer.json"
+ONNX_CONFIG_FILENAME = "embedding_config.json"
+
+DEFAULT_MAX_SEQ_LENGTH = 512
+DEFAULT_BATCH_SIZE = 32
+
+
+def get_onnx_model_dir(model_name: str) -> Path:
+    """Get the directory of the exported ONNX version of a model."""
+    return get_models_dir() / "onnx" / model_name.replace("/", "--")
+
+
+def has_onnx_model(model_name: str) -> bool:
+    """Check if an exported ONNX model exists for a model name."""
+    return (get_onnx_model_dir(model_name) / ONNX_MODEL_FILENAME).exists()
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+
+class EmbeddingBackend:
+    """Base class for embedding inference backends."""
+    
+    name = ""
+    
+    def encode(
+        self,
+        texts: List[str],
+        normalize: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """Encode texts to an array of shape (len(texts), dimension)."""
+        raise NotImplementedError
+    
+    def get_dimension(self) -> int:
+        """Get the embedding dimension."""
+        raise NotImplementedError
+
+
+class TorchBackend(EmbeddingBackend):
+    """SentenceTransformer on PyTorch."""
+    
+    name = BACKEND_TORCH
+    
+    def __init__(self, model_name: str, device: str):
+        from sentence_transformers import SentenceTransformer
+        
+        self.model = SentenceTransformer(model_name, device=device)
+    
+    def encode(
+        self,
+        texts: List[str],
+        normalize: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            normalize_embeddings=normalize,
+            show_progress_bar=show_progress_bar,
+        )
+    
+    def get_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    Exported transformer on ONNX Runtime (CPU).
+    
+    Tokenization uses the fast `tokenizers` library and pooling
+    (CLS or mean) is done in NumPy, matching the SentenceTransformer
+    pipeline the model was exported from.
+    """
+    
+    name = BACKEND_ONNX
+    
+    def __init__(self, model_dir: Path, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        with open(model_dir / ONNX_CONFIG_FILENAME, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.pooling = config.get("pooling", "mean")
+        self.dimension = int(config["dimension"])
+        max_length = int(config.get("max_seq_length", DEFAULT_MAX_SEQ_LENGTH))
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(model_dir / ONNX_MODEL_FILENAME),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        
+        self.tokenizer = Tokenizer.from_file(str(model_dir / ONNX_TOKENIZER_FILENAME))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(
+            pad_id=int(config.get("pad_token_id", 0)),
+            pad_token=config.get("pad_token", "[PAD]"),
+        )
+    
+    def encode(
+        self,
+        texts: List[str],
+        normalize: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0]
+            
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = attention_mask[..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            outputs.append(pooled.astype(np.float32))
+        
+        embeddings = np.concatenate(outputs)
+        if normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.where(norms > 0, norms, 1.0)
+        return embeddings
+    
+    def get_dimension(self) -> int:
+        return self.dimension
+
+
+# =============================================================================
+# Export
+# =============================================================================
+
+def export_onnx_model(
+    model_name: str,
+    output_dir: Optional[Path] = None,
+    quantize: bool = True,
+) -> Path:
+    """
+    Export a SentenceTransformer model to ONNX for OnnxBackend.
+    
+    Runs offline (requires torch, sentence-transformers and onnxruntime).
+    Weights are dynamically quantized to int8 unless quantize is False.
+    
+    Args:
+        model_name: Model name or path.
+        output_dir: Target directory. Uses get_onnx_model_dir() if None.
+        quantize: Quantize weights to int8.
+    
+    Returns:
+        The output directory.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    
+    output_dir = output_dir or get_onnx_model_dir(model_name)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    tokenizer = transformer.tokenizer
+    pooling = "mean"
+    if len(st_model) > 1 and getattr(st_model[1], "pooling_mode_cls_token", False):
+        pooling = "cls"
+    
+    dummy = tokenizer(["Local Finder X"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names + ["last_hidden_state"]}
+    
+    fp32_path = output_dir / "model_fp32.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer.auto_model,
+            tuple(dummy[n] for n in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    
+    model_path = output_dir / ONNX_MODEL_FILENAME
+    if quantize:
+        quantize_dynamic(str(fp32_path), str(model_path), weight_type=QuantType.QInt8)
+        fp32_path.unlink()
+    else:
+        fp32_path.replace(model_path)
+    
+    tokenizer.save_pretrained(str(output_dir))
+    config = {
+        "model_name": model_name,
+        "pooling": pooling,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "max_seq_length": st_model.max_seq_length or DEFAULT_MAX_SEQ_LENGTH,
+        "pad_token_id": tokenizer.pad_token_id or 0,
+        "pad_token": tokenizer.pad_token,
+        "quantized": quantize,
+    }
+    with open(output_dir / ONNX_CONFIG_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+    
+    print(f"Exported {model_name} to {output_dir}")
+    return output_dir
+
+
+__all__ = [
+    "TORCH_AVAILABLE",
+    "SENTENCE_TRANSFORMERS_AVAILABLE",
+    "ONNXRUNTIME_AVAILABLE",
+    "BACKEND_AUTO",
+    "BACKEND_ONNX",
+    "BACKEND_TORCH",
+    "EmbeddingBackend",
+    "TorchBackend",
+    "OnnxBackend",
+    "get_onnx_model_dir",
+    "has_onnx_model",
+    "export_onnx_model",
+]
@@ -0,0 +1,407 @@
+"""
+Local Finder X v2.0 - Embedding Service
+
+Runs the embedding model in a dedicated worker process.
+
+Inference in the UI process competes with PyQt rendering and content
+extraction for the GIL, and the model's RAM is never given back. The
+service process owns EmbeddingModel, takes requests over a queue and
+writes embeddings straight into a shared-memory buffer allocated by
+the caller, so vectors are never pickled. After an idle period the
+worker exits (releasing the model) and is restarted on the next request,
+unless kept alive while the application is in the foreground.
+
+Search queries and indexing batches use separate channels: the worker
+serves pending queries first, also between slices of a large indexing
+batch, so a one-line query never waits for a whole batch.
+"""
+
+import atexit
+import functools
+import multiprocessing
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from multiprocessing import shared_memory
+from typing import List, Optional, Dict, Any, Callable, Tuple
+
+import numpy as np
+
+from src.config.settings import get_settings
+from src.core.embedding import get_embedding_model
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Default idle period before the worker exits and frees the model
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+# Model loading can take a while on first use
+REQUEST_TIMEOUT = 600.0
+
+# Worker start method; spawn avoids forking a process with Qt/threads
+START_METHOD = "spawn"
+
+# Request channels: queries (served first) and bulk indexing batches
+QUERY_CHANNEL = "query"
+BULK_CHANNEL = "bulk"
+CHANNELS = (QUERY_CHANNEL, BULK_CHANNEL)
+
+# Texts encoded between checks for pending queries in a bulk request
+BULK_SLICE_SIZE = 64
+
+
+# =============================================================================
+# Worker Process
+# =============================================================================
+
+def _worker_main(
+    requests: "multiprocessing.Queue",
+    responses: Dict[str, "multiprocessing.Queue"],
+    idle_timeout: float,
+    model_factory: Callable = get_embedding_model,
+    keep_alive: Optional[Any] = None,
+) -> None:
+    """
+    Embedding worker loop.
+    
+    Requests are (channel, request_id, op, payload) tuples; responses
+    are (request_id, ok, result) on the channel's response queue. Query
+    requests are served before bulk ones, and between the slices of a
+    bulk encode. A None request or the idle timeout ends the loop; the
+    idle timeout is ignored while the keep_alive event is set.
+    """
+    model = model_factory()
+    pending: Dict[str, deque] = {channel: deque() for channel in CHANNELS}
+    
+    def receive(block: bool) -> bool:
+        """Move arrived requests into pending; False on shutdown."""
+        while True:
+            try:
+                if block:
+                    message = requests.get(timeout=idle_timeout if idle_timeout > 0 else None)
+                else:
+                    message = requests.get_nowait()
+            except queue.Empty:
+                if block and keep_alive is not None and keep_alive.is_set():
+                    continue
+                return not block
+            if message is None:
+                return False
+            pending[message[0]].append(message)
+            block = False
+    
+    def serve(message: tuple) -> None:
+        channel, request_id, op, payload = message
+        try:
+            result = _handle_request(model, op, payload, serve_queries)
+            responses[channel].put((request_id, True, result))
+        except Exception as e:
+            responses[channel].put((request_id, False, str(e)))
+    
+    def serve_queries() -> None:
+        """Answer the queries that arrived meanwhile."""
+        receive(block=False)
+        while pending[QUERY_CHANNEL]:
+            serve(pending[QUERY_CHANNEL].popleft())
+    
+    while True:
+        if pending[QUERY_CHANNEL]:
+            serve(pending[QUERY_CHANNEL].popleft())
+        elif pending[BULK_CHANNEL]:
+            serve(pending[BULK_CHANNEL].popleft())
+        elif not receive(block=True):
+            break
+
+
+def _handle_request(model, op: str, payload: Any, between_slices: Callable[[], None]) -> Any:
+    """Run one worker request; between_slices is called during long encodes."""
+    if op == "info":
+        available = model.is_available()
+        return {
+            "available": available,
+            "model_name": model.model_name if available else None,
+            "dimension": model.get_dimension(),
+            "backend": getattr(model, "backend_name", None),
+        }
+    if op == "encode":
+        texts, shm_name, dimension = payload
+        # Slices of similar length, as the model's own batching would form
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        shm = shared_memory.SharedMemory(name=shm_name)
+        out = np.ndarray((len(texts), dimension), dtype=np.float32, buffer=shm.buf)
+        try:
+            for start in range(0, len(order), BULK_SLICE_SIZE):
+                if start > 0:
+                    between_slices()
+                indices = order[start:start + BULK_SLICE_SIZE]
+                embeddings = model.encode_batched([texts[i] for i in indices])
+                if embeddings is None:
+                    return None
+                if embeddings.shape != (len(indices), dimension):
+                    raise ValueError(f"unexpected embedding shape {embeddings.shape}")
+                out[indices] = embeddings
+        finally:
+            del out
+            shm.close()
+        return (len(texts), dimension)
+    raise ValueError(f"unknown request {op}")
+
+
+# =============================================================================
+# Service Client
+# =============================================================================
+
+class EmbeddingService:
+    """
+    Client for the embedding worker process.
+    
+    Exposes the same interface as EmbeddingModel for what indexing and
+    search need (is_available, model_name, get_dimension, encode_batched,
+    encode_query). Requests are serialized per channel: queries
+    (encode_query, encode_queries) do not wait for indexing batches.
+    The worker is started on demand and restarted after an idle exit.
+    """
+    
+    def __init__(
+        self,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        model_factory: Callable = get_embedding_model,
+    ):
+        """
+        Initialize the service (the worker starts on first use).
+        
+        Args:
+            idle_timeout: Seconds without requests before the worker exits.
+                0 keeps it running.
+            model_factory: Picklable callable returning the model in the worker.
+        """
+        self.idle_timeout = idle_timeout
+        self._model_factory = model_factory
+        self._context = multiprocessing.get_context(START_METHOD)
+        self._process = None
+        self._requests = None
+        self._responses: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._channel_locks = {channel: threading.Lock() for channel in CHANNELS}
+        self._keep_alive = self._context.Event()
+        self._next_id = 0
+        self._info: Optional[Dict[str, Any]] = None
+        
+        # Segments whose arrays were freed; closed on the next call
+        self._released: List[shared_memory.SharedMemory] = []
+    
+    def _send(self, channel: str, request_id: int, op: str, payload: Any) -> Tuple[Any, Any]:
+        """
+        Send a request, starting the worker if it is not running.
+        
+        Returns:
+            (worker process, response queue of the channel).
+        """
+        with self._lock:
+            if self._process is None or not self._process.is_alive():
+                self._requests = self._context.Queue()
+                self._responses = {channel: self._context.Queue() for channel in CHANNELS}
+                self._process = self._context.Process(
+                    target=_worker_main,
+                    args=(
+                        self._requests, self._responses, self.idle_timeout,
+                        self._model_factory, self._keep_alive,
+                    ),
+                    name="embedding-worker",
+                    daemon=True,
+                )
+                self._process.start()
+            self._requests.put((channel, request_id, op, payload))
+            return self._process, self._responses[channel]
+    
+    def _call(self, op: str, payload: Any = None, channel: str = BULK_CHANNEL) -> Any:
+        """Send a request to the worker and wait for its response."""
+        with self._channel_locks[channel]:
+            with self._lock:
+                self._next_id += 1
+                request_id = self._next_id
+            process, responses = self._send(channel, request_id, op, payload)
+            deadline = time.monotonic() + REQUEST_TIMEOUT
+            
+            while True:
+                try:
+                    response_id, ok, result = responses.get(timeout=1.0)
+                except queue.Empty:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Embedding worker did not answer {op}")
+                    if process is not self._process or not process.is_alive():
+                        # Exited between requests (idle), crashed or was
+                        # restarted by the other channel: resend
+                        process, responses = self._send(channel, request_id, op, payload)
+                    continue
+                if response_id != request_id:
+                    continue  # stale response of an abandoned request
+                if not ok:
+                    raise RuntimeError(f"Embedding worker error: {result}")
+                return result
+    
+    @property
+    def is_running(self) -> bool:
+        """Whether the worker process (and its loaded model) is up."""
+        return self._process is not None and self._process.is_alive()
+    
+    def set_keep_alive(self, keep_alive: bool) -> None:
+        """Suspend the idle exit (e.g. while the application is in the foreground)."""
+        if keep_alive:
+            self._keep_alive.set()
+        else:
+            self._keep_alive.clear()
+    
+    @property
+    def info(self) -> Dict[str, Any]:
+        """Model information reported by the worker (loads the model)."""
+        if self._info is None:
+            self._info = self._call("info", channel=QUERY_CHANNEL)
+        return self._info
+    
+    @property
+    def model_name(self) -> str:
+        return self.info.get("model_name") or ""
+    
+    @property
+    def backend_name(self) -> Optional[str]:
+        return self.info.get("backend")
+    
+    def is_available(self) -> bool:
+        """Check if the worker has a usable model."""
+        try:
+            return bool(self.info.get("available"))
+        except Exception as e:
+            print(f"Warning: Embedding worker unavailable: {e}")
+            return False
+    
+    def get_dimension(self) -> int:
+        return int(self.info["dimension"])
+    
+    def encode_batched(self, texts: List[str], channel: str = BULK_CHANNEL) -> Optional[np.ndarray]:
+        """
+        Encode texts in the worker.
+        
+        Args:
+            texts: Texts to encode.
+            channel: QUERY_CHANNEL for search queries, BULK_CHANNEL otherwise.
+        
+        Returns:
+            Array of shape (len(texts), dimension) backed by shared
+            memory (no copy), or None if failed.
+        """
+        self._close_released()
+        dimension = self.get_dimension()
+        if not texts:
+            return np.zeros((0, dimension), dtype=np.float32)
+        
+        shm = shared_memory.SharedMemory(create=True, size=len(texts) * dimension * 4)
+        try:
+            result = self._call("encode", (texts, shm.name, dimension), channel)
+        except Exception as e:
+            print(f"Error encoding in worker: {e}")
+            result = None
+        shm.unlink()
+        if result is None:
+            shm.close()
+            return None
+        
+        embeddings = np.ndarray((len(texts), dimension), dtype=np.float32, buffer=shm.buf)
+        weakref.finalize(embeddings, self._released.append, shm)
+        return embeddings
+    
+    def encode_queries(self, queries: List[str]) -> Optional[np.ndarray]:
+        """Encode search queries ahead of pending indexing batches."""
+        return self.encode_batched(queries, QUERY_CHANNEL)
+    
+    def encode_query(self, query: str) -> Optional[List[float]]:
+        """Encode a single query and return as list."""
+        result = self.encode_queries([query])
+        if result is not None:
+            return result[0].tolist()
+        return None
+    
+    def _close_released(self) -> None:
+        """Close shared memory segments whose arrays are gone."""
+        while self._released:
+            self._released.pop().close()
+    
+    def shutdown(self) -> None:
+        """Stop the worker process."""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                self._requests.put(None)
+                self._process.join(timeout=5)
+                if self._process.is_alive():
+                    self._process.terminate()
+            self._process = None
+            self._info = None
+
+
+# =============================================================================
+# Convenience Functions
+# =============================================================================
+
+# Singleton instances
+_embedding_service: Optional[EmbeddingService] = None
+_rescore_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the singleton embedding service."""
+    global _embedding_service
+    if _embedding_service is None:
+        settings = get_settings().indexing
+        _embedding_service = EmbeddingService(idle_timeout=settings.embedding_idle_timeout)
+        atexit.register(_embedding_service.shutdown)
+    return _embedding_service
+
+
+def get_embedder():
+    """
+    Get the embedder used by indexing and search.
+    
+    Returns the worker-process service when enabled in settings,
+    otherwise the in-process EmbeddingModel.
+    """
+    if get_settings().indexing.embedding_worker:
+        return get_embedding_service()
+    return get_embedding_model()
+
+
+def get_rescore_embedder():
+    """
+    Get the large model of two-tier search, or None if not configured.
+    
+    Runs in its own worker process when the embedding worker is enabled.
+    """
+    global _rescore_service
+    settings = get_settings().indexing
+    if not settings.rescore_model:
+        return None
+    if not settings.embedding_worker:
+        return get_embedding_model(settings.rescore_model)
+    
+    if _rescore_service is None:
+        _rescore_service = EmbeddingService(
+            idle_timeout=settings.embedding_idle_timeout,
+            model_factory=functools.partial(get_embedding_model, settings.rescore_model),
+        )
+        atexit.register(_rescore_service.shutdown)
+    return _rescore_service
+
+
+__all__ = [
+    "EmbeddingService",
+    "get_embedding_service",
+    "get_embedder",
+    "get_rescore_embedder",
+    "DEFAULT_IDLE_TIMEOUT",
+    "QUERY_CHANNEL",
+    "BULK_CHANNEL",
+]
@@ -7,7 +7,7 @@ Coordinates file enumeration, extraction, chunking, and storage.
 
 import time
 import uuid
-from typing import List, Optional, Dict, Any, Callable
+from typing import List, Optional, Dict, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -16,11 +16,14 @@ from src.core.file_enumerator import enumerate_files, EnumerationOptions
 from src.core.file_classifier import classify_file, FileCategory, FileType, is_content_indexed
 from src.core.extractors import get_extractor_for_file
 from src.core.chunker import chunk_content
-from src.core.tokenizer import tokenize
-from src.core.embedding import get_embedding_model
-from src.storage.manifest import ManifestStore, FileFingerprint, get_files_to_reindex, get_deleted_files
-from src.storage.vector_store import VectorStore, get_vector_store
-from src.storage.bm25_store import BM25Store, get_bm25_store
+from src.core.tokenizer import tokenize, tokenize_with_offsets, unique_tokens, token_offsets
+from src.core.embedding import EmbeddingProjection, PROJECTION_NONE, PROJECTION_PCA
+from src.core.embedding_service import get_embedder
+from src.config.settings import get_settings
+from src.storage.manifest import ManifestStore, FileFingerprint, get_files_to_reindex, iter_deleted_files
+from src.storage.shards import IndexShard, ShardManager, get_shard_manager
+from src.storage.file_store import FileStore, get_file_store
+from src.storage.rescore_store import get_rescore_store
 from src.storage.lancedb_store import LANCEDB_AVAILABLE
 
 
@@ -65,6 +68,16 @@ class IndexingResult:
 ProgressCallback = Callable[[IndexingProgress], None]
 
 
+# Chunks are embedded in bulk once this many are pending (across files),
+# so the embedding batcher can bucket them by length
+EMBED_BUFFER_CHUNKS = 512
+
+# The PCA projection is fitted once the index holds this many vectors
+# (and at least projection_dim); until then full vectors are stored
+PCA_MIN_SAMPLE = 1000
+PCA_SAMPLE_SIZE = 20000
+
+
 # =============================================================================
 # Indexing Orchestrator
 # =============================================================================
@@ -79,19 +92,22 @@ class IndexingOrchestrator:
     3. Content extraction
     4. Chunking
     5. Embedding generation
-    6. Storage (LanceDB + BM25)
+    6. Storage (per-root shards: LanceDB + BM25)
     """
     
     def __init__(
         self,
         manifest_store: Optional[ManifestStore] = None,
-        vector_store: Optional[VectorStore] = None,
-        bm25_store: Optional[BM25Store] = None,
+        shard_manager: Optional[ShardManager] = None,
+        file_store: Optional[FileStore] = None,
     ):
         self._manifest = manifest_store
-        self._vector_store = vector_store
-        self._bm25_store = bm25_store
+        self._shard_manager = shard_manager
+        self._file_store = file_store
         self._embedding_model = None
+        
+        # Chunks waiting for embedding: (shard, chunk record)
+        self._pending_chunks: List[Tuple[IndexShard, ChunkRecord]] = []
     
     @property
     def manifest(self) -> ManifestStore:
@@ -100,21 +116,21 @@ class IndexingOrchestrator:
         return self._manifest
     
     @property
-    def vector_store(self) -> VectorStore:
-        if self._vector_store is None:
-            self._vector_store = get_vector_store()
-        return self._vector_store
+    def shard_manager(self) -> ShardManager:
+        if self._shard_manager is None:
+            self._shard_manager = get_shard_manager()
+        return self._shard_manager
     
     @property
-    def bm25_store(self) -> BM25Store:
-        if self._bm25_store is None:
-            self._bm25_store = get_bm25_store()
-        return self._bm25_store
+    def file_store(self) -> FileStore:
+        if self._file_store is None:
+            self._file_store = get_file_store()
+        return self._file_store
     
     @property
     def embedding_model(self):
         if self._embedding_model is None:
-            self._embedding_model = get_embedding_model()
+            self._embedding_model = get_embedder()
         return self._embedding_model
     
     def index_directories(
@@ -139,15 +155,40 @@ class IndexingOrchestrator:
         progress = IndexingProgress()
         
         try:
-            # Step 1: Enumerate files
+            # Step 0: Move a pre-sharding index into per-root shards
+            if self.shard_manager.has_legacy_index():
+                self._migrate_legacy_index(directories)
+            
+            # Step 1: Enumerate files and route them to per-root shards
+            for directory in directories:
+                self.shard_manager.get_or_create_shard(directory)
+            self._check_embedding_model(directories)
+            
             enum_result = enumerate_files(directories, options)
             all_files = enum_result.files
             
+            file_shards: Dict[str, IndexShard] = {}
+            for path in all_files:
+                shard = self.shard_manager.shard_for_path(path)
+                if shard is not None:
+                    file_shards[path] = shard
+            touched_shards = {
+                shard.shard_id: shard
+                for shard in (self.shard_manager.get_shard(d) for d in directories)
+                if shard is not None
+            }
+            
             # Step 2: Determine what needs indexing
             new_files, modified_files, unchanged_files = get_files_to_reindex(
                 all_files, self.manifest
             )
-            deleted_files = get_deleted_files(all_files, self.manifest)
+            
+            # Only files under the roots being indexed can be deleted
+            deleted_files = []
+            for path in list(iter_deleted_files(all_files, self.manifest)):
+                shard = self.shard_manager.shard_for_path(path)
+                if shard is not None and shard.shard_id in touched_shards:
+                    deleted_files.append(path)
             
             progress.total_files = len(new_files) + len(modified_files) + len(deleted_files)
             progress.new_files = len(new_files)
@@ -169,7 +210,7 @@ class IndexingOrchestrator:
                 progress.current_file = path
                 
                 try:
-                    indexed = self._index_file(path)
+                    indexed = self._index_file(path, file_shards[path])
                     if indexed:
                         result.indexed_files += 1
                         if is_content_indexed(path):
@@ -187,12 +228,22 @@ class IndexingOrchestrator:
                     progress_callback(progress)
             
             # Step 5: Save stores
+            self._flush_pending_chunks()
             self.manifest.save()
-            self.bm25_store.save()
+            self.file_store.flush()
+            for shard in touched_shards.values():
+                shard.save()
+                if LANCEDB_AVAILABLE:
+                    try:
+                        shard.vector_store.ensure_file_indexes()
+                    except Exception:
+                        pass
+            if LANCEDB_AVAILABLE:
+                self._update_projection()
             
             result.total_files = len(all_files)
             result.success = result.error_count == 0
-            
+        
         except Exception as e:
             result.success = False
             result.errors.append(f"Indexing failed: {str(e)}")
@@ -200,7 +251,125 @@ class IndexingOrchestrator:
         result.elapsed_seconds = time.time() - start_time
         return result
     
-    def _index_file(self, file_path: str) -> bool:
+    def _migrate_legacy_index(self, directories: List[str]) -> None:
+        """
+        Move the pre-sharding single-table index into per-root shards.
+        
+        Files are routed to the shards of the directories being indexed
+        and of the configured indexed folders. Files under none of them
+        lose their manifest entry and are indexed again when their
+        folder is.
+        """
+        roots = list(dict.fromkeys(list(directories) + get_settings().indexed_folders))
+        for root in roots:
+            self.shard_manager.get_or_create_shard(root)
+        
+        owners: Dict[str, IndexShard] = {}
+        orphaned = []
+        paths = list(self.manifest.iter_paths())
+        for path, fp in self.manifest.iter_fingerprints(paths):
+            if fp is None:
+                continue
+            shard = self.shard_manager.shard_for_path(path)
+            if shard is None:
+                orphaned.append(path)
+                continue
+            owners[fp.file_id] = shard
+            fp.shard_id = shard.shard_id
+            self.manifest.set_fingerprint(path, fp)
+        
+        try:
+            doc_count, chunk_count = self.shard_manager.migrate_legacy_index(owners)
+        except Exception as e:
+            # Without the old data the files must be indexed again
+            print(f"Warning: Could not migrate the legacy index, re-indexing everything: {e}")
+            for root in roots:
+                self.shard_manager.drop_shard(root)
+            self.manifest.clear()
+            self.shard_manager.drop_legacy_index()
+            return
+        
+        for path in orphaned:
+            self.manifest.remove_fingerprint(path)
+        self.shard_manager.drop_legacy_index()
+        self.manifest.bump_generation()
+        self.manifest.save()
+        print(
+            f"Migrated legacy index into {len(roots)} shards: {len(owners)} files, "
+            f"{doc_count} BM25 documents, {chunk_count} chunks "
+            f"({len(orphaned)} files outside indexed folders will be re-indexed)"
+        )
+    
+    def _check_embedding_model(self, directories: List[str]) -> None:
+        """
+        Record the current embedding model in each root's shard.
+        
+        A shard whose vectors came from a different model, dimension or
+        vector encoding is dropped, so all of its files are indexed again
+        in this run. The projection is shared by all shards, so when its
+        settings change every root is dropped.
+        """
+        if not LANCEDB_AVAILABLE or not self.embedding_model.is_available():
+            return
+        
+        model_name = self.embedding_model.model_name
+        dimension = self.embedding_model.get_dimension()
+        settings = get_settings().indexing
+        projection = self.shard_manager.projection
+        if projection is not None and (
+            projection.kind != settings.projection
+            or projection.output_dim != settings.projection_dim
+        ):
+            print(f"Embedding projection changed ({settings.projection}), re-indexing all roots")
+            self.shard_manager.clear_projection()
+            for shard in self.shard_manager.shards:
+                self.remove_root(shard.root)
+                self.shard_manager.get_or_create_shard(shard.root)
+        
+        for directory in directories:
+            shard = self.shard_manager.get_or_create_shard(directory)
+            if shard.vector_store.ensure_embedding_model(model_name, dimension):
+                continue
+            
+            print(f"Vector layout changed ({model_name}, {dimension}d), re-indexing {shard.root}")
+            self.remove_root(directory)
+            shard = self.shard_manager.get_or_create_shard(directory)
+            shard.vector_store.ensure_embedding_model(model_name, dimension)
+    
+    def _update_projection(self) -> None:
+        """
+        Reduce the stored vectors of all shards to the configured projection.
+        
+        One projection is used for the whole index, so distances from
+        different shards stay comparable when their results are merged.
+        Truncation applies right away. PCA is fitted offline from a sample
+        of the vectors of all shards once enough are stored; the stored
+        vectors are rewritten and later chunks and queries use the same
+        parameters.
+        """
+        settings = get_settings().indexing
+        if settings.projection == PROJECTION_NONE or self.shard_manager.projection is not None:
+            return
+        
+        try:
+            dimension = self.embedding_model.get_dimension()
+            if not dimension or dimension <= settings.projection_dim:
+                return
+            
+            if settings.projection == PROJECTION_PCA:
+                sample = self.shard_manager.sample_vectors(PCA_SAMPLE_SIZE)
+                if len(sample) < max(PCA_MIN_SAMPLE, settings.projection_dim):
+                    return
+                projection = EmbeddingProjection.fit_pca(sample, settings.projection_dim)
+            else:
+                projection = EmbeddingProjection.truncation(dimension, settings.projection_dim)
+            
+            count = self.shard_manager.set_projection(projection)
+            print(f"Projected {count} vectors to {projection.output_dim}d ({projection.kind})")
+        except Exception as e:
+            print(f"Warning: Could not apply embedding projection: {e}")
+    
+    def _index_file(self, file_path: str, shard: IndexShard) -> bool:
         """
         Index a single file.
         
@@ -232,17 +401,23 @@ class IndexingOrchestrator:
             ),
         )
         
-        # Remove old data if exists
+        # Remove old data if exists (from the shard that holds it, which
+        # differs from the routed one once a nested root was added)
         old_fp = self.manifest.get_fingerprint(file_path)
         if old_fp:
-            self._remove_file_data(old_fp.file_id)
+            for owner in self._owner_shards(file_path, old_fp):
+                self._remove_file_data(old_fp.file_id, owner)
         
         if category == FileCategory.CONTENT_INDEXED:
             # Full content indexing
-            self._index_content(file_path, file_id, file_record)
+            self._index_content(file_path, file_id, file_record, shard)
         else:
             # Metadata-only indexing
-            self._index_metadata_only(file_path, file_id, file_record)
+            self._index_metadata_only(file_path, file_id, file_record, shard)
+            file_record.index_stats = IndexStats(last_indexed_at=time.time())
+        
+        # Store full file metadata for result assembly
+        self.file_store.put(file_record, shard)
         
         # Update manifest
         self.manifest.set_fingerprint(file_path, FileFingerprint(
@@ -251,7 +426,9 @@ class IndexingOrchestrator:
             modified_at=stat.st_mtime,
             last_indexed_at=time.time(),
             content_indexed=file_record.content_indexed,
+            shard_id=shard.shard_id,
         ))
+        self.manifest.bump_generation()
         
         return True
     
@@ -260,6 +437,7 @@ class IndexingOrchestrator:
         file_path: str,
         file_id: str,
         file_record: FileRecord,
+        shard: IndexShard,
     ) -> None:
         """Index file with full content extraction."""
         # Extract content
@@ -276,32 +454,28 @@ class IndexingOrchestrator:
             file_record.author = result.metadata["author"]
         
         # Chunk content
-        chunks = chunk_content(file_path, result)
+        chunks = chunk_content(file_path, result, model_name=self._chunk_model_name())
         if not chunks:
             return
         
-        # Create ChunkRecords
+        # Create ChunkRecords (embedded later in bulk)
         chunk_records = []
         bm25_docs = []
         
         for chunk in chunks:
             chunk_id = str(uuid.uuid4())
             
-            # Tokenize for BM25
-            tokens = tokenize(chunk.text)
-            
-            # Generate embedding
-            embedding = None
-            if self.embedding_model.is_available():
-                embedding = self.embedding_model.encode_query(chunk.text)
+            # Tokenize for BM25 (offsets are kept for snippet selection)
+            spans = tokenize_with_offsets(chunk.text)
+            tokens = unique_tokens(spans)
             
             chunk_record = ChunkRecord(
                 chunk_id=chunk_id,
                 file_id=file_id,
                 chunk_index=chunk.chunk_index,
                 text=chunk.text,
-                embedding=embedding,
                 tokens=tokens,
+                token_offsets=token_offsets(spans),
                 metadata=ChunkMetadata(
                     page=chunk.page,
                     slide=chunk.slide,
@@ -317,16 +491,14 @@ class IndexingOrchestrator:
             if tokens:
                 bm25_docs.append((chunk_id, file_id, tokens, False))
         
-        # Store in vector store
-        if LANCEDB_AVAILABLE and chunk_records:
-            try:
-                self.vector_store.add_chunks(chunk_records)
-            except Exception:
-                pass  # Skip if LanceDB not available
+        # Queue for embedding and vector storage
+        self._pending_chunks.extend((shard, record) for record in chunk_records)
+        if len(self._pending_chunks) >= EMBED_BUFFER_CHUNKS:
+            self._flush_pending_chunks()
         
         # Store in BM25
         if bm25_docs:
-            self.bm25_store.add_documents(bm25_docs)
+            shard.bm25_store.add_documents(bm25_docs)
         
         # Update file record stats
         file_record.index_stats = IndexStats(
@@ -334,11 +506,44 @@ class IndexingOrchestrator:
             last_indexed_at=time.time(),
         )
     
+    def _chunk_model_name(self) -> Optional[str]:
+        """Embedding model chunks are sized for (None if unavailable)."""
+        if self.embedding_model.is_available():
+            return self.embedding_model.model_name
+        return None
+    
+    def _flush_pending_chunks(self) -> None:
+        """
+        Embed all pending chunks in one length-bucketed pass and store
+        them in their shards' vector stores.
+        """
+        pending, self._pending_chunks = self._pending_chunks, []
+        if not pending or not LANCEDB_AVAILABLE:
+            return
+        
+        if self.embedding_model.is_available():
+            embeddings = self.embedding_model.encode_batched([record.text for _, record in pending])
+            if embeddings is not None:
+                for (_, record), embedding in zip(pending, embeddings):
+                    record.embedding = embedding.tolist()
+        
+        by_shard: Dict[str, Tuple[IndexShard, List[ChunkRecord]]] = {}
+        for shard, record in pending:
+            by_shard.setdefault(shard.shard_id, (shard, []))[1].append(record)
+        
+        for shard, records in by_shard.values():
+            try:
+                shard.vector_store.add_chunks(records)
+            except Exception as e:
+                print(f"Warning: Could not store vectors for {shard.root}: {e}")
+        self.manifest.bump_generation()
+    
     def _index_metadata_only(
         self,
         file_path: str,
         file_id: str,
         file_record: FileRecord,
+        shard: IndexShard,
     ) -> None:
         """Index file with metadata only (filename, path)."""
         path = Path(file_path)
@@ -353,7 +558,7 @@ class IndexingOrchestrator:
         
         if tokens:
             # Add as file-level BM25 document
-            self.bm25_store.add_document(
+            shard.bm25_store.add_document(
                 doc_id=file_id,
                 file_id=file_id,
                 tokens=tokens,
@@ -364,30 +569,91 @@ class IndexingOrchestrator:
         """Handle a file that was deleted from disk."""
         fp = self.manifest.get_fingerprint(file_path)
         if fp:
-            self._remove_file_data(fp.file_id)
+            for owner in self._owner_shards(file_path, fp):
+                self._remove_file_data(fp.file_id, owner)
             self.manifest.remove_fingerprint(file_path)
+            self.manifest.bump_generation()
+    
+    def _owner_shards(self, file_path: str, fp: FileFingerprint) -> List[IndexShard]:
+        """
+        Get the shard holding a file's data.
+        
+        Fingerprints written before ownership was recorded have no shard
+        ID; their data may be in any shard whose root contains the file.
+        """
+        if fp.shard_id is not None:
+            shard = self.shard_manager.get_shard_by_id(fp.shard_id)
+            return [shard] if shard is not None else []
+        return [shard for shard in self.shard_manager.shards if shard.contains(file_path)]
     
-    def _remove_file_data(self, file_id: str) -> None:
+    def _remove_file_data(self, file_id: str, shard: IndexShard) -> None:
         """Remove all stored data for a file."""
         # Remove from vector store
         if LANCEDB_AVAILABLE:
             try:
-                self.vector_store.delete_by_file(file_id)
+                shard.vector_store.delete_by_file(file_id)
             except Exception:
                 pass
         
         # Remove from BM25
-        self.bm25_store.remove_by_file(file_id)
+        shard.bm25_store.remove_by_file(file_id)
+        
+        # Remove file metadata
+        self.file_store.remove(file_id, shard)
+        
+        self._remove_rescore_vectors([file_id])
+    
+    def _remove_rescore_vectors(self, file_ids: List[str]) -> None:
+        """Remove cached two-tier rescoring vectors of files."""
+        store = get_rescore_store()
+        if file_ids and store.db_path.exists():
+            store.delete_by_files(file_ids)
+    
+    def remove_root(self, root: str) -> bool:
+        """
+        Remove an indexed root folder and all of its data.
+        
+        The root's shard is dropped as a whole directory; only the
+        manifest entries need to be removed one by one.
+        
+        Returns:
+            True if the root was indexed.
+        """
+        shard = self.shard_manager.get_shard(root)
+        if shard is None:
+            return False
+        
+        # Resolve ownership before dropping so nested roots keep their files
+        owned = []
+        paths = list(self.manifest.iter_paths(prefix=shard.root))
+        for path, fp in self.manifest.iter_fingerprints(paths):
+            if fp is None or not shard.contains(path):
+                continue
+            if fp.shard_id is None:
+                owns = self.shard_manager.shard_for_path(path) is shard
+            else:
+                owns = fp.shard_id == shard.shard_id
+            if owns:
+                owned.append((path, fp))
+        
+        self.shard_manager.drop_shard(root)
+        self.file_store.forget_shard(shard.shard_id)
+        self._remove_rescore_vectors([fp.file_id for _, fp in owned])
+        for path, _ in owned:
+            self.manifest.remove_fingerprint(path)
+        self.manifest.bump_generation()
+        self.manifest.save()
+        return True
     
     def clear_all(self) -> None:
         """Clear all indexed data."""
         self.manifest.clear()
-        if LANCEDB_AVAILABLE:
-            try:
-                self.vector_store.clear()
-            except Exception:
-                pass
-        self.bm25_store.clear()
+        self.shard_manager.clear()
+        self.file_store.clear()
+        if get_rescore_store().db_path.exists():
+            get_rescore_store().clear()
+        self.manifest.bump_generation()
+        self.manifest.save()
 
 
 def get_indexing_orchestrator() -> IndexingOrchestrator:
@@ -0,0 +1,196 @@
+"""
+Local Finder X v2.0 - Model Warm-up
+
+Loads the embedding model in the background at application start.
+
+Without it the first query pays for loading BGE-M3 and for the first
+(slow) forward pass. The warm-up thread loads the model, runs a dummy
+batch to warm the kernels and then reports readiness to SearchEngine,
+which serves lexical-only results until then.
+
+While the application is in the foreground the embedding workers are
+kept loaded. If a worker exited idle in the background, the model is
+warmed up again when the application returns to the foreground.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from src.config.settings import get_settings
+from src.core.embedding_service import EmbeddingService, get_embedder, get_rescore_embedder
+from src.core.reranker import get_reranker
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Warm-up states
+WARMUP_IDLE = "idle"
+WARMUP_LOADING = "loading"
+WARMUP_READY = "ready"
+WARMUP_FAILED = "failed"
+
+# Attempts before giving up (the model may still be downloading or the
+# worker may have crashed), with a growing delay between them
+WARMUP_ATTEMPTS = 3
+WARMUP_RETRY_DELAY = 10.0
+
+# Dummy batch: a short query and a chunk-sized passage (Korean + English)
+WARMUP_TEXTS = [
+    "예산 계획",
+    "Local Finder X 검색 엔진 준비 중입니다. " * 16,
+    "quarterly report",
+]
+
+
+# =============================================================================
+# Model Warm-up
+# =============================================================================
+
+class ModelWarmup:
+    """
+    Background embedding model loader.
+    
+    While loading, the search engine is marked dense-not-ready; it is
+    marked ready once the dummy batch has been encoded. A failed
+    warm-up is retried; if every attempt fails, dense retrieval stays
+    off (searches report the dense stage as skipped) and the failure is
+    kept in state and error.
+    """
+    
+    def __init__(self, embedder_factory: Callable = get_embedder):
+        """
+        Initialize the warm-up job.
+        
+        Args:
+            embedder_factory: Callable returning the embedder to warm up.
+        """
+        self._embedder_factory = embedder_factory
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+        self.state = WARMUP_IDLE
+        self.elapsed_s = 0.0
+        self.error: Optional[str] = None
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.state == WARMUP_READY
+    
+    def start(self, on_done: Optional[Callable[[bool], None]] = None) -> None:
+        """
+        Start loading in a daemon thread (no-op if already started).
+        
+        Args:
+            on_done: Called from the warm-up thread with True on success
+                (False once all attempts failed).
+        """
+        if self._thread is not None:
+            return
+        
+        from src.core.search_engine import get_search_engine
+        engine = get_search_engine()
+        engine.set_dense_ready(False)
+        
+        def run():
+            for attempt in range(WARMUP_ATTEMPTS):
+                if attempt > 0:
+                    time.sleep(WARMUP_RETRY_DELAY * attempt)
+                    self.state = WARMUP_LOADING
+                ok = self._warm_up()
+                if ok:
+                    engine.set_dense_ready(True)
+                    break
+            else:
+                print(f"Warning: Dense search disabled, model warm-up failed: {self.error}")
+            self._done.set()
+            if on_done is not None:
+                on_done(ok)
+        
+        self.state = WARMUP_LOADING
+        self._thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+        self._thread.start()
+    
+    def set_foreground(self, active: bool) -> None:
+        """
+        Report whether the application is in the foreground.
+        
+        Embedding workers do not exit idle while it is. Coming back to
+        the foreground after a worker exited, the warm-up runs again
+        (dense retrieval is off meanwhile, as at start), so the next
+        query does not pay the cold start.
+        """
+        services = [
+            embedder
+            for embedder in (self._embedder_factory(), get_rescore_embedder())
+            if isinstance(embedder, EmbeddingService)
+        ]
+        for service in services:
+            service.set_keep_alive(active)
+        
+        if active and self._done.is_set() and any(not s.is_running for s in services):
+            self._thread = None
+            self._done.clear()
+            self.start()
+    
+    def _warm_up(self) -> bool:
+        """Load the model and encode the dummy batch."""
+        start = time.time()
+        try:
+            embedder = self._embedder_factory()
+            if not embedder.is_available():
+                raise RuntimeError("embedding model not available")
+            if embedder.encode_batched(WARMUP_TEXTS) is None:
+                raise RuntimeError("warm-up batch failed")
+            
+            # Two-tier search: warm the rescoring model as well
+            rescorer = get_rescore_embedder()
+            if rescorer is not None and rescorer.is_available():
+                rescorer.encode_batched(WARMUP_TEXTS)
+            
+            if get_settings().search.rerank:
+                get_reranker().load(background=False)
+            self.state = WARMUP_READY
+            return True
+        except Exception as e:
+            print(f"Warning: Model warm-up failed: {e}")
+            self.error = str(e)
+            self.state = WARMUP_FAILED
+            return False
+        finally:
+            self.elapsed_s = time.time() - start
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the warm-up to finish. Returns True if it finished."""
+        return self._done.wait(timeout)
+
+
+# Singleton instance
+_model_warmup: Optional[ModelWarmup] = None
+
+
+def get_model_warmup() -> ModelWarmup:
+    """Get the singleton model warm-up job."""
+    global _model_warmup
+    if _model_warmup is None:
+        _model_warmup = ModelWarmup()
+    return _model_warmup
+
+
+def start_model_warmup(on_done: Optional[Callable[[bool], None]] = None) -> ModelWarmup:
+    """Start the background model warm-up."""
+    warmup = get_model_warmup()
+    warmup.start(on_done)
+    return warmup
+
+
+__all__ = [
+    "ModelWarmup",
+    "get_model_warmup",
+    "start_model_warmup",
+    "WARMUP_IDLE",
+    "WARMUP_LOADING",
+    "WARMUP_READY",
+    "WARMUP_FAILED",
+]
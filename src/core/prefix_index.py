@@ -0,0 +1,188 @@
+"""
+Local Finder X v2.0 - Prefix Index
+
+Term-prefix lookup for search-as-you-type.
+
+Keeps the BM25 vocabulary (with document frequencies) and the words of
+all filenames in sorted arrays. The keys starting with a prefix form a
+contiguous range found by binary search, so completing the word being
+typed costs O(log V) plus the size of the range, independent of the
+number of indexed chunks.
+"""
+
+import re
+from bisect import bisect_left
+from typing import List, Dict, Optional, Iterable, Set
+
+import numpy as np
+
+from src.core.schemas import FileRecord
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Completions of the last query word added to the BM25 query
+MAX_TERM_COMPLETIONS = 8
+
+# Postings budget of the completions (bounds the scoring cost of short,
+# very common prefixes on large indexes)
+MAX_COMPLETION_POSTINGS = 250_000
+
+# Files matched by a filename prefix
+MAX_FILE_COMPLETIONS = 50
+
+# Upper bound of all keys starting with a prefix
+_PREFIX_END = "\U0010ffff"
+
+FILENAME_WORD_PATTERN = re.compile(r"\w+")
+
+
+# =============================================================================
+# Prefix Index
+# =============================================================================
+
+class PrefixIndex:
+    """
+    Immutable sorted-array prefix index over terms and filenames.
+    
+    Built for one index generation; SearchEngine rebuilds it when the
+    manifest generation changes.
+    """
+    
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        files: Iterable[FileRecord] = (),
+        generation: int = 0,
+    ):
+        """
+        Build the index.
+        
+        Args:
+            vocabulary: BM25 terms with their document frequencies.
+            files: File records whose filenames are indexed.
+            generation: Manifest generation the index was built from.
+        """
+        self.generation = generation
+        self._terms = sorted(vocabulary)
+        self._doc_freqs = np.array([vocabulary[t] for t in self._terms], dtype=np.int64)
+        
+        # Each filename word and the full filename, lowercased
+        keys = []
+        for record in files:
+            name = record.filename.lower()
+            words = set(FILENAME_WORD_PATTERN.findall(name))
+            words.add(name)
+            keys.extend((word, record.file_id) for word in words)
+        keys.sort()
+        self._file_keys = [key for key, _ in keys]
+        self._file_ids = [file_id for _, file_id in keys]
+    
+    @property
+    def term_count(self) -> int:
+        return len(self._terms)
+    
+    @property
+    def file_key_count(self) -> int:
+        return len(self._file_keys)
+    
+    @staticmethod
+    def _prefix_range(keys: List[str], prefix: str) -> tuple:
+        """Range [lo, hi) of the sorted keys starting with prefix."""
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + _PREFIX_END)
+    
+    def complete_terms(
+        self,
+        prefix: str,
+        limit: int = MAX_TERM_COMPLETIONS,
+        max_postings: int = MAX_COMPLETION_POSTINGS,
+    ) -> List[str]:
+        """
+        Get indexed terms starting with prefix.
+        
+        The prefix itself comes first if it is a term; the other
+        completions follow by document frequency, until limit terms or
+        max_postings documents (summed over the terms) are reached.
+        At least one completion is returned if any term matches.
+        """
+        prefix = prefix.lower()
+        if not prefix or limit <= 0:
+            return []
+        
+        lo, hi = self._prefix_range(self._terms, prefix)
+        completions = []
+        postings = 0
+        if lo < hi and self._terms[lo] == prefix:
+            completions.append(prefix)
+            postings += int(self._doc_freqs[lo])
+            lo += 1
+        
+        count = min(limit - len(completions), hi - lo)
+        if count > 0:
+            doc_freqs = self._doc_freqs[lo:hi]
+            if hi - lo > count:
+                best = np.argpartition(-doc_freqs, count - 1)[:count]
+            else:
+                best = np.arange(hi - lo)
+            best = best[np.argsort(-doc_freqs[best], kind="stable")]
+            for i in best.tolist():
+                postings += int(doc_freqs[i])
+                if completions and postings > max_postings:
+                    break
+                completions.append(self._terms[lo + i])
+        return completions
+    
+    def complete_files(
+        self,
+        prefix: str,
+        limit: int = MAX_FILE_COMPLETIONS,
+        file_ids: Optional[Set[str]] = None,
+    ) -> List[str]:
+        """
+        Get IDs of files with a filename word starting with prefix.
+        
+        Args:
+            prefix: Prefix of a filename word (or of the whole filename).
+            limit: Maximum files to return.
+            file_ids: Optional set of file IDs to restrict results to.
+        """
+        prefix = prefix.lower()
+        if not prefix or limit <= 0:
+            return []
+        
+        lo, hi = self._prefix_range(self._file_keys, prefix)
+        matches: List[str] = []
+        seen: Set[str] = set()
+        for file_id in self._file_ids[lo:hi]:
+            if file_id in seen or (file_ids is not None and file_id not in file_ids):
+                continue
+            seen.add(file_id)
+            matches.append(file_id)
+            if len(matches) >= limit:
+                break
+        return matches
+
+
+def split_typed_query(query: str) -> tuple:
+    """
+    Split a query being typed into (complete part, last word prefix).
+    
+    The prefix is empty when the query ends with whitespace.
+    """
+    if not query or query[-1].isspace():
+        return query, ""
+    words = query.rsplit(None, 1)
+    if len(words) == 1:
+        return "", words[0]
+    return words[0], words[1]
+
+
+__all__ = [
+    "PrefixIndex",
+    "split_typed_query",
+    "MAX_TERM_COMPLETIONS",
+    "MAX_COMPLETION_POSTINGS",
+    "MAX_FILE_COMPLETIONS",
+]
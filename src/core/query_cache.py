@@ -0,0 +1,279 @@
+"""
+Local Finder X v2.0 - Query Embedding Cache
+
+Bounded LRU cache of query vectors keyed by (model, normalized query).
+
+Users re-run the same queries, and search-as-you-type hits the same
+prefixes, so repeat queries should not pay for model inference. Entries
+can optionally be persisted to SQLite so the cache survives restarts;
+new entries are written in batches off the query path.
+"""
+
+import atexit
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, List, Dict, Tuple
+
+import numpy as np
+
+from src.config.paths import get_query_cache_path
+from src.config.settings import get_settings
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+DEFAULT_MAX_ENTRIES = 1024
+
+# Seconds new entries wait before being written to SQLite in one batch
+PERSIST_DELAY = 5.0
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+_CREATE_STATEMENT = """
+    CREATE TABLE IF NOT EXISTS query_vectors (
+        model TEXT NOT NULL,
+        query TEXT NOT NULL,
+        vector BLOB NOT NULL,
+        used_at REAL NOT NULL,
+        PRIMARY KEY (model, query)
+    )
+"""
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for use as a cache key.
+    
+    NFKC (full-width forms, compatibility jamo), lowercase and collapsed
+    whitespace: variants that embed to practically the same vector. The
+    query itself is embedded as typed.
+    """
+    query = unicodedata.normalize("NFKC", query)
+    return _WHITESPACE_PATTERN.sub(" ", query).strip().lower()
+
+
+# =============================================================================
+# Query Embedding Cache
+# =============================================================================
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query embeddings with hit-rate counters.
+    
+    Misses are encoded with the given embedder. When persistence is
+    enabled, new entries are written to SQLite in one transaction
+    PERSIST_DELAY seconds later (and at exit); the most recently used
+    entries are loaded back on start.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        db_path: Optional[Path] = None,
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached vectors.
+            db_path: SQLite file for persistence. None keeps the cache in memory.
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._unsaved: Dict[Tuple[str, str], Tuple[bytes, float]] = {}
+        self._persist_timer: Optional[threading.Timer] = None
+        self.hits = 0
+        self.misses = 0
+        
+        if db_path is not None:
+            self._open(db_path)
+    
+    def _open(self, db_path: Path) -> None:
+        """Open the persistence database and load the newest entries."""
+        try:
+            self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_CREATE_STATEMENT)
+            rows = self._conn.execute(
+                "SELECT model, query, vector FROM query_vectors ORDER BY used_at DESC LIMIT ?",
+                (self.max_entries,),
+            ).fetchall()
+            for model, query, blob in reversed(rows):
+                self._entries[(model, query)] = np.frombuffer(blob, dtype=np.float32)
+            self._conn.execute(
+                "DELETE FROM query_vectors WHERE rowid NOT IN ("
+                "SELECT rowid FROM query_vectors ORDER BY used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not open query cache: {e}")
+            self._conn = None
+    
+    def get(self, model: str, query: str) -> Optional[np.ndarray]:
+        """Get a cached vector (counts a hit or a miss)."""
+        key = (model, normalize_query(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+    
+    def put(self, model: str, query: str, vector) -> None:
+        """Cache a query vector, evicting the least recently used entry."""
+        self.put_many(model, [(query, vector)])
+    
+    def put_many(self, model: str, items: List[Tuple[str, Any]]) -> None:
+        """Cache (query, vector) pairs; persisted later in one transaction."""
+        now = time.time()
+        with self._lock:
+            for query, vector in items:
+                key = (model, normalize_query(query))
+                vector = np.asarray(vector, dtype=np.float32)
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+                if self._conn is not None:
+                    self._unsaved[key] = (vector.tobytes(), now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            
+            if self._unsaved and self._persist_timer is None:
+                self._persist_timer = threading.Timer(PERSIST_DELAY, self.flush)
+                self._persist_timer.daemon = True
+                self._persist_timer.start()
+    
+    def flush(self) -> None:
+        """Write new entries to SQLite in one transaction."""
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, {}
+            self._persist_timer = None
+        if not unsaved or self._conn is None:
+            return
+        
+        with self._db_lock:
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO query_vectors (model, query, vector, used_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(model, query, blob, used_at) for (model, query), (blob, used_at) in unsaved.items()],
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Warning: Could not persist query vectors: {e}")
+    
+    def encode(self, query: str, embedder) -> Optional[List[float]]:
+        """
+        Get the query vector from the cache or encode it with the embedder.
+        
+        Args:
+            query: Search query.
+            embedder: EmbeddingModel or EmbeddingService.
+        
+        Returns:
+            List of floats, or None if encoding failed.
+        """
+        model = embedder.model_name
+        vector = self.get(model, query)
+        if vector is not None:
+            return vector.tolist()
+        
+        encoded = embedder.encode_query(query)
+        if encoded is not None:
+            self.put(model, query, encoded)
+        return encoded
+    
+    def encode_many(self, queries: List[str], embedder) -> List[Optional[np.ndarray]]:
+        """
+        Get the vectors of many queries, encoding all misses in one batch.
+        
+        Args:
+            queries: Search queries.
+            embedder: EmbeddingModel or EmbeddingService.
+        
+        Returns:
+            One float32 vector per query (None where encoding failed).
+        """
+        model = embedder.model_name
+        vectors: List[Optional[np.ndarray]] = [self.get(model, q) for q in queries]
+        
+        # Distinct normalized misses, encoded once each (as first typed)
+        missing: Dict[str, List[int]] = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(normalize_query(queries[i]), []).append(i)
+        if not missing:
+            return vectors
+        
+        texts = [queries[indices[0]] for indices in missing.values()]
+        # The embedding service serves queries ahead of indexing batches
+        encode = getattr(embedder, "encode_queries", embedder.encode_batched)
+        encoded = encode(texts)
+        if encoded is None:
+            return vectors
+        
+        encoded = np.asarray(encoded, dtype=np.float32)
+        self.put_many(model, list(zip(texts, encoded)))
+        for indices, vector in zip(missing.values(), encoded):
+            for i in indices:
+                vectors[i] = vector
+        return vectors
+    
+    def stats(self) -> Dict[str, float]:
+        """Get hit/miss counters and the hit rate."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+    
+    def clear(self) -> None:
+        """Drop all cached vectors (memory and disk) and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._unsaved.clear()
+            self.hits = 0
+            self.misses = 0
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.execute("DELETE FROM query_vectors")
+                self._conn.commit()
+
+
+# Singleton instance
+_query_cache: Optional[QueryEmbeddingCache] = None
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Get the singleton query embedding cache."""
+    global _query_cache
+    if _query_cache is None:
+        settings = get_settings().search
+        _query_cache = QueryEmbeddingCache(
+            max_entries=settings.query_cache_size,
+            db_path=get_query_cache_path() if settings.persist_query_cache else None,
+        )
+        atexit.register(_query_cache.flush)
+    return _query_cache
+
+
+__all__ = [
+    "QueryEmbeddingCache",
+    "get_query_cache",
+    "normalize_query",
+]
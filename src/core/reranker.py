@@ -0,0 +1,290 @@
+"""
+Local Finder X v2.0 - Cross-Encoder Reranker
+
+Optional rerank stage after RRF fusion.
+
+The best chunk candidates of the top fused files are scored with a
+local cross-encoder under a strict latency budget. Scores are cached
+per (model, query, chunk_id). If the model is not loaded yet or the
+budget runs out, the stage is skipped and the plain RRF order is kept.
+"""
+
+import importlib.util
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.config.settings import get_settings
+from src.core.query_cache import normalize_query
+
+
+CROSS_ENCODER_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+DEFAULT_RERANK_MODEL = "BAAI/bge-reranker-v2-m3"
+DEFAULT_RERANK_TOP_N = 20
+DEFAULT_RERANK_BUDGET_MS = 300
+
+# Chunk candidates taken per file
+RERANK_CHUNKS_PER_FILE = 2
+
+# Maximum pairs scored per forward pass. The budget is checked before
+# every pass and the pass is shrunk to the pairs expected to fit, from
+# the measured per-pair latency (one pair until it has been measured).
+RERANK_BATCH_SIZE = 8
+
+# Weight of the latest pass in the per-pair latency estimate
+PAIR_LATENCY_SMOOTHING = 0.3
+
+MAX_SEQ_LENGTH = 512
+
+# Cached (model, query, chunk_id) scores
+SCORE_CACHE_SIZE = 8192
+
+
+# =============================================================================
+# Cross-Encoder Reranker
+# =============================================================================
+
+class CrossEncoderReranker:
+    """
+    Lazily loaded cross-encoder with a score cache.
+    
+    The model is loaded in a background thread on first use; queries
+    arriving before it is ready are not reranked.
+    """
+    
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, cache_size: int = SCORE_CACHE_SIZE):
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self._model = None
+        self._load_thread: Optional[threading.Thread] = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._pair_seconds: Optional[float] = None
+    
+    @property
+    def is_ready(self) -> bool:
+        return self._model is not None
+    
+    def load(self, background: bool = True) -> bool:
+        """
+        Load the cross-encoder (once).
+        
+        Args:
+            background: Load in a daemon thread and return immediately.
+        
+        Returns:
+            True if the model is ready.
+        """
+        if self._model is not None or self._load_failed or not CROSS_ENCODER_AVAILABLE:
+            return self._model is not None
+        
+        with self._lock:
+            if self._load_thread is None:
+                self._load_thread = threading.Thread(
+                    target=self._load_model, name="reranker-load", daemon=True
+                )
+                self._load_thread.start()
+        if not background:
+            self._load_thread.join()
+        return self._model is not None
+    
+    def _load_model(self) -> None:
+        try:
+            from sentence_transformers import CrossEncoder
+            from src.core.embedding import get_best_device
+            
+            print(f"Loading reranker: {self.model_name}")
+            self._model = CrossEncoder(
+                self.model_name, max_length=MAX_SEQ_LENGTH, device=get_best_device()
+            )
+        except Exception as e:
+            print(f"Warning: Could not load reranker {self.model_name}: {e}")
+            self._load_failed = True
+    
+    def score(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        budget_ms: int = DEFAULT_RERANK_BUDGET_MS,
+    ) -> Optional[Dict[str, float]]:
+        """
+        Score chunk candidates against the query.
+        
+        Cached scores are reused; the rest are scored in small batches
+        while the budget allows. Since predict() cannot be interrupted,
+        each batch is sized from the measured per-pair latency to fit in
+        the remaining budget, and no batch starts once it cannot.
+        
+        Args:
+            query: Search query.
+            candidates: Chunk results with chunk_id and text.
+            budget_ms: Latency budget for the whole stage.
+        
+        Returns:
+            Dict of chunk_id -> score, or None if the model is not ready
+            or the budget was exceeded.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        if not self.load():
+            return None
+        
+        normalized = normalize_query(query)
+        scores: Dict[str, float] = {}
+        pending = []
+        with self._lock:
+            for candidate in candidates:
+                key = (normalized, candidate["chunk_id"])
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[candidate["chunk_id"]] = self._scores[key]
+                else:
+                    pending.append(candidate)
+        
+        start = 0
+        while start < len(pending):
+            batch_start = time.perf_counter()
+            remaining = deadline - batch_start
+            if remaining <= 0:
+                return None
+            if self._pair_seconds is None:
+                size = 1
+            else:
+                size = min(RERANK_BATCH_SIZE, int(remaining / self._pair_seconds))
+                if size == 0:
+                    return None
+            batch = pending[start:start + size]
+            start += len(batch)
+            batch_scores = self._model.predict(
+                [(query, c.get("text", "")) for c in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+            )
+            pair_seconds = (time.perf_counter() - batch_start) / len(batch)
+            if self._pair_seconds is None:
+                self._pair_seconds = pair_seconds
+            else:
+                self._pair_seconds += PAIR_LATENCY_SMOOTHING * (pair_seconds - self._pair_seconds)
+            
+            with self._lock:
+                for candidate, value in zip(batch, batch_scores):
+                    scores[candidate["chunk_id"]] = float(value)
+                    self._scores[(normalized, candidate["chunk_id"])] = float(value)
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+        
+        if time.perf_counter() > deadline:
+            return None  # scored batches stay cached for the next query
+        return scores
+
+
+# Singleton instance
+_reranker: Optional[CrossEncoderReranker] = None
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """Get the singleton reranker for the configured model."""
+    global _reranker
+    model_name = get_settings().search.rerank_model
+    if _reranker is None or _reranker.model_name != model_name:
+        _reranker = CrossEncoderReranker(model_name)
+    return _reranker
+
+
+# =============================================================================
+# Rerank Stage
+# =============================================================================
+
+def select_candidates(
+    top_files: List[Tuple[str, float]],
+    dense_results: List[Dict[str, Any]],
+    top_n: int = DEFAULT_RERANK_TOP_N,
+) -> List[Dict[str, Any]]:
+    """
+    Pick the best chunks of the top fused files, in fused order.
+    
+    Up to RERANK_CHUNKS_PER_FILE chunks per file (best dense score
+    first) and top_n chunks in total.
+    """
+    chunks_by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for result in dense_results:
+        if result.get("chunk_id") and result.get("text"):
+            chunks_by_file.setdefault(result.get("file_id", ""), []).append(result)
+    
+    candidates = []
+    for file_id, _ in top_files:
+        chunks = chunks_by_file.get(file_id, [])
+        chunks.sort(key=lambda r: r.get("dense_score", 0.0), reverse=True)
+        candidates.extend(chunks[:RERANK_CHUNKS_PER_FILE])
+        if len(candidates) >= top_n:
+            break
+    return candidates[:top_n]
+
+
+def rerank_files(
+    query: str,
+    top_files: List[Tuple[str, float]],
+    dense_results: List[Dict[str, Any]],
+    top_n: Optional[int] = None,
+    budget_ms: Optional[int] = None,
+    reranker: Optional[CrossEncoderReranker] = None,
+) -> Tuple[List[Tuple[str, float]], Dict[str, float]]:
+    """
+    Rerank the top fused files by their best cross-encoder chunk score.
+    
+    Reranked files are re-ordered among the positions they held in the
+    fused list and take the RRF score of their new position, so scores
+    stay on one scale and descending; files without candidates keep
+    their position and RRF score.
+    
+    Returns:
+        (files, cross-encoder score by reranked file ID). The input
+        order is returned with an empty dict when reranking is skipped.
+    """
+    settings = get_settings().search
+    top_n = top_n or settings.rerank_top_n
+    budget_ms = budget_ms or settings.rerank_budget_ms
+    reranker = reranker or get_reranker()
+    
+    candidates = select_candidates(top_files, dense_results, top_n)
+    if not candidates:
+        return top_files, {}
+    
+    try:
+        scores = reranker.score(query, candidates, budget_ms)
+    except Exception as e:
+        print(f"Rerank error: {e}")
+        scores = None
+    if not scores:
+        return top_files, {}
+    
+    file_scores: Dict[str, float] = {}
+    for candidate in candidates:
+        file_id = candidate.get("file_id", "")
+        score = scores.get(candidate["chunk_id"])
+        if score is not None and score > file_scores.get(file_id, float("-inf")):
+            file_scores[file_id] = score
+    
+    slots = [i for i, (file_id, _) in enumerate(top_files) if file_id in file_scores]
+    ranked = sorted(file_scores, key=file_scores.get, reverse=True)
+    files = list(top_files)
+    for slot, file_id in zip(slots, ranked):
+        files[slot] = (file_id, top_files[slot][1])
+    return files, file_scores
+
+
+__all__ = [
+    "CrossEncoderReranker",
+    "get_reranker",
+    "select_candidates",
+    "rerank_files",
+    "CROSS_ENCODER_AVAILABLE",
+    "DEFAULT_RERANK_MODEL",
+]
@@ -0,0 +1,185 @@
+"""
+Local Finder X v2.0 - Two-Tier Dense Rescoring
+
+Optional dual-model dense search: every chunk is embedded with the
+small, fast indexing model, which drives ANN recall; the top candidates
+are then rescored with a large model. Large-model chunk vectors are
+computed on first use and cached (RescoreVectorStore), so indexing cost
+stays that of the small model.
+"""
+
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from src.config.settings import get_settings
+from src.core.embedding_service import get_rescore_embedder
+from src.core.query_cache import get_query_cache
+from src.storage.rescore_store import RescoreVectorStore, get_rescore_store
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+DEFAULT_RESCORE_TOP_N = 30
+
+
+# =============================================================================
+# Rescorer
+# =============================================================================
+
+class DenseRescorer:
+    """Rescores dense candidates with the large model of two-tier search."""
+    
+    def __init__(
+        self,
+        embedder=None,
+        store: Optional[RescoreVectorStore] = None,
+    ):
+        """
+        Initialize the rescorer.
+        
+        Args:
+            embedder: Large-model embedder. Uses get_rescore_embedder() if None.
+            store: Chunk vector cache. Uses get_rescore_store() if None.
+        """
+        self._embedder = embedder
+        self._store = store
+    
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = get_rescore_embedder()
+        return self._embedder
+    
+    @property
+    def store(self) -> RescoreVectorStore:
+        if self._store is None:
+            self._store = get_rescore_store()
+        return self._store
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether a rescoring model is configured."""
+        return self.embedder is not None
+    
+    def chunk_vectors(self, candidates: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Get large-model vectors of candidate chunks.
+        
+        Cached vectors are read from the store; the rest are encoded in
+        one batch and stored.
+        """
+        model = self.embedder.model_name
+        chunk_ids = [c["chunk_id"] for c in candidates]
+        vectors = self.store.get_many(model, chunk_ids)
+        
+        missing = [c for c in candidates if c["chunk_id"] not in vectors]
+        if missing:
+            embeddings = self.embedder.encode_batched([c.get("text", "") for c in missing])
+            if embeddings is not None:
+                items = [
+                    (c["chunk_id"], c.get("file_id", ""), np.array(embedding, dtype=np.float32))
+                    for c, embedding in zip(missing, embeddings)
+                ]
+                self.store.put_many(model, items)
+                vectors.update((chunk_id, vector) for chunk_id, _, vector in items)
+        return vectors
+    
+    def rescore(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        top_n: int = DEFAULT_RESCORE_TOP_N,
+        deadline=None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rescore the top dense results with the large model.
+        
+        The top_n results are re-ordered by large-model similarity and
+        their dense_score replaced (same 1 - L2 distance scale as the
+        recall model); the remaining results keep their order below them.
+        Rescored results are copies, so the input list stays valid.
+        
+        Args:
+            query: Search query.
+            results: Dense results, best first.
+            top_n: Number of candidates to rescore.
+            deadline: Optional SearchDeadline, checked after the query
+                embedding; past it the results are returned unchanged.
+        
+        Returns:
+            Re-ordered results (the input list itself if rescoring is
+            unavailable or past the deadline).
+        """
+        if not results or not self.enabled or not self.embedder.is_available():
+            return results
+        
+        candidates = [r for r in results[:top_n] if r.get("chunk_id")]
+        if not candidates:
+            return results
+        
+        try:
+            query_vector = get_query_cache().encode(query, self.embedder)
+            if query_vector is None or (deadline is not None and deadline.expired):
+                return results
+            vectors = self.chunk_vectors(candidates)
+        except Exception as e:
+            print(f"Rescoring error: {e}")
+            return results
+        
+        if deadline is not None and deadline.expired:
+            return results
+        
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        rescored = []
+        rescored_ids = set()
+        for result in candidates:
+            vector = vectors.get(result["chunk_id"])
+            if vector is None:
+                continue
+            similarity = float(np.dot(query_vector, vector))
+            rescored_ids.add(id(result))
+            rescored.append({
+                **result,
+                "recall_score": result.get("dense_score", 0.0),
+                # Normalized vectors: L2 distance^2 = 2 - 2 * cosine
+                "dense_score": max(0.0, 2 * similarity - 1),
+            })
+        
+        rescored.sort(key=lambda r: r["dense_score"], reverse=True)
+        return rescored + [r for r in results if id(r) not in rescored_ids]
+
+
+# Singleton instance
+_dense_rescorer: Optional[DenseRescorer] = None
+
+
+def get_dense_rescorer() -> DenseRescorer:
+    """Get the singleton dense rescorer."""
+    global _dense_rescorer
+    if _dense_rescorer is None:
+        _dense_rescorer = DenseRescorer()
+    return _dense_rescorer
+
+
+def rescore_dense_results(
+    query: str,
+    results: List[Dict[str, Any]],
+    top_n: Optional[int] = None,
+    deadline=None,
+) -> List[Dict[str, Any]]:
+    """Rescore dense results with the large model if two-tier search is on."""
+    rescorer = get_dense_rescorer()
+    if not rescorer.enabled:
+        return results
+    return rescorer.rescore(query, results, top_n or get_settings().search.rescore_top_n, deadline)
+
+
+__all__ = [
+    "DenseRescorer",
+    "get_dense_rescorer",
+    "rescore_dense_results",
+    "DEFAULT_RESCORE_TOP_N",
+]
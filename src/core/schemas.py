@@ -6,7 +6,7 @@ Based on Master Plan Phase 2 specifications.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from enum import Enum
 import uuid
 import time
@@ -176,6 +176,7 @@ class ChunkRecord:
     # These are populated during indexing
     embedding: Optional[List[float]] = None
     tokens: Optional[List[str]] = None
+    token_offsets: Optional[List[Tuple[str, int, int]]] = None  # (token, start, end) by start
     
     metadata: ChunkMetadata = field(default_factory=ChunkMetadata)
     
@@ -189,6 +190,7 @@ class ChunkRecord:
             "text": self.text,
             "embedding": self.embedding,
             "tokens": self.tokens,
+            "token_offsets": self.token_offsets,
             "metadata": {
                 "page": self.metadata.page,
                 "slide": self.metadata.slide,
@@ -235,11 +237,41 @@ class Evidence:
     
     summary: str = ""  # e.g., "이 부분이 'Q4 예산'과 유사합니다."
     snippet: str = ""  # 200-500 chars, with highlights
+    highlights: List[Tuple[int, int]] = field(default_factory=list)  # (start, end) in snippet
     
     scores: EvidenceScores = field(default_factory=EvidenceScores)
     location: EvidenceLocation = field(default_factory=EvidenceLocation)
 
 
+# =============================================================================
+# SearchFilters - File metadata constraints for a search
+# =============================================================================
+
+@dataclass
+class SearchFilters:
+    """
+    Metadata filters applied to search results.
+    All set fields must match (AND).
+    """
+    extensions: Optional[List[str]] = None  # e.g. [".docx", ".pdf"]
+    modified_after: Optional[float] = None  # Unix timestamp, inclusive
+    modified_before: Optional[float] = None  # Unix timestamp, exclusive
+    min_size_bytes: Optional[int] = None
+    max_size_bytes: Optional[int] = None
+    folder: Optional[str] = None  # Only files below this folder
+    
+    @property
+    def is_empty(self) -> bool:
+        return (
+            not self.extensions
+            and self.modified_after is None
+            and self.modified_before is None
+            and self.min_size_bytes is None
+            and self.max_size_bytes is None
+            and not self.folder
+        )
+
+
 # =============================================================================
 # SearchResponse - Complete search result for UI binding
 # =============================================================================
@@ -252,6 +284,8 @@ class FileHit:
     match_type: MatchType = MatchType.HYBRID
     content_available: bool = True
     evidences: List[Evidence] = field(default_factory=list)
+    # Cross-encoder score of reranked hits (score stays on the RRF scale)
+    rerank_score: Optional[float] = None
 
 
 @dataclass
@@ -264,11 +298,19 @@ class SearchResponse:
     elapsed_ms: int = 0
     results: List[FileHit] = field(default_factory=list)
     error: Optional[str] = None
+    # Stages skipped (deadline, model warming up); results are partial
+    skipped_stages: List[str] = field(default_factory=list)
+    # False for preliminary responses (search_stream, search_as_you_type)
+    is_final: bool = True
     
     @property
     def total_results(self) -> int:
         return len(self.results)
     
+    @property
+    def is_partial(self) -> bool:
+        return len(self.skipped_stages) > 0
+    
     @property
     def has_results(self) -> bool:
         return len(self.results) > 0
@@ -294,6 +336,7 @@ __all__ = [
     "EvidenceLocation",
     "Evidence",
     # Search Response
+    "SearchFilters",
     "FileHit",
     "SearchResponse",
 ]
@@ -3,21 +3,40 @@ Local Finder X v2.0 - Search Engine
 
 Hybrid search with Dense + BM25 + RRF Fusion.
 Based on Master Plan Phase 4 specifications.
+
+Retrieval fans out over all per-root index shards in parallel; the
+dense and lexical paths themselves run concurrently.
 """
 
+import asyncio
+import dataclasses
+import functools
+import threading
 import time
-from typing import List, Optional, Dict, Any, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Set
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from src.core.schemas import (
     SearchResponse, FileHit, FileRecord, Evidence,
-    EvidenceScores, EvidenceLocation, MatchType, SourceType
+    EvidenceScores, EvidenceLocation, MatchType, SourceType, SearchFilters
 )
 from src.core.tokenizer import tokenize_query
-from src.core.embedding import get_embedding_model
-from src.storage.vector_store import VectorStore, get_vector_store
-from src.storage.bm25_store import BM25Store, get_bm25_store
+from src.core.embedding_service import get_embedder
+from src.core.query_cache import get_query_cache, normalize_query
+from src.core.rescorer import rescore_dense_results, get_dense_rescorer
+from src.core.reranker import rerank_files
+from src.core.prefix_index import PrefixIndex, split_typed_query
+from src.core.snippets import select_snippet
+from src.config.settings import get_settings
+from src.storage.vector_store import VectorStore
+from src.storage.bm25_store import BM25Store
 from src.storage.manifest import ManifestStore
+from src.storage.shards import ShardManager, get_shard_manager
+from src.storage.file_store import FileStore, get_file_store
 from src.storage.lancedb_store import LANCEDB_AVAILABLE
 
 
@@ -35,6 +54,124 @@ DEFAULT_MAX_EVIDENCES = 5
 # Metadata-only score decay
 METADATA_ONLY_DECAY = 0.4
 
+# Filtered dense search: push file IDs into the vector query up to this
+# many, otherwise over-fetch and filter the results
+MAX_FILTER_PUSHDOWN_IDS = 1000
+FILTER_OVERFETCH = 4
+
+# Threads running the dense path next to lexical retrieval
+# (separate from the shard pool, which the retrievers themselves use)
+MAX_RETRIEVAL_WORKERS = 4
+
+# Search modes (SearchSettings.mode, mode selector of the search page)
+MODE_FAST = "FAST"
+MODE_SMART = "SMART"
+MODE_ASSIST = "ASSIST"
+SEARCH_MODES = [MODE_FAST, MODE_SMART, MODE_ASSIST]
+
+# Stage names reported in SearchResponse.skipped_stages
+STAGE_EMBEDDING = "embedding"
+STAGE_DENSE = "dense"
+STAGE_RESCORE = "rescore"
+STAGE_BM25 = "bm25"
+STAGE_RERANK = "rerank"
+STAGE_EVIDENCES = "evidences"
+
+
+@dataclass(frozen=True)
+class SearchPlan:
+    """Execution plan of a search mode."""
+    mode: str
+    top_k_dense: int
+    top_k_bm25: int
+    dense_cached_only: bool = False  # dense only if the query vector is cached
+    rescore_top_n: int = 0  # two-tier rescoring candidates, 0 = off
+    rerank: bool = False
+    rerank_top_n: int = 0
+    rerank_budget_ms: int = 0
+
+
+def get_search_plan(mode: Optional[str] = None) -> SearchPlan:
+    """
+    Get the execution plan of a search mode.
+    
+    - FAST: lexical, plus dense only when the query embedding is cached
+      (no model inference), small candidate pools, no rescoring
+    - SMART: hybrid dense + BM25 with the configured rescoring/reranking
+    - ASSIST: hybrid with wider candidate pools, rescoring and reranking
+    
+    Args:
+        mode: FAST, SMART or ASSIST. Uses SearchSettings.mode if None.
+    """
+    settings = get_settings().search
+    mode = (mode or settings.mode).upper()
+    
+    if mode == MODE_FAST:
+        return SearchPlan(
+            mode=MODE_FAST,
+            top_k_dense=min(settings.top_n_dense, 10),
+            top_k_bm25=min(settings.top_n_bm25, 30),
+            dense_cached_only=True,
+        )
+    if mode == MODE_ASSIST:
+        return SearchPlan(
+            mode=MODE_ASSIST,
+            top_k_dense=settings.top_n_dense * 3,
+            top_k_bm25=settings.top_n_bm25 * 3,
+            rescore_top_n=settings.rescore_top_n * 2,
+            rerank=True,
+            rerank_top_n=settings.rerank_top_n * 2,
+            rerank_budget_ms=settings.rerank_budget_ms * 4,
+        )
+    return SearchPlan(
+        mode=MODE_SMART,
+        top_k_dense=settings.top_n_dense,
+        top_k_bm25=settings.top_n_bm25,
+        rescore_top_n=settings.rescore_top_n,
+        rerank=settings.rerank,
+        rerank_top_n=settings.rerank_top_n,
+        rerank_budget_ms=settings.rerank_budget_ms,
+    )
+
+
+class SearchDeadline:
+    """Per-query latency budget checked between search stages."""
+    
+    def __init__(
+        self,
+        budget_ms: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        """
+        Args:
+            budget_ms: Budget in milliseconds. None or 0 means no deadline.
+            cancel_event: Set to cancel the search (expires the deadline).
+        """
+        self.expires_at = time.monotonic() + budget_ms / 1000.0 if budget_ms else None
+        self.cancel_event = cancel_event
+    
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds left (None without a deadline)."""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def remaining_ms(self) -> Optional[int]:
+        remaining = self.remaining()
+        return None if remaining is None else int(remaining * 1000)
+    
+    @property
+    def expired(self) -> bool:
+        if self.cancelled:
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
 
 # =============================================================================
 # Retrievers
@@ -44,46 +181,71 @@ def dense_retrieve(
     query: str,
     vector_store: VectorStore,
     top_k: int = DEFAULT_TOP_K_DENSE,
+    file_ids: Optional[Set[str]] = None,
+    query_vector: Optional[List[float]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Dense retrieval using vector similarity.
     
+    The full query embedding is passed down; the shards apply the
+    projection (PCA / truncation) shared by the whole index before
+    searching.
+    
     Args:
         query: Search query.
         vector_store: Vector store instance.
         top_k: Number of results.
+        file_ids: Optional set of file IDs to restrict results to.
+        query_vector: Precomputed query embedding (encoded if None).
     
     Returns:
         List of chunk results with scores.
     """
-    embedding_model = get_embedding_model()
-    
-    if not embedding_model.is_available():
+    if file_ids is not None and not file_ids:
         return []
     
-    query_vector = embedding_model.encode_query(query)
     if query_vector is None:
-        return []
+        embedding_model = get_embedder()
+        
+        if not embedding_model.is_available():
+            return []
+        
+        query_vector = get_query_cache().encode(query, embedding_model)
+        if query_vector is None:
+            return []
     
     try:
-        results = vector_store.search(query_vector, top_k=top_k)
-        
-        # Normalize scores (LanceDB returns distance, lower is better)
-        for result in results:
-            distance = result.get("score", 0.0)
-            # Convert distance to similarity score (0-1)
-            result["dense_score"] = max(0, 1 - distance)
+        if file_ids is None:
+            results = vector_store.search(query_vector, top_k=top_k)
+        elif len(file_ids) <= MAX_FILTER_PUSHDOWN_IDS:
+            results = vector_store.search(query_vector, top_k=top_k, file_ids=list(file_ids))
+        else:
+            results = vector_store.search(query_vector, top_k=top_k * FILTER_OVERFETCH)
+            results = [r for r in results if r.get("file_id") in file_ids][:top_k]
         
-        return results
+        return set_dense_scores(results)
     except Exception as e:
         print(f"Dense retrieval error: {e}")
         return []
 
 
+def set_dense_scores(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Add dense_score to vector search results."""
+    # Normalize scores (LanceDB returns distance, lower is better)
+    for result in results:
+        distance = result.get("score", 0.0)
+        # Convert distance to similarity score (0-1)
+        result["dense_score"] = max(0, 1 - distance)
+    
+    return results
+
+
 def lexical_retrieve(
     query: str,
     bm25_store: BM25Store,
     top_k: int = DEFAULT_TOP_K_BM25,
+    file_ids: Optional[Set[str]] = None,
+    query_tokens: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Lexical retrieval using BM25.
@@ -92,17 +254,27 @@ def lexical_retrieve(
         query: Search query.
         bm25_store: BM25 store instance.
         top_k: Number of results.
+        file_ids: Optional set of file IDs to restrict results to.
+        query_tokens: Precomputed query tokens (tokenized if None).
     
     Returns:
         List of document results with scores.
     """
-    tokens = tokenize_query(query)
+    tokens = query_tokens if query_tokens is not None else tokenize_query(query)
     
     if not tokens:
         return []
     
-    results = bm25_store.search(tokens, top_k=top_k)
+    if file_ids is not None:
+        results = bm25_store.search(tokens, top_k=top_k, file_ids=file_ids)
+    else:
+        results = bm25_store.search(tokens, top_k=top_k)
     
+    return set_lexical_scores(results)
+
+
+def set_lexical_scores(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Add lexical_score (BM25 score relative to the best result)."""
     # Normalize BM25 scores
     if results:
         max_score = max(r["score"] for r in results)
@@ -161,45 +333,125 @@ def rrf_fusion(
 # Evidence Builder
 # =============================================================================
 
+@dataclass
+class FileChunkHits:
+    """Chunk hits of one file, dense and lexical merged per chunk."""
+    chunks: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    has_dense: bool = False
+    has_lexical: bool = False
+
+
+def combined_chunk_score(chunk: Dict[str, Any]) -> float:
+    """Evidence score of a chunk: dense and lexical scores OR-ed (1 - (1-d)(1-l))."""
+    dense = chunk.get("dense_score", 0.0)
+    lexical = chunk.get("lexical_score", 0.0)
+    return 1.0 - (1.0 - dense) * (1.0 - lexical)
+
+
+def group_hits_by_file(
+    dense_results: List[Dict[str, Any]],
+    lexical_results: List[Dict[str, Any]],
+) -> Dict[str, FileChunkHits]:
+    """
+    Bucket dense and lexical hits by file_id in one pass over each list.
+    
+    A chunk found by both retrievers becomes one entry with its
+    dense_score and lexical_score. Lexical-only chunks have no text yet
+    (BM25 stores tokens only). File-level (metadata) matches only mark
+    the file as lexical.
+    
+    Returns:
+        Dictionary mapping file_id to its FileChunkHits.
+    """
+    groups: Dict[str, FileChunkHits] = {}
+    
+    for result in dense_results:
+        file_id = result.get("file_id", "")
+        if not file_id:
+            continue
+        group = groups.get(file_id)
+        if group is None:
+            group = groups[file_id] = FileChunkHits()
+        group.has_dense = True
+        chunk = dict(result)
+        chunk.setdefault("lexical_score", 0.0)
+        group.chunks[result.get("chunk_id", "")] = chunk
+    
+    for result in lexical_results:
+        file_id = result.get("file_id", "")
+        if not file_id:
+            continue
+        group = groups.get(file_id)
+        if group is None:
+            group = groups[file_id] = FileChunkHits()
+        group.has_lexical = True
+        if result.get("is_file_level"):
+            continue
+        
+        chunk_id = result.get("doc_id", "")
+        chunk = group.chunks.get(chunk_id)
+        if chunk is None:
+            group.chunks[chunk_id] = {
+                "chunk_id": chunk_id,
+                "file_id": file_id,
+                "dense_score": 0.0,
+                "lexical_score": result.get("lexical_score", 0.0),
+            }
+        else:
+            chunk["lexical_score"] = result.get("lexical_score", 0.0)
+    
+    return groups
+
+
+def top_chunks(group: FileChunkHits, max_evidences: int = DEFAULT_MAX_EVIDENCES) -> List[Dict[str, Any]]:
+    """Best chunks of a file by combined score."""
+    chunks = sorted(group.chunks.values(), key=combined_chunk_score, reverse=True)
+    return chunks[:max_evidences]
+
+
 def build_evidences(
     file_id: str,
-    dense_results: List[Dict[str, Any]],
+    chunks: List[Dict[str, Any]],
     max_evidences: int = DEFAULT_MAX_EVIDENCES,
+    query_tokens: Optional[List[str]] = None,
 ) -> List[Evidence]:
     """
-    Build evidence list for a file from dense results.
+    Build the evidence list of a file from its merged chunk hits.
+    
+    Snippets are the window of each chunk with the densest query-term
+    matches, located with the token offsets stored at index time.
     
     Args:
         file_id: Target file ID.
-        dense_results: Dense retrieval results.
+        chunks: Chunk hits of this file (see group_hits_by_file), with
+            text. Chunks without text are skipped.
         max_evidences: Maximum evidences to return.
+        query_tokens: Query tokens to highlight (leading snippets if None).
     
     Returns:
-        List of Evidence objects.
+        List of Evidence objects, best first.
     """
     evidences = []
     
-    # Filter results for this file
-    file_chunks = [r for r in dense_results if r.get("file_id") == file_id]
-    
-    # Sort by score
-    file_chunks.sort(key=lambda x: x.get("dense_score", 0), reverse=True)
-    
-    for chunk in file_chunks[:max_evidences]:
-        text = chunk.get("text", "")
-        metadata = chunk.get("metadata", {})
+    for chunk in sorted(chunks, key=combined_chunk_score, reverse=True):
+        text = chunk.get("text")
+        if text is None:
+            continue
+        metadata = chunk.get("metadata") or {}
         
-        # Create snippet (first 300 chars)
-        snippet = text[:300] + "..." if len(text) > 300 else text
+        snippet, highlights = select_snippet(
+            text, chunk.get("token_offsets"), query_tokens or []
+        )
         
         evidence = Evidence(
             file_id=file_id,
             summary="",  # TODO: Generate summary
             snippet=snippet,
+            highlights=highlights,
             scores=EvidenceScores(
-                final=chunk.get("dense_score", 0.0),
+                final=combined_chunk_score(chunk),
                 dense=chunk.get("dense_score", 0.0),
-                lexical=0.0,
+                lexical=chunk.get("lexical_score", 0.0),
             ),
             location=EvidenceLocation(
                 page=metadata.get("page"),
@@ -209,6 +461,8 @@ def build_evidences(
             ),
         )
         evidences.append(evidence)
+        if len(evidences) >= max_evidences:
+            break
     
     return evidences
 
@@ -227,21 +481,70 @@ class SearchEngine:
         vector_store: Optional[VectorStore] = None,
         bm25_store: Optional[BM25Store] = None,
         manifest_store: Optional[ManifestStore] = None,
+        shard_manager: Optional[ShardManager] = None,
+        file_store: Optional[FileStore] = None,
     ):
+        """
+        Initialize the search engine.
+        
+        Args:
+            vector_store: Optional single vector store (bypasses shards).
+            bm25_store: Optional single BM25 store (bypasses shards).
+            manifest_store: Optional manifest store instance.
+            shard_manager: Optional shard manager instance.
+            file_store: Optional file record store instance.
+        """
         self._vector_store = vector_store
         self._bm25_store = bm25_store
         self._manifest_store = manifest_store
+        self._shard_manager = shard_manager
+        self._file_store = file_store
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # Complete responses keyed by (query, parameters, index generation)
+        self._result_cache: "OrderedDict[tuple, SearchResponse]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+        
+        # Cleared while the embedding model warms up in the background;
+        # searches are lexical-only until it is set again
+        self._dense_ready = threading.Event()
+        self._dense_ready.set()
+        
+        # Search-as-you-type; rebuilt in the background on index changes
+        self._prefix_index: Optional[PrefixIndex] = None
+        self._prefix_lock = threading.Lock()
+        self._prefix_thread: Optional[threading.Thread] = None
+    
+    @property
+    def dense_ready(self) -> bool:
+        """Whether dense retrieval is used (False while the model warms up)."""
+        return self._dense_ready.is_set()
+    
+    def set_dense_ready(self, ready: bool) -> None:
+        """Report embedding model readiness (see model_warmup)."""
+        if ready:
+            self._dense_ready.set()
+        else:
+            self._dense_ready.clear()
+    
+    @property
+    def shard_manager(self) -> ShardManager:
+        if self._shard_manager is None:
+            self._shard_manager = get_shard_manager()
+        return self._shard_manager
     
     @property
     def vector_store(self) -> VectorStore:
+        """Vector store view; searches all shards in parallel by default."""
         if self._vector_store is None:
-            self._vector_store = get_vector_store()
+            self._vector_store = self.shard_manager.vector_store
         return self._vector_store
     
     @property
     def bm25_store(self) -> BM25Store:
+        """BM25 view; searches all shard segments in parallel by default."""
         if self._bm25_store is None:
-            self._bm25_store = get_bm25_store()
+            self._bm25_store = self.shard_manager.bm25_store
         return self._bm25_store
     
     @property
@@ -250,119 +553,739 @@ class SearchEngine:
             self._manifest_store = ManifestStore()
         return self._manifest_store
     
+    @property
+    def file_store(self) -> FileStore:
+        if self._file_store is None:
+            self._file_store = get_file_store()
+        return self._file_store
+    
     def search(
         self,
         query: str,
         max_results: int = DEFAULT_MAX_RESULTS,
-        top_k_dense: int = DEFAULT_TOP_K_DENSE,
-        top_k_bm25: int = DEFAULT_TOP_K_BM25,
+        top_k_dense: Optional[int] = None,
+        top_k_bm25: Optional[int] = None,
         rrf_k: int = DEFAULT_RRF_K,
         max_evidences: int = DEFAULT_MAX_EVIDENCES,
+        filters: Optional[SearchFilters] = None,
+        deadline_ms: Optional[int] = None,
+        mode: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None,
     ) -> SearchResponse:
         """
         Perform hybrid search.
         
+        With an empty query and non-empty filters, lists the matching
+        files (newest first) without touching the content indexes.
+        
+        Each stage checks the latency budget; stages that miss the
+        deadline are skipped, the best results so far are returned and
+        the skipped stages are listed in SearchResponse.skipped_stages.
+        
         Args:
             query: Search query.
             max_results: Maximum files to return.
-            top_k_dense: Dense retrieval count.
-            top_k_bm25: BM25 retrieval count.
+            top_k_dense: Dense retrieval count. Uses the mode's plan if None.
+            top_k_bm25: BM25 retrieval count. Uses the mode's plan if None.
             rrf_k: RRF constant.
             max_evidences: Max evidences per file.
+            filters: Optional file metadata filters.
+            deadline_ms: Latency budget. Uses SearchSettings.deadline_ms
+                if None; 0 disables the deadline.
+            mode: FAST, SMART or ASSIST (see get_search_plan). Uses
+                SearchSettings.mode if None.
+            cancel_event: Optional event; once set, the search stops at
+                the next stage and returns what it has.
         
         Returns:
             SearchResponse with results.
         """
+        response = SearchResponse(query=query)
+        for response in self.search_stream(
+            query, max_results, top_k_dense, top_k_bm25, rrf_k,
+            max_evidences, filters, deadline_ms, mode, cancel_event,
+        ):
+            pass
+        return response
+    
+    def search_stream(
+        self,
+        query: str,
+        max_results: int = DEFAULT_MAX_RESULTS,
+        top_k_dense: Optional[int] = None,
+        top_k_bm25: Optional[int] = None,
+        rrf_k: int = DEFAULT_RRF_K,
+        max_evidences: int = DEFAULT_MAX_EVIDENCES,
+        filters: Optional[SearchFilters] = None,
+        deadline_ms: Optional[int] = None,
+        mode: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[SearchResponse]:
+        """
+        Incremental hybrid search; same arguments as search().
+        
+        Yields successively better responses of the same query:
+        1. Lexical ranking with file records, no evidences, as soon as
+           BM25 returns (the dense path keeps running meanwhile)
+        2. Fused ranking before the cross-encoder rerank (only when the
+           plan reranks)
+        3. The final response (is_final=True), as returned by search()
+        
+        Cached responses, filter-only listings and errors are yielded
+        once, as final responses. Closing the generator early abandons
+        the remaining stages; setting cancel_event also stops the dense
+        path, and nothing more is yielded.
+        """
         start_time = time.time()
+        plan = get_search_plan(mode)
+        top_k_dense = top_k_dense or plan.top_k_dense
+        top_k_bm25 = top_k_bm25 or plan.top_k_bm25
+        if deadline_ms is None:
+            deadline_ms = get_settings().search.deadline_ms
+        deadline = SearchDeadline(deadline_ms, cancel_event)
+        skipped: List[str] = []
         
-        if not query.strip():
-            return SearchResponse(query=query, elapsed_ms=0)
+        def elapsed_ms() -> int:
+            return int((time.time() - start_time) * 1000)
+        
+        has_filters = filters is not None and not filters.is_empty
+        if not query.strip() and not has_filters:
+            yield SearchResponse(query=query, elapsed_ms=0)
+            return
+        
+        cache_key = self._result_cache_key(
+            query, plan, max_results, top_k_dense, top_k_bm25, rrf_k, max_evidences, filters
+        )
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            yield dataclasses.replace(cached, query=query, elapsed_ms=elapsed_ms())
+            return
         
         try:
-            # Step 1: Dense retrieval
+            # Step 0: Evaluate metadata filters on the files tables
+            allowed_ids: Optional[Set[str]] = None
+            if has_filters:
+                allowed_ids = self.file_store.filter_file_ids(filters)  # type: ignore
+                if not query.strip():
+                    yield SearchResponse(
+                        query=query,
+                        elapsed_ms=elapsed_ms(),
+                        results=self._metadata_hits(allowed_ids, max_results),
+                    )
+                    return
+            
+            # Step 1: Dense retrieval on the pool (skipped until the model is warm)
+            dense_future = None
+            embedded = threading.Event()
+            ann_results: List[Dict[str, Any]] = []
+            if LANCEDB_AVAILABLE and self.dense_ready:
+                dense_future = self._get_executor().submit(
+                    self._dense_path, query, top_k_dense, allowed_ids, deadline, embedded, plan,
+                    ann_results,
+                )
+            elif LANCEDB_AVAILABLE:
+                skipped.append(STAGE_DENSE)
+            
+            # Step 2: Lexical retrieval, concurrently on this thread
+            query_tokens = tokenize_query(query)
+            lexical_results = []
+            if deadline.expired:
+                skipped.append(STAGE_BM25)
+            else:
+                lexical_results = lexical_retrieve(
+                    query, self.bm25_store, top_k_bm25, allowed_ids, query_tokens=query_tokens
+                )
+            if deadline.cancelled:
+                return
+            
+            # Preliminary lexical ranking while the dense path runs
+            if dense_future is not None and lexical_results:
+                top_files = self._rank_files({}, lexical_results, rrf_k, max_results)
+                yield SearchResponse(
+                    query=query,
+                    elapsed_ms=elapsed_ms(),
+                    results=self._build_hits(top_files, [], lexical_results),
+                    is_final=False,
+                )
+            
             dense_results = []
-            if LANCEDB_AVAILABLE:
+            if dense_future is not None:
                 try:
-                    dense_results = dense_retrieve(query, self.vector_store, top_k_dense)
-                except Exception:
-                    pass
+                    dense_results, dense_skipped = dense_future.result(timeout=deadline.remaining())
+                    skipped.extend(dense_skipped)
+                except FutureTimeoutError:
+                    # Left running in the background; its result is dropped,
+                    # but finished ANN results are used without the rescore
+                    dense_results = list(ann_results)
+                    if not embedded.is_set():
+                        skipped.append(STAGE_EMBEDDING)
+                    skipped.append(STAGE_RESCORE if dense_results else STAGE_DENSE)
+            if deadline.cancelled:
+                return
             
-            # Step 2: Lexical retrieval
-            lexical_results = lexical_retrieve(query, self.bm25_store, top_k_bm25)
+            # Steps 3-5: RRF Fusion (cheap, so dense results in hand are fused
+            # even past the deadline), metadata-only decay, sort and limit
+            top_files = self._rank_files(dense_results, lexical_results, rrf_k, max_results)
             
-            # Step 3: RRF Fusion
-            file_scores = rrf_fusion(dense_results, lexical_results, rrf_k)
+            # Step 5b: Optional cross-encoder rerank (RRF order if skipped)
+            rerank_scores: Dict[str, float] = {}
+            if plan.rerank and dense_results:
+                remaining_ms = deadline.remaining_ms()
+                if remaining_ms == 0:
+                    skipped.append(STAGE_RERANK)
+                else:
+                    yield SearchResponse(
+                        query=query,
+                        elapsed_ms=elapsed_ms(),
+                        results=self._build_hits(top_files, dense_results, lexical_results),
+                        skipped_stages=list(skipped),
+                        is_final=False,
+                    )
+                    budget_ms = plan.rerank_budget_ms
+                    if remaining_ms is not None:
+                        budget_ms = min(budget_ms, remaining_ms)
+                    top_files, rerank_scores = rerank_files(
+                        query, top_files, dense_results,
+                        top_n=plan.rerank_top_n, budget_ms=budget_ms,
+                    )
             
-            # Step 4: Apply metadata-only decay
-            for result in lexical_results:
-                if result.get("is_file_level"):
-                    file_id = result.get("file_id", "")
-                    if file_id in file_scores:
-                        file_scores[file_id] *= METADATA_ONLY_DECAY
+            # Step 6: Build FileHits with Evidences (none past the deadline)
+            if deadline.expired and (dense_results or lexical_results):
+                skipped.append(STAGE_EVIDENCES)
+                max_evidences = 0
+            results = self._build_hits(
+                top_files, dense_results, lexical_results, rerank_scores, max_evidences, query_tokens
+            )
             
-            # Step 5: Sort and limit
-            sorted_files = sorted(file_scores.items(), key=lambda x: x[1], reverse=True)
-            top_files = sorted_files[:max_results]
+            response = SearchResponse(
+                query=query,
+                elapsed_ms=elapsed_ms(),
+                results=results,
+                skipped_stages=skipped,
+            )
+            if not response.is_partial:
+                self._put_cached_response(cache_key, response)
+            yield response
+        
+        except Exception as e:
+            yield SearchResponse(
+                query=query,
+                elapsed_ms=elapsed_ms(),
+                error=str(e),
+            )
+    
+    def search_many(
+        self,
+        queries: List[str],
+        max_results: int = DEFAULT_MAX_RESULTS,
+        top_k_dense: Optional[int] = None,
+        top_k_bm25: Optional[int] = None,
+        rrf_k: int = DEFAULT_RRF_K,
+        max_evidences: int = DEFAULT_MAX_EVIDENCES,
+        filters: Optional[SearchFilters] = None,
+        mode: Optional[str] = None,
+    ) -> List[SearchResponse]:
+        """
+        Search a batch of queries (bulk lookups, evaluation runs).
+        
+        Ranks every query like search(), but each stage runs once for
+        the whole batch: uncached query embeddings are encoded in one
+        batched call, dense retrieval is one multi-vector query per shard
+        and BM25 is scored term-at-a-time across the queries. There is
+        no deadline; cached responses are reused and new ones cached.
+        
+        Args:
+            queries: Search queries.
+            Others: Same as search().
+        
+        Returns:
+            One SearchResponse per query, in input order. elapsed_ms is
+            the time of the whole batch.
+        """
+        start_time = time.time()
+        plan = get_search_plan(mode)
+        top_k_dense = top_k_dense or plan.top_k_dense
+        top_k_bm25 = top_k_bm25 or plan.top_k_bm25
+        has_filters = filters is not None and not filters.is_empty
+        
+        responses: Dict[int, SearchResponse] = {}
+        cache_keys: Dict[int, tuple] = {}
+        for i, query in enumerate(queries):
+            if not query.strip() and not has_filters:
+                responses[i] = SearchResponse(query=query)
+                continue
+            key = self._result_cache_key(
+                query, plan, max_results, top_k_dense, top_k_bm25, rrf_k, max_evidences, filters
+            )
+            cached = self._get_cached_response(key)
+            if cached is not None:
+                responses[i] = dataclasses.replace(cached, query=query)
+            else:
+                cache_keys[i] = key
+        
+        try:
+            allowed_ids: Optional[Set[str]] = None
+            if has_filters and cache_keys:
+                allowed_ids = self.file_store.filter_file_ids(filters)  # type: ignore
             
-            # Step 6: Build FileHits with Evidences
-            results = []
-            for file_id, score in top_files:
-                # Get file info from manifest
-                file_record = self._get_file_record(file_id)
-                if file_record is None:
-                    continue
-                
-                # Determine match type
-                has_dense = any(r.get("file_id") == file_id for r in dense_results)
-                has_lexical = any(r.get("file_id") == file_id for r in lexical_results)
-                
-                if has_dense and has_lexical:
-                    match_type = MatchType.HYBRID
-                elif has_dense:
-                    match_type = MatchType.SEMANTIC
+            pending = []
+            for i in cache_keys:
+                if queries[i].strip():
+                    pending.append(i)
                 else:
-                    match_type = MatchType.LEXICAL
-                
-                # Build evidences
-                evidences = build_evidences(file_id, dense_results, max_evidences)
-                
-                file_hit = FileHit(
-                    file=file_record,
-                    score=score,
-                    match_type=match_type,
-                    content_available=file_record.content_indexed,
-                    evidences=evidences,
+                    hits = self._metadata_hits(allowed_ids or set(), max_results)
+                    responses[i] = SearchResponse(query=queries[i], results=hits)
+            
+            batch = [queries[i] for i in pending]
+            batch_tokens = [tokenize_query(query) for query in batch]
+            lexical_many = self._lexical_many(batch_tokens, top_k_bm25, allowed_ids)
+            dense_many = self._dense_many(batch, top_k_dense, allowed_ids, plan)
+            
+            for i, query, query_tokens, dense_results, lexical_results in zip(
+                pending, batch, batch_tokens, dense_many, lexical_many
+            ):
+                top_files = self._rank_files(dense_results, lexical_results, rrf_k, max_results)
+                rerank_scores: Dict[str, float] = {}
+                if plan.rerank and dense_results:
+                    top_files, rerank_scores = rerank_files(
+                        query, top_files, dense_results,
+                        top_n=plan.rerank_top_n, budget_ms=plan.rerank_budget_ms,
+                    )
+                responses[i] = SearchResponse(
+                    query=query,
+                    results=self._build_hits(
+                        top_files, dense_results, lexical_results,
+                        rerank_scores, max_evidences, query_tokens,
+                    ),
                 )
-                results.append(file_hit)
+        except Exception as e:
+            for i in cache_keys:
+                responses.setdefault(i, SearchResponse(query=queries[i], error=str(e)))
+        
+        elapsed_ms = int((time.time() - start_time) * 1000)
+        for i, response in responses.items():
+            response.elapsed_ms = elapsed_ms
+            if i in cache_keys and not response.error:
+                self._put_cached_response(cache_keys[i], response)
+        return [responses[i] for i in range(len(queries))]
+    
+    def _lexical_many(
+        self,
+        query_tokens: List[List[str]],
+        top_k: int,
+        allowed_ids: Optional[Set[str]],
+    ) -> List[List[Dict[str, Any]]]:
+        """BM25 results of a batch of tokenized queries."""
+        if not query_tokens:
+            return []
+        per_query = self.bm25_store.search_many(query_tokens, top_k=top_k, file_ids=allowed_ids)
+        return [set_lexical_scores(results) for results in per_query]
+    
+    def _dense_many(
+        self,
+        queries: List[str],
+        top_k: int,
+        allowed_ids: Optional[Set[str]],
+        plan: SearchPlan,
+    ) -> List[List[Dict[str, Any]]]:
+        """Dense results (rescored per the plan) of a batch of queries."""
+        per_query: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        if not queries or not LANCEDB_AVAILABLE or not self.dense_ready:
+            return per_query
+        if allowed_ids is not None and not allowed_ids:
+            return per_query
+        
+        try:
+            embedder = get_embedder()
+            if not embedder.is_available():
+                return per_query
             
-            elapsed_ms = int((time.time() - start_time) * 1000)
+            cache = get_query_cache()
+            if plan.dense_cached_only:
+                vectors = [cache.get(embedder.model_name, query) for query in queries]
+            else:
+                vectors = cache.encode_many(queries, embedder)
+            encoded = [i for i, vector in enumerate(vectors) if vector is not None]
+            if not encoded:
+                return per_query
+            query_vectors = np.stack([vectors[i] for i in encoded])
             
-            return SearchResponse(
-                query=query,
-                elapsed_ms=elapsed_ms,
-                results=results,
+            if allowed_ids is None:
+                batch_results = self.vector_store.search_many(query_vectors, top_k=top_k)
+            elif len(allowed_ids) <= MAX_FILTER_PUSHDOWN_IDS:
+                batch_results = self.vector_store.search_many(
+                    query_vectors, top_k=top_k, file_ids=list(allowed_ids)
+                )
+            else:
+                batch_results = [
+                    [r for r in results if r.get("file_id") in allowed_ids][:top_k]
+                    for results in self.vector_store.search_many(
+                        query_vectors, top_k=top_k * FILTER_OVERFETCH
+                    )
+                ]
+            
+            rescore = plan.rescore_top_n and get_dense_rescorer().enabled
+            for i, results in zip(encoded, batch_results):
+                results = set_dense_scores(results)
+                if rescore:
+                    results = rescore_dense_results(queries[i], results, plan.rescore_top_n)
+                per_query[i] = results
+        except Exception as e:
+            print(f"Dense retrieval error: {e}")
+        return per_query
+    
+    def search_as_you_type(
+        self,
+        query: str,
+        max_results: int = DEFAULT_MAX_RESULTS,
+        filters: Optional[SearchFilters] = None,
+    ) -> SearchResponse:
+        """
+        Lexical search of a query that is still being typed.
+        
+        The last word is treated as a prefix: it is expanded to its most
+        frequent completions in the BM25 vocabulary and matched against
+        filename words. No query embedding is computed; the UI runs the
+        full search() once typing pauses. Returns a preliminary response
+        (is_final=False).
+        """
+        start_time = time.time()
+        has_filters = filters is not None and not filters.is_empty
+        if not query.strip():
+            return SearchResponse(query=query, elapsed_ms=0)
+        
+        cache_key = self._result_cache_key(query, "as-you-type", max_results, filters)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            return dataclasses.replace(
+                cached, query=query, elapsed_ms=int((time.time() - start_time) * 1000)
             )
+        
+        try:
+            allowed_ids: Optional[Set[str]] = None
+            if has_filters:
+                allowed_ids = self.file_store.filter_file_ids(filters)  # type: ignore
+            
+            head, prefix = split_typed_query(query)
+            prefix_index = self.prefix_index
+            tokens = tokenize_query(head) if head.strip() else []
+            if prefix:
+                tokens += prefix_index.complete_terms(prefix) or tokenize_query(prefix)
             
+            lexical_results = lexical_retrieve(
+                query, self.bm25_store, get_search_plan(MODE_FAST).top_k_bm25,
+                allowed_ids, query_tokens=tokens,
+            )
+            filename_results = [
+                {"file_id": file_id}
+                for file_id in prefix_index.complete_files(prefix or head.strip(), file_ids=allowed_ids)
+            ]
+            
+            top_files = self._rank_files(filename_results, lexical_results, DEFAULT_RRF_K, max_results)
+            response = SearchResponse(
+                query=query,
+                elapsed_ms=int((time.time() - start_time) * 1000),
+                results=self._build_hits(top_files, [], lexical_results),
+                is_final=False,
+            )
+            self._put_cached_response(cache_key, response)
+            return response
+        
         except Exception as e:
-            elapsed_ms = int((time.time() - start_time) * 1000)
             return SearchResponse(
                 query=query,
-                elapsed_ms=elapsed_ms,
+                elapsed_ms=int((time.time() - start_time) * 1000),
                 error=str(e),
+                is_final=False,
             )
     
-    def _get_file_record(self, file_id: str) -> Optional[FileRecord]:
-        """Get FileRecord from manifest by file_id."""
-        # Search through manifest for matching file_id
-        for path, fp in self.manifest_store.manifest.files.items():
-            if fp.file_id == file_id:
-                return FileRecord(
-                    file_id=file_id,
-                    path=path,
-                    filename=path.split("/")[-1] if "/" in path else path.split("\\")[-1],
-                    content_indexed=fp.content_indexed,
+    @property
+    def prefix_index(self) -> PrefixIndex:
+        """
+        Prefix index of the current index generation.
+        
+        Built synchronously the first time; after index changes the
+        previous index keeps serving while a new one is built in the
+        background.
+        """
+        generation = self.manifest_store.generation
+        if self._prefix_index is None:
+            with self._prefix_lock:
+                if self._prefix_index is None:
+                    self._prefix_index = self._build_prefix_index(generation)
+        elif self._prefix_index.generation != generation:
+            with self._prefix_lock:
+                if self._prefix_thread is None or not self._prefix_thread.is_alive():
+                    self._prefix_thread = threading.Thread(
+                        target=self._refresh_prefix_index,
+                        args=(generation,),
+                        name="prefix-index",
+                        daemon=True,
+                    )
+                    self._prefix_thread.start()
+        return self._prefix_index
+    
+    def _build_prefix_index(self, generation: int) -> PrefixIndex:
+        return PrefixIndex(
+            self.bm25_store.vocabulary(),
+            self.file_store.get_all(),
+            generation=generation,
+        )
+    
+    def _refresh_prefix_index(self, generation: int) -> None:
+        try:
+            self._prefix_index = self._build_prefix_index(generation)
+        except Exception as e:
+            print(f"Warning: Could not rebuild prefix index: {e}")
+    
+    def _rank_files(
+        self,
+        dense_results: List[Dict[str, Any]],
+        lexical_results: List[Dict[str, Any]],
+        rrf_k: int,
+        max_results: int,
+    ) -> List[Tuple[str, float]]:
+        """RRF-fuse, decay metadata-only matches and keep the top files."""
+        file_scores = rrf_fusion(dense_results, lexical_results, rrf_k)
+        
+        for result in lexical_results:
+            if result.get("is_file_level"):
+                file_id = result.get("file_id", "")
+                if file_id in file_scores:
+                    file_scores[file_id] *= METADATA_ONLY_DECAY
+        
+        sorted_files = sorted(file_scores.items(), key=lambda x: x[1], reverse=True)
+        return sorted_files[:max_results]
+    
+    def _build_hits(
+        self,
+        top_files: List[Tuple[str, float]],
+        dense_results: List[Dict[str, Any]],
+        lexical_results: List[Dict[str, Any]],
+        rerank_scores: Optional[Dict[str, float]] = None,
+        max_evidences: int = 0,
+        query_tokens: Optional[List[str]] = None,
+    ) -> List[FileHit]:
+        """
+        Build FileHits (with up to max_evidences evidences) of ranked files.
+        
+        Hits are grouped by file once; the texts of lexical-only evidence
+        chunks are fetched in a single lookup. Evidence snippets highlight
+        query_tokens.
+        """
+        groups = group_hits_by_file(dense_results, lexical_results)
+        
+        evidence_chunks: Dict[str, List[Dict[str, Any]]] = {}
+        if max_evidences > 0:
+            for file_id, _ in top_files:
+                group = groups.get(file_id)
+                if group is not None and group.chunks:
+                    evidence_chunks[file_id] = top_chunks(group, max_evidences)
+            self._load_chunk_texts(evidence_chunks)
+        
+        results = []
+        for file_id, score in top_files:
+            # Get file info from manifest
+            file_record = self._get_file_record(file_id)
+            if file_record is None:
+                continue
+            
+            # Determine match type
+            group = groups.get(file_id) or FileChunkHits()
+            rerank_score = rerank_scores.get(file_id) if rerank_scores else None
+            if rerank_score is not None:
+                match_type = MatchType.RERANKED
+            elif group.has_dense and group.has_lexical:
+                match_type = MatchType.HYBRID
+            elif group.has_dense:
+                match_type = MatchType.SEMANTIC
+            else:
+                match_type = MatchType.LEXICAL
+            
+            evidences = []
+            if file_id in evidence_chunks:
+                evidences = build_evidences(
+                    file_id, evidence_chunks[file_id], max_evidences, query_tokens
                 )
-        return None
+            
+            results.append(FileHit(
+                file=file_record,
+                score=score,
+                match_type=match_type,
+                content_available=file_record.content_indexed,
+                evidences=evidences,
+                rerank_score=rerank_score,
+            ))
+        return results
+    
+    def _load_chunk_texts(self, evidence_chunks: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Fill in text and metadata of chunks found by BM25 only."""
+        missing = {
+            chunk["chunk_id"]: chunk
+            for chunks in evidence_chunks.values()
+            for chunk in chunks
+            if "text" not in chunk
+        }
+        if not missing or not LANCEDB_AVAILABLE:
+            return
+        
+        try:
+            for stored in self.vector_store.get_chunks(list(missing)):
+                chunk = missing.get(stored.get("chunk_id"))
+                if chunk is not None:
+                    chunk["text"] = stored.get("text", "")
+                    chunk["token_offsets"] = stored.get("token_offsets")
+                    chunk["metadata"] = stored.get("metadata") or {}
+        except Exception as e:
+            print(f"Evidence lookup error: {e}")
+    
+    def _result_cache_key(
+        self,
+        query: str,
+        *params: Any,
+    ) -> tuple:
+        """Result cache key: normalized query, parameters and index generation."""
+        return (
+            normalize_query(query),
+            tuple(repr(p) for p in params),
+            self.manifest_store.generation,
+        )
+    
+    def clear_result_cache(self) -> None:
+        """Drop all cached search responses."""
+        with self._result_cache_lock:
+            self._result_cache.clear()
+    
+    def _get_cached_response(self, key: tuple) -> Optional[SearchResponse]:
+        with self._result_cache_lock:
+            response = self._result_cache.get(key)
+            if response is not None:
+                self._result_cache.move_to_end(key)
+            return response
+    
+    def _put_cached_response(self, key: tuple, response: SearchResponse) -> None:
+        """Cache a complete response (entries of older generations age out)."""
+        max_entries = get_settings().search.result_cache_size
+        if max_entries <= 0:
+            return
+        with self._result_cache_lock:
+            self._result_cache[key] = response
+            while len(self._result_cache) > max_entries:
+                self._result_cache.popitem(last=False)
+    
+    async def search_async(self, query: str, **kwargs) -> SearchResponse:
+        """
+        Asyncio entry point for search().
+        
+        Runs the search in the loop's default executor so the event
+        loop is never blocked; accepts the same arguments as search().
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search, query, **kwargs))
+    
+    def _dense_path(
+        self,
+        query: str,
+        top_k: int,
+        allowed_ids: Optional[Set[str]],
+        deadline: SearchDeadline,
+        embedded: threading.Event,
+        plan: SearchPlan,
+        ann_results: Optional[List[Dict[str, Any]]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Query embedding, dense retrieval and two-tier rescoring.
+        
+        Sets embedded once the query vector is available, and fills
+        ann_results once dense retrieval is done, so a caller that stops
+        waiting at the deadline can still use them without the rescore.
+        The deadline is checked between stages. With a cached-only plan
+        (FAST) the model is never run: an uncached query gets no dense
+        results and the dense stage is reported as skipped.
+        
+        Returns:
+            (results, skipped stages); ([], [STAGE_DENSE]) on failure, so
+            the response is partial and not cached.
+        """
+        if allowed_ids is not None and not allowed_ids:
+            return [], []
+        
+        try:
+            embedder = get_embedder()
+            if not embedder.is_available():
+                return [], []
+            if plan.dense_cached_only:
+                cached = get_query_cache().get(embedder.model_name, query)
+                if cached is None:
+                    # Partial, so the lexical-only response is not cached
+                    return [], [STAGE_DENSE]
+                query_vector = cached.tolist()
+            else:
+                query_vector = get_query_cache().encode(query, embedder)
+            embedded.set()
+            if query_vector is None:
+                return [], []
+            if deadline.expired:
+                return [], [STAGE_DENSE]
+            
+            results = dense_retrieve(
+                query, self.vector_store, top_k, allowed_ids, query_vector=query_vector
+            )
+            if ann_results is not None:
+                ann_results.extend(results)
+            if not plan.rescore_top_n or not get_dense_rescorer().enabled:
+                return results, []
+            if deadline.expired:
+                return results, [STAGE_RESCORE]
+            rescored = rescore_dense_results(query, results, plan.rescore_top_n, deadline)
+            if rescored is results:
+                return results, [STAGE_RESCORE] if deadline.expired else []
+            return rescored, []
+        except Exception as e:
+            print(f"Dense retrieval error: {e}")
+            return [], [STAGE_DENSE]
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazy-create the retrieval thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=MAX_RETRIEVAL_WORKERS,
+                thread_name_prefix="search-retrieval",
+            )
+        return self._executor
+    
+    def _metadata_hits(self, file_ids: Set[str], max_results: int) -> List[FileHit]:
+        """Build metadata-only hits for filter-only searches, newest first."""
+        records = [r for r in (self.file_store.get(fid) for fid in file_ids) if r is not None]
+        records.sort(key=lambda r: r.modified_at, reverse=True)
+        return [
+            FileHit(
+                file=record,
+                score=0.0,
+                match_type=MatchType.LEXICAL,
+                content_available=record.content_indexed,
+            )
+            for record in records[:max_results]
+        ]
+    
+    def _get_file_record(self, file_id: str) -> Optional[FileRecord]:
+        """Get the full FileRecord by file_id (O(1) hash lookup)."""
+        file_record = self.file_store.get(file_id)
+        if file_record is not None:
+            return file_record
+        
+        # Files indexed before the file store existed only have a fingerprint
+        entry = self.manifest_store.get_by_file_id(file_id)
+        if entry is None:
+            return None
+        
+        path, fp = entry
+        return FileRecord(
+            file_id=file_id,
+            path=path,
+            filename=path.split("/")[-1] if "/" in path else path.split("\\")[-1],
+            content_indexed=fp.content_indexed,
+        )
 
 
 # Singleton
@@ -382,14 +1305,47 @@ def search(query: str, **kwargs) -> SearchResponse:
     return get_search_engine().search(query, **kwargs)
 
 
+def search_stream(query: str, **kwargs) -> Iterator[SearchResponse]:
+    """Convenience function for incremental searching."""
+    return get_search_engine().search_stream(query, **kwargs)
+
+
+def search_many(queries: List[str], **kwargs) -> List[SearchResponse]:
+    """Convenience function for batch searching."""
+    return get_search_engine().search_many(queries, **kwargs)
+
+
+def search_as_you_type(query: str, **kwargs) -> SearchResponse:
+    """Convenience function for searching a query being typed."""
+    return get_search_engine().search_as_you_type(query, **kwargs)
+
+
+async def search_async(query: str, **kwargs) -> SearchResponse:
+    """Convenience function for searching from asyncio code."""
+    return await get_search_engine().search_async(query, **kwargs)
+
+
 __all__ = [
     "SearchEngine",
+    "SearchDeadline",
+    "SearchPlan",
+    "get_search_plan",
+    "SEARCH_MODES",
+    "MODE_FAST",
+    "MODE_SMART",
+    "MODE_ASSIST",
     "get_search_engine",
     "search",
+    "search_async",
+    "search_stream",
+    "search_as_you_type",
+    "search_many",
     "dense_retrieve",
     "lexical_retrieve",
     "rrf_fusion",
     "build_evidences",
+    "group_hits_by_file",
+    "FileChunkHits",
     "DEFAULT_TOP_K_DENSE",
     "DEFAULT_TOP_K_BM25",
     "DEFAULT_RRF_K",
@@ -0,0 +1,209 @@
+"""
+Local Finder X v2.0 - Evidence Snippets
+
+Query-focused snippet selection with highlight offsets.
+
+The character offsets of every token are computed at index time (see
+tokenize_with_offsets) and stored with the chunk as an Arrow list of
+structs, so choosing the snippet window at query time is a scan over
+the offsets of the query terms, without re-tokenizing the chunk text
+or parsing stored strings.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Snippet length in characters (without ellipses)
+SNIPPET_CHARS = 300
+
+ELLIPSIS = "..."
+
+# Weight of a chunk token sharing a prefix with a query term (inflected
+# forms, compounds) relative to an exact term match
+PARTIAL_MATCH_WEIGHT = 0.5
+
+# Weight of further occurrences of a term already in the window
+REPEAT_MATCH_WEIGHT = 0.25
+
+# Minimum length of the shared prefix of a partial match
+MIN_PARTIAL_CHARS = 2
+
+# Share of the spare window placed before the first match
+LEADING_CONTEXT = 0.3
+
+
+# =============================================================================
+# Offset Encoding
+# =============================================================================
+
+def encode_token_offsets(
+    offsets: Optional[List[Tuple[str, int, int]]],
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Encode token offsets (see token_offsets) for the chunks table.
+    
+    Returns:
+        {"token", "start", "end"} rows of the token_offsets column (the
+        form search results return), or None if there are no offsets.
+    """
+    if not offsets:
+        return None
+    return [{"token": token, "start": start, "end": end} for token, start, end in offsets]
+
+
+# =============================================================================
+# Snippet Selection
+# =============================================================================
+
+def match_spans(
+    offsets: List[Dict[str, Any]],
+    query_tokens: List[str],
+) -> List[Tuple[int, int, str, float]]:
+    """
+    Find the query-term matches of a chunk.
+    
+    Args:
+        offsets: Token offsets of the chunk ({"token", "start", "end"}
+            rows, see encode_token_offsets).
+        query_tokens: Tokens of the query.
+    
+    Returns:
+        (start, end, term, weight) tuples sorted by start. term is the
+        matched query term ("~"-prefixed for partial matches).
+    """
+    terms = set(query_tokens)
+    partial_terms = [t for t in terms if len(t) >= MIN_PARTIAL_CHARS]
+    
+    # Match of each distinct chunk token: (term, weight) or None
+    resolved: Dict[str, Optional[Tuple[str, float]]] = {}
+    matches = []
+    for span in offsets:
+        token = span["token"]
+        if token not in resolved:
+            if token in terms:
+                resolved[token] = (token, 1.0)
+            else:
+                term = next(
+                    (t for t in partial_terms if token.startswith(t) or t.startswith(token)),
+                    None,
+                )
+                if term is None or min(len(token), len(term)) < MIN_PARTIAL_CHARS:
+                    resolved[token] = None
+                else:
+                    resolved[token] = ("~" + term, PARTIAL_MATCH_WEIGHT)
+        match = resolved[token]
+        if match is not None:
+            matches.append((span["start"], span["end"], match[0], match[1]))
+    matches.sort()
+    return matches
+
+
+def best_window(
+    matches: List[Tuple[int, int, str, float]],
+    width: int = SNIPPET_CHARS,
+) -> Tuple[int, int]:
+    """
+    Find the run of matches fitting in width characters with the highest score.
+    
+    Each term in the window counts its weight once, further occurrences
+    REPEAT_MATCH_WEIGHT of it, so windows covering more distinct query
+    terms win over repetitions of one term.
+    
+    Returns:
+        Indices [first, last) of the matches in the best window.
+    """
+    counts: Dict[str, int] = {}
+    score = 0.0
+    best = (0.0, 0, 0)
+    last = 0
+    for first in range(len(matches)):
+        while last < len(matches) and matches[last][1] - matches[first][0] <= width:
+            _, _, term, weight = matches[last]
+            score += weight if counts.get(term, 0) == 0 else weight * REPEAT_MATCH_WEIGHT
+            counts[term] = counts.get(term, 0) + 1
+            last += 1
+        if score > best[0]:
+            best = (score, first, last)
+        if last == first:
+            # A single match longer than the window
+            last += 1
+            continue
+        _, _, term, weight = matches[first]
+        counts[term] -= 1
+        score -= weight if counts[term] == 0 else weight * REPEAT_MATCH_WEIGHT
+    return best[1], best[2]
+
+
+def select_snippet(
+    text: str,
+    offsets: Optional[List[Dict[str, Any]]],
+    query_tokens: List[str],
+    width: int = SNIPPET_CHARS,
+) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Select the snippet of a chunk with the densest query-term matches.
+    
+    Args:
+        text: Chunk text.
+        offsets: Token offsets of the chunk (from the index).
+        query_tokens: Tokens of the query.
+        width: Snippet length in characters.
+    
+    Returns:
+        (snippet, highlights): highlights are (start, end) offsets of
+        the matches in the snippet. Without matches the snippet is the
+        start of the text and there are no highlights.
+    """
+    matches = match_spans(offsets, query_tokens) if offsets and query_tokens else []
+    if not matches:
+        return (text[:width] + ELLIPSIS if len(text) > width else text), []
+    
+    first, last = best_window(matches, width)
+    last = max(last, first + 1)
+    match_start = matches[first][0]
+    match_end = max(end for _, end, _, _ in matches[first:last])
+    
+    # Center the matches, with some leading context, on word boundaries
+    start = max(0, match_start - int(max(0, width - (match_end - match_start)) * LEADING_CONTEXT))
+    end = min(len(text), start + width)
+    start = max(0, min(start, end - width))
+    if start > 0:
+        space = text.find(" ", start - 1, match_start)
+        if space >= 0:
+            start = space + 1
+    while start < match_start and text[start].isspace():
+        start += 1
+    if end < len(text):
+        space = text.rfind(" ", match_end, end + 1)
+        if space >= 0:
+            end = space
+    
+    prefix = ELLIPSIS if start > 0 else ""
+    snippet = prefix + text[start:end].rstrip() + (ELLIPSIS if end < len(text) else "")
+    
+    # Highlights of all matches in the snippet (clipped to it), merged
+    # when overlapping
+    highlights: List[Tuple[int, int]] = []
+    shift = len(prefix) - start
+    for match_start, match_end, _, _ in matches:
+        if match_end <= start or match_start >= end:
+            continue
+        span = (max(match_start, start) + shift, min(match_end, end) + shift)
+        if highlights and span[0] <= highlights[-1][1]:
+            highlights[-1] = (highlights[-1][0], max(highlights[-1][1], span[1]))
+        else:
+            highlights.append(span)
+    return snippet, highlights
+
+
+__all__ = [
+    "encode_token_offsets",
+    "match_spans",
+    "best_window",
+    "select_snippet",
+    "SNIPPET_CHARS",
+]
@@ -5,7 +5,7 @@ Korean (Kiwi) and English tokenization for BM25.
 """
 
 import re
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 try:
     from kiwipiepy import Kiwi
@@ -45,28 +45,34 @@ ENGLISH_PATTERN = re.compile(r"[a-zA-Z]+")
 # Number pattern
 NUMBER_PATTERN = re.compile(r"\d+")
 
+# Fallback tokens: runs between whitespace and punctuation
+SIMPLE_TOKEN_PATTERN = re.compile(r"[^\s\.,!?;:\"\'()\[\]{}<>]+")
+
+# (token, start, end) with character offsets into the tokenized text
+Span = Tuple[str, int, int]
+
 
 def is_korean_text(text: str) -> bool:
     """Check if text contains Korean characters."""
     return bool(KOREAN_PATTERN.search(text))
 
 
-def tokenize_korean(text: str) -> List[str]:
+def korean_spans(text: str) -> List[Span]:
     """
-    Tokenize Korean text using Kiwi.
+    Tokenize Korean text using Kiwi, with character offsets.
     
     Args:
         text: Text to tokenize.
     
     Returns:
-        List of tokens.
+        List of (token, start, end) tuples.
     """
     kiwi = _get_kiwi()
     if kiwi is None:
         # Fallback to simple whitespace tokenization
-        return tokenize_simple(text)
+        return simple_spans(text)
     
-    tokens = []
+    spans = []
     
     try:
         result = kiwi.tokenize(text)
@@ -76,34 +82,72 @@ def tokenize_korean(text: str) -> List[str]:
             # N: Nouns, V: Verbs, MA: Adverbs, XR: Roots
             if token.tag.startswith(("N", "V", "MA", "XR")):
                 if len(form) >= 2:  # Skip single characters
-                    tokens.append(form.lower())
+                    spans.append((form.lower(), token.start, token.start + token.len))
     except Exception:
         # Fallback on error
-        return tokenize_simple(text)
+        return simple_spans(text)
     
-    return tokens
+    return spans
 
 
-def tokenize_english(text: str) -> List[str]:
+def english_spans(text: str) -> List[Span]:
     """
-    Simple English tokenization.
+    Simple English tokenization, with character offsets.
     
     Args:
         text: Text to tokenize.
     
     Returns:
-        List of tokens.
+        List of (token, start, end) tuples.
     """
-    tokens = []
+    return [
+        (m.group().lower(), m.start(), m.end())
+        for m in ENGLISH_PATTERN.finditer(text)
+        if m.end() - m.start() >= 2  # Skip single characters
+    ]
+
+
+def simple_spans(text: str) -> List[Span]:
+    """
+    Simple whitespace/punctuation-based tokenization, with character offsets.
     
-    # Find all English words
-    words = ENGLISH_PATTERN.findall(text.lower())
+    Args:
+        text: Text to tokenize.
     
-    for word in words:
-        if len(word) >= 2:  # Skip single characters
-            tokens.append(word)
+    Returns:
+        List of (token, start, end) tuples.
+    """
+    return [
+        (m.group().lower(), m.start(), m.end())
+        for m in SIMPLE_TOKEN_PATTERN.finditer(text)
+        if m.end() - m.start() >= 2
+    ]
+
+
+def tokenize_korean(text: str) -> List[str]:
+    """
+    Tokenize Korean text using Kiwi.
     
-    return tokens
+    Args:
+        text: Text to tokenize.
+    
+    Returns:
+        List of tokens.
+    """
+    return [token for token, _, _ in korean_spans(text)]
+
+
+def tokenize_english(text: str) -> List[str]:
+    """
+    Simple English tokenization.
+    
+    Args:
+        text: Text to tokenize.
+    
+    Returns:
+        List of tokens.
+    """
+    return [token for token, _, _ in english_spans(text)]
 
 
 def tokenize_simple(text: str) -> List[str]:
@@ -116,50 +160,74 @@ def tokenize_simple(text: str) -> List[str]:
     Returns:
         List of tokens.
     """
-    # Split on whitespace and punctuation
-    tokens = re.split(r"[\s\.,!?;:\"\'()\[\]{}<>]+", text.lower())
-    
-    # Filter tokens
-    return [t for t in tokens if len(t) >= 2]
+    return [token for token, _, _ in simple_spans(text)]
 
 
-def tokenize(text: str) -> List[str]:
+def tokenize_with_offsets(text: str) -> List[Span]:
     """
-    Smart tokenization that handles both Korean and English.
+    Smart tokenization with the character offsets of every occurrence.
+    
+    Used at index time: the unique tokens (see unique_tokens) go to
+    BM25, the offsets are stored with the chunk for snippet selection.
     
     Args:
         text: Text to tokenize.
     
     Returns:
-        List of tokens.
+        List of (token, start, end) tuples, Korean tokens first, then
+        English words and numbers.
     """
     if not text.strip():
         return []
     
-    tokens = []
+    spans = []
     
     # Tokenize Korean if present
     if is_korean_text(text):
-        korean_tokens = tokenize_korean(text)
-        tokens.extend(korean_tokens)
+        spans.extend(korean_spans(text))
     
     # Always tokenize English words
-    english_tokens = tokenize_english(text)
-    tokens.extend(english_tokens)
+    spans.extend(english_spans(text))
     
     # Add numbers as tokens (for document numbers, dates, etc.)
-    numbers = NUMBER_PATTERN.findall(text)
-    tokens.extend(numbers)
+    spans.extend((m.group(), m.start(), m.end()) for m in NUMBER_PATTERN.finditer(text))
     
-    # Deduplicate while preserving order
+    return spans
+
+
+def unique_tokens(spans: List[Span]) -> List[str]:
+    """Tokens of spans, deduplicated while preserving order."""
     seen = set()
-    unique_tokens = []
-    for token in tokens:
+    tokens = []
+    for token, _, _ in spans:
         if token not in seen:
             seen.add(token)
-            unique_tokens.append(token)
+            tokens.append(token)
+    return tokens
+
+
+def token_offsets(spans: List[Span]) -> List[Span]:
+    """
+    Deduplicate spans and order them by position (as stored with chunks).
     
-    return unique_tokens
+    Returns:
+        (token, start, end) spans sorted by start.
+    """
+    # The same text may be tokenized by several passes (e.g. numbers)
+    return sorted(set(spans), key=lambda span: (span[1], span[2], span[0]))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Smart tokenization that handles both Korean and English.
+    
+    Args:
+        text: Text to tokenize.
+    
+    Returns:
+        List of tokens.
+    """
+    return unique_tokens(tokenize_with_offsets(text))
 
 
 def tokenize_query(query: str) -> List[str]:
@@ -183,6 +251,12 @@ __all__ = [
     "tokenize_korean",
     "tokenize_english",
     "tokenize_simple",
+    "korean_spans",
+    "english_spans",
+    "simple_spans",
+    "tokenize_with_offsets",
+    "unique_tokens",
+    "token_offsets",
     "tokenize",
     "tokenize_query",
 ]
@@ -3,14 +3,25 @@ Local Finder X v2.0 - BM25 Store
 
 Persistent BM25 lexical index for keyword-based search.
 Uses rank_bm25 library with pickle persistence.
+
+Queries are scored term-at-a-time over an inverted index (postings)
+derived from the rank_bm25 model, so a search only touches documents
+containing a query term.
+
+IDF and the average document length come from CorpusStats. A sharded
+index passes the statistics of all segments, so scores of different
+segments are comparable and small segments are not penalized.
 """
 
 import pickle
 import math
-from typing import List, Optional, Dict, Any, Tuple
+import threading
+from typing import List, Optional, Dict, Any, Tuple, Set, Iterable
 from pathlib import Path
 from dataclasses import dataclass, field
 
+import numpy as np
+
 try:
     from rank_bm25 import BM25Okapi
     BM25_AVAILABLE = True
@@ -21,6 +32,10 @@ except ImportError:
 from src.config.paths import get_bm25_path
 
 
+# Queries sharing one term contribution cache in search_many()
+MULTI_QUERY_BLOCK = 256
+
+
 @dataclass
 class BM25Document:
     """A document in the BM25 index."""
@@ -30,6 +45,105 @@ class BM25Document:
     is_file_level: bool = False  # True for metadata-only files
 
 
+@dataclass
+class CorpusStats:
+    """
+    Corpus statistics for IDF and length normalization.
+    
+    Statistics of several segments are summed with add().
+    """
+    doc_count: int = 0
+    total_length: int = 0
+    doc_freqs: Dict[str, int] = field(default_factory=dict)  # only the terms asked for
+    
+    @property
+    def avgdl(self) -> float:
+        return self.total_length / self.doc_count if self.doc_count else 0.0
+    
+    def idf(self, term: str) -> float:
+        """
+        Smoothed (Lucene) BM25 IDF, always positive.
+        
+        Unlike the plain Okapi IDF it does not turn negative for terms
+        in more than half of the documents, which would drop matches in
+        small corpora.
+        """
+        doc_freq = self.doc_freqs.get(term, 0)
+        return math.log(1 + (self.doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+    
+    def add(self, other: "CorpusStats") -> None:
+        """Add the statistics of another segment."""
+        self.doc_count += other.doc_count
+        self.total_length += other.total_length
+        for term, doc_freq in other.doc_freqs.items():
+            self.doc_freqs[term] = self.doc_freqs.get(term, 0) + doc_freq
+
+
+class _BM25Snapshot:
+    """
+    BM25 model of one corpus state with the structures derived from it.
+    
+    Replaced as a whole when documents change, so a search reads the
+    model, postings, document lengths and norms of a single corpus.
+    Postings are derived on first use.
+    """
+    
+    def __init__(self, bm25: "BM25Okapi", documents: List[BM25Document]):
+        self.bm25 = bm25
+        self.documents = documents
+        # Removed documents stay in the corpus as empty documents
+        self.doc_count = sum(1 for doc in documents if doc.doc_id)
+        self.doc_len = np.asarray(bm25.doc_len, dtype=np.float32)
+        
+        # term -> (document indexes, term frequencies)
+        self._postings: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None
+        # (avgdl, k1 * (1 - b + b * dl / avgdl) per document)
+        self._norms: Optional[Tuple[float, np.ndarray]] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def postings(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        if self._postings is None:
+            with self._lock:
+                if self._postings is None:
+                    self._postings = self._build_postings()
+        return self._postings
+    
+    def _build_postings(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Invert the per-document term frequencies of the BM25 model."""
+        doc_ids: Dict[str, List[int]] = {}
+        freqs: Dict[str, List[int]] = {}
+        for idx, frequencies in enumerate(self.bm25.doc_freqs):
+            for term, freq in frequencies.items():
+                if term in doc_ids:
+                    doc_ids[term].append(idx)
+                    freqs[term].append(freq)
+                else:
+                    doc_ids[term] = [idx]
+                    freqs[term] = [freq]
+        return {
+            term: (np.asarray(ids, dtype=np.int32), np.asarray(freqs[term], dtype=np.float32))
+            for term, ids in doc_ids.items()
+        }
+    
+    def corpus_stats(self, terms: Iterable[str]) -> CorpusStats:
+        postings = self.postings
+        return CorpusStats(
+            doc_count=self.doc_count,
+            total_length=int(self.doc_len.sum()),
+            doc_freqs={t: len(postings[t][0]) for t in set(terms) if t in postings},
+        )
+    
+    def norms(self, avgdl: float) -> np.ndarray:
+        """Length normalization k1 * (1 - b + b * dl / avgdl) per document."""
+        cached = self._norms
+        if cached is None or cached[0] != avgdl:
+            bm25 = self.bm25
+            cached = (avgdl, bm25.k1 * (1 - bm25.b + bm25.b * self.doc_len / avgdl))
+            self._norms = cached
+        return cached[1]
+
+
 @dataclass
 class BM25Index:
     """BM25 index data structure."""
@@ -57,8 +171,11 @@ class BM25Store:
         """
         self.index_path = index_path or get_bm25_path()
         self._index: Optional[BM25Index] = None
-        self._bm25: Optional[BM25Okapi] = None
         self._dirty = False
+        
+        # BM25 model and postings of the current corpus, swapped as a whole
+        self._snapshot: Optional[_BM25Snapshot] = None
+        self._postings_lock = threading.Lock()
     
     @property
     def index(self) -> BM25Index:
@@ -99,17 +216,17 @@ class BM25Store:
         self._dirty = False
     
     def _rebuild_bm25(self) -> None:
-        """Rebuild the BM25 model from documents."""
-        if not BM25_AVAILABLE:
-            self._bm25 = None
-            return
-        
-        if not self.index.documents:
-            self._bm25 = None
-            return
+        """
+        Rebuild the BM25 model from documents.
         
-        corpus = [doc.tokens for doc in self.index.documents]
-        self._bm25 = BM25Okapi(corpus)
+        Searches running meanwhile keep using the previous snapshot.
+        """
+        snapshot = None
+        if BM25_AVAILABLE and self.index.documents:
+            documents = list(self.index.documents)
+            snapshot = _BM25Snapshot(BM25Okapi([doc.tokens for doc in documents]), documents)
+        with self._postings_lock:
+            self._snapshot = snapshot
     
     def add_document(
         self,
@@ -226,6 +343,8 @@ class BM25Store:
         self,
         query_tokens: List[str],
         top_k: int = 50,
+        file_ids: Optional[Set[str]] = None,
+        stats: Optional[CorpusStats] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for documents matching the query.
@@ -233,6 +352,9 @@ class BM25Store:
         Args:
             query_tokens: Tokenized query.
             top_k: Number of results to return.
+            file_ids: Optional set of file IDs to restrict results to.
+            stats: Corpus statistics of the whole index (this segment's
+                own statistics if None).
         
         Returns:
             List of results with doc_id, file_id, score, is_file_level.
@@ -240,19 +362,95 @@ class BM25Store:
         if not BM25_AVAILABLE:
             return []
         
-        if self._bm25 is None or not query_tokens:
+        if self._index is None:
+            self.load()
+        
+        snapshot = self._snapshot
+        if snapshot is None or not query_tokens:
             return []
         
-        scores = self._bm25.get_scores(query_tokens)
+        scores = self._score_terms(snapshot, query_tokens, stats or snapshot.corpus_stats(query_tokens))
+        return self._top_documents(snapshot, scores, top_k, file_ids)
+    
+    def search_many(
+        self,
+        queries_tokens: List[List[str]],
+        top_k: int = 50,
+        file_ids: Optional[Set[str]] = None,
+        stats: Optional[CorpusStats] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search a batch of tokenized queries.
         
-        # Get top-k indices
-        indexed_scores = [(i, s) for i, s in enumerate(scores) if s > 0]
-        indexed_scores.sort(key=lambda x: x[1], reverse=True)
-        top_indices = indexed_scores[:top_k]
+        Scored term-at-a-time across the batch: the contribution of each
+        distinct term is computed once per block of queries and added to
+        the scores of every query containing it. The file filter is
+        evaluated once for the whole batch.
+        
+        Args:
+            queries_tokens: Tokenized queries.
+            top_k: Number of results per query.
+            file_ids: Optional set of file IDs to restrict results to.
+            stats: Corpus statistics of the whole index, covering the
+                terms of all queries (this segment's own if None).
+        
+        Returns:
+            One result list per query (same format as search()).
+        """
+        if not BM25_AVAILABLE:
+            return [[] for _ in queries_tokens]
+        
+        if self._index is None:
+            self.load()
+        
+        snapshot = self._snapshot
+        if snapshot is None:
+            return [[] for _ in queries_tokens]
+        
+        allowed = None
+        if file_ids is not None:
+            allowed = np.fromiter(
+                (doc.file_id in file_ids for doc in snapshot.documents),
+                dtype=bool,
+                count=len(snapshot.documents),
+            )
+        
+        if stats is None:
+            stats = snapshot.corpus_stats({t for tokens in queries_tokens for t in tokens})
+        
+        results = []
+        for start in range(0, len(queries_tokens), MULTI_QUERY_BLOCK):
+            contributions: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]] = {}
+            for query_tokens in queries_tokens[start:start + MULTI_QUERY_BLOCK]:
+                scores = self._score_terms(snapshot, query_tokens, stats, contributions)
+                results.append(self._top_documents(snapshot, scores, top_k, allowed=allowed))
+        return results
+    
+    def _top_documents(
+        self,
+        snapshot: _BM25Snapshot,
+        scores: np.ndarray,
+        top_k: int,
+        file_ids: Optional[Set[str]] = None,
+        allowed: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
+        """Build the results of the top_k positive scores (optionally filtered)."""
+        matched = np.flatnonzero(scores > 0)
+        if allowed is not None:
+            matched = matched[allowed[matched]]
+        elif file_ids is not None:
+            documents = snapshot.documents
+            matched = np.array(
+                [i for i in matched.tolist() if documents[i].file_id in file_ids], dtype=np.int64
+            )
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        top_indices = zip(matched.tolist(), scores[matched].tolist())
         
         results = []
         for idx, score in top_indices:
-            doc = self.index.documents[idx]
+            doc = snapshot.documents[idx]
             if doc.doc_id:  # Skip removed documents
                 results.append({
                     "doc_id": doc.doc_id,
@@ -263,6 +461,89 @@ class BM25Store:
         
         return results
     
+    def _current(self) -> Optional[_BM25Snapshot]:
+        """The snapshot of the current corpus (None if empty)."""
+        if self._index is None:
+            self.load()
+        return self._snapshot
+    
+    @property
+    def postings(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Inverted index: term -> (document indexes, term frequencies)."""
+        snapshot = self._current()
+        return snapshot.postings if snapshot is not None else {}
+    
+    def corpus_stats(self, terms: Iterable[str]) -> CorpusStats:
+        """
+        Get this segment's corpus statistics.
+        
+        Args:
+            terms: Terms whose document frequencies are needed.
+        """
+        snapshot = self._current()
+        return snapshot.corpus_stats(terms) if snapshot is not None else CorpusStats()
+    
+    def term_scores(
+        self,
+        term: str,
+        stats: CorpusStats,
+        snapshot: Optional[_BM25Snapshot] = None,
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        BM25 contribution of one term to the documents containing it.
+        
+        Args:
+            term: Query term.
+            stats: Corpus statistics providing IDF and average length.
+            snapshot: Snapshot to score (the current one if None).
+        
+        Returns:
+            (document indexes, scores), or None if the term is not indexed.
+        """
+        snapshot = snapshot or self._current()
+        if snapshot is None or stats.doc_count == 0:
+            return None
+        posting = snapshot.postings.get(term)
+        if posting is None:
+            return None
+        doc_idx, freqs = posting
+        k1 = snapshot.bm25.k1
+        norms = snapshot.norms(stats.avgdl)[doc_idx]
+        return doc_idx, stats.idf(term) * (freqs * (k1 + 1) / (freqs + norms))
+    
+    def _score_terms(
+        self,
+        snapshot: _BM25Snapshot,
+        query_tokens: List[str],
+        stats: CorpusStats,
+        contributions: Optional[Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]]] = None,
+    ) -> np.ndarray:
+        """
+        BM25 scores of all documents of a snapshot.
+        
+        Args:
+            snapshot: Snapshot to score.
+            query_tokens: Tokenized query.
+            stats: Corpus statistics (see term_scores).
+            contributions: Optional term_scores() cache shared by a batch.
+        """
+        scores = np.zeros(snapshot.bm25.corpus_size)
+        for term in query_tokens:
+            if contributions is None:
+                contribution = self.term_scores(term, stats, snapshot)
+            elif term in contributions:
+                contribution = contributions[term]
+            else:
+                contribution = contributions[term] = self.term_scores(term, stats, snapshot)
+            if contribution is not None:
+                doc_idx, term_scores = contribution
+                scores[doc_idx] += term_scores
+        return scores
+    
+    def vocabulary(self) -> Dict[str, int]:
+        """Get the indexed terms with their document frequencies."""
+        return {term: len(doc_idx) for term, (doc_idx, _) in self.postings.items()}
+    
     def compact(self) -> None:
         """Remove deleted documents and rebuild index."""
         # Filter out empty documents
@@ -295,7 +576,8 @@ class BM25Store:
     def clear(self) -> None:
         """Clear the entire index."""
         self._index = BM25Index()
-        self._bm25 = None
+        with self._postings_lock:
+            self._snapshot = None
         self._dirty = True
         self.save()
 
@@ -315,6 +597,7 @@ def get_bm25_store() -> BM25Store:
 __all__ = [
     "BM25Document",
     "BM25Index",
+    "CorpusStats",
     "BM25Store",
     "get_bm25_store",
     "BM25_AVAILABLE",
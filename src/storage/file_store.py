@@ -0,0 +1,254 @@
+"""
+Local Finder X v2.0 - File Record Store
+
+In-memory file_id -> FileRecord map for search result assembly.
+Persisted in the LanceDB files table of each index shard and loaded
+into a hash map on first use, so every lookup is O(1).
+
+Writes to the files tables are buffered and applied in batches.
+Metadata filters (extension, date, size, folder) run as columnar scans
+over the files tables.
+"""
+
+import os
+import threading
+from typing import Dict, Optional, List, Set
+
+from src.core.schemas import FileRecord, SearchFilters
+from src.storage.lancedb_store import LANCEDB_AVAILABLE
+from src.storage.shards import IndexShard, ShardManager, get_shard_manager, is_under_root
+
+
+# Pending file record writes are flushed once this many accumulate
+WRITE_BATCH_SIZE = 500
+
+
+def matches_filters(record: FileRecord, filters: SearchFilters) -> bool:
+    """Check a FileRecord against filters in Python (fallback path)."""
+    if filters.extensions and record.extension.lower() not in {e.lower() for e in filters.extensions}:
+        return False
+    if filters.modified_after is not None and record.modified_at < filters.modified_after:
+        return False
+    if filters.modified_before is not None and record.modified_at >= filters.modified_before:
+        return False
+    if filters.min_size_bytes is not None and record.size_bytes < filters.min_size_bytes:
+        return False
+    if filters.max_size_bytes is not None and record.size_bytes > filters.max_size_bytes:
+        return False
+    if filters.folder and not record.path.startswith(os.path.join(filters.folder, "")):
+        return False
+    return True
+
+
+class FileStore:
+    """
+    File metadata store keyed by file_id.
+    
+    The hash map is the read path; the shards' files tables are the
+    durable copy. Records are tracked per shard so that dropping a shard
+    only needs to forget its records from memory.
+    """
+    
+    def __init__(self, shard_manager: Optional[ShardManager] = None):
+        """
+        Initialize the file store.
+        
+        Args:
+            shard_manager: Optional shard manager instance.
+        """
+        self._shard_manager = shard_manager
+        self._records: Optional[Dict[str, FileRecord]] = None
+        self._shard_of: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        
+        # Buffered writes per shard
+        self._pending_shards: Dict[str, IndexShard] = {}
+        self._pending_adds: Dict[str, Dict[str, FileRecord]] = {}
+        self._pending_deletes: Dict[str, Set[str]] = {}
+        self._pending_count = 0
+    
+    @property
+    def shard_manager(self) -> ShardManager:
+        if self._shard_manager is None:
+            self._shard_manager = get_shard_manager()
+        return self._shard_manager
+    
+    @property
+    def records(self) -> Dict[str, FileRecord]:
+        """Lazy-load the file_id -> FileRecord map."""
+        if self._records is None:
+            self.load()
+        return self._records  # type: ignore
+    
+    def load(self) -> None:
+        """Load file records from every shard's files table."""
+        with self._lock:
+            records: Dict[str, FileRecord] = {}
+            shard_of: Dict[str, str] = {}
+            
+            if LANCEDB_AVAILABLE:
+                loaded = self.shard_manager.map_shards(
+                    lambda shard: (shard.shard_id, shard.vector_store.get_all_files())
+                )
+                for shard_id, files in loaded:
+                    for record in files:
+                        records[record.file_id] = record
+                        shard_of[record.file_id] = shard_id
+            
+            self._records = records
+            self._shard_of = shard_of
+    
+    def get(self, file_id: str) -> Optional[FileRecord]:
+        """Get a FileRecord by ID."""
+        return self.records.get(file_id)
+    
+    def put(self, record: FileRecord, shard: IndexShard) -> None:
+        """
+        Store a FileRecord in a shard (buffered).
+        
+        Args:
+            record: The file record.
+            shard: Shard that owns the file.
+        """
+        with self._lock:
+            self._pending_shards[shard.shard_id] = shard
+            self._pending_adds.setdefault(shard.shard_id, {})[record.file_id] = record
+            self._pending_count += 1
+            self.records[record.file_id] = record
+            self._shard_of[record.file_id] = shard.shard_id
+            
+            if self._pending_count >= WRITE_BATCH_SIZE:
+                self.flush()
+    
+    def remove(self, file_id: str, shard: IndexShard) -> None:
+        """
+        Remove a FileRecord from a shard (buffered).
+        
+        Args:
+            file_id: The file ID.
+            shard: Shard that owns the file.
+        """
+        with self._lock:
+            adds = self._pending_adds.get(shard.shard_id, {})
+            if adds.pop(file_id, None) is not None:
+                self._pending_count -= 1
+            else:
+                # Already persisted (or unknown): delete on the next flush
+                self._pending_shards[shard.shard_id] = shard
+                self._pending_deletes.setdefault(shard.shard_id, set()).add(file_id)
+                self._pending_count += 1
+            self.records.pop(file_id, None)
+            self._shard_of.pop(file_id, None)
+            
+            if self._pending_count >= WRITE_BATCH_SIZE:
+                self.flush()
+    
+    def flush(self) -> None:
+        """Write buffered changes: one delete and one append per shard."""
+        with self._lock:
+            if LANCEDB_AVAILABLE:
+                for shard_id, shard in self._pending_shards.items():
+                    deletes = self._pending_deletes.get(shard_id)
+                    adds = self._pending_adds.get(shard_id)
+                    try:
+                        if deletes:
+                            shard.vector_store.delete_files(list(deletes))
+                        if adds:
+                            shard.vector_store.add_files(list(adds.values()))
+                    except Exception as e:
+                        print(f"Warning: Could not persist file records for {shard.root}: {e}")
+            
+            self._pending_shards.clear()
+            self._pending_adds.clear()
+            self._pending_deletes.clear()
+            self._pending_count = 0
+    
+    def filter_file_ids(self, filters: SearchFilters) -> Set[str]:
+        """
+        Get IDs of files matching metadata filters.
+        
+        Shards outside the filter folder are skipped entirely; the rest
+        evaluate the filter as a columnar scan in parallel.
+        
+        Args:
+            filters: Metadata filters.
+        
+        Returns:
+            Set of matching file IDs.
+        """
+        if not LANCEDB_AVAILABLE:
+            return {
+                fid for fid, record in self.records.items()
+                if matches_filters(record, filters)
+            }
+        
+        self.flush()
+        
+        def _shard_ids(shard: IndexShard) -> List[str]:
+            if filters.folder and not (
+                is_under_root(shard.root, filters.folder)
+                or is_under_root(filters.folder, shard.root)
+            ):
+                return []
+            return shard.vector_store.filter_file_ids(filters)
+        
+        file_ids: Set[str] = set()
+        for ids in self.shard_manager.map_shards(_shard_ids):
+            file_ids.update(ids)
+        return file_ids
+    
+    def filter_records(self, filters: SearchFilters) -> List[FileRecord]:
+        """Get FileRecords matching metadata filters."""
+        records = self.records
+        return [records[fid] for fid in self.filter_file_ids(filters) if fid in records]
+    
+    def forget_shard(self, shard_id: str) -> int:
+        """
+        Drop all in-memory records of a shard whose directory is gone.
+        
+        Returns:
+            Number of records forgotten.
+        """
+        with self._lock:
+            self._pending_shards.pop(shard_id, None)
+            self._pending_count -= len(self._pending_adds.pop(shard_id, {}))
+            self._pending_count -= len(self._pending_deletes.pop(shard_id, set()))
+            
+            file_ids = [fid for fid, sid in self._shard_of.items() if sid == shard_id]
+            for file_id in file_ids:
+                self.records.pop(file_id, None)
+                del self._shard_of[file_id]
+            return len(file_ids)
+    
+    def get_all(self) -> List[FileRecord]:
+        """Get all file records."""
+        return list(self.records.values())
+    
+    def clear(self) -> None:
+        """Forget all records (the shard directories hold the data)."""
+        with self._lock:
+            self._records = {}
+            self._shard_of = {}
+            self._pending_shards.clear()
+            self._pending_adds.clear()
+            self._pending_deletes.clear()
+            self._pending_count = 0
+
+
+# Singleton instance
+_file_store: Optional[FileStore] = None
+
+
+def get_file_store() -> FileStore:
+    """Get the singleton file store instance."""
+    global _file_store
+    if _file_store is None:
+        _file_store = FileStore()
+    return _file_store
+
+
+__all__ = [
+    "FileStore",
+    "get_file_store",
+    "matches_filters",
+]
@@ -5,10 +5,13 @@ LanceDB-based vector and metadata storage.
 Provides high-performance vector search with SQL-like filtering.
 """
 
+import json
 import time
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 
+import numpy as np
+
 try:
     import lancedb
     from lancedb.table import Table
@@ -26,13 +29,91 @@ except ImportError:
     pa = None
 
 from src.config.paths import get_lancedb_path
+from src.storage.quantization import (
+    ENCODING_FLOAT16, ENCODING_INT8, ENCODING_BINARY, DEFAULT_VECTOR_ENCODING,
+    RERANKED_ENCODINGS, RERANK_OVERFETCH, encode_rows, binarize, int8_scores,
+    int8_scores_many, rerank_distances,
+)
 
 
 # =============================================================================
 # Schema Definition
 # =============================================================================
 
-def get_chunks_schema():
+# Vector dimension used when no embedding model is known (BGE-M3)
+DEFAULT_VECTOR_DIM = 1024
+
+# Embedding model identity of the stored vectors
+INDEX_META_FILENAME = "index_meta.json"
+
+
+def get_chunk_metadata_type():
+    """
+    Get the Arrow struct type for chunk location metadata.
+    
+    Mirrors ChunkMetadata so filters on page, sheet or slide can be
+    pushed down as nested column predicates (e.g. "metadata.page = 3").
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for LanceDB schema definition")
+    
+    return pa.struct([
+        pa.field("page", pa.int32()),
+        pa.field("slide", pa.int32()),
+        pa.field("slide_title", pa.string()),
+        pa.field("sheet", pa.string()),
+        pa.field("row_range", pa.string()),
+        pa.field("header_path", pa.list_(pa.string())),
+        pa.field("subject", pa.string()),
+        pa.field("date", pa.string()),
+        pa.field("sender", pa.string()),
+    ])
+
+
+def get_token_offsets_type():
+    """
+    Get the Arrow type for the token offsets of a chunk.
+    
+    One (token, start, end) struct per token occurrence, ordered by
+    start, so snippet selection reads them without parsing.
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for LanceDB schema definition")
+    
+    return pa.list_(pa.struct([
+        pa.field("token", pa.string()),
+        pa.field("start", pa.int32()),
+        pa.field("end", pa.int32()),
+    ]))
+
+
+def get_vector_fields(vector_dim: int, encoding: str = DEFAULT_VECTOR_ENCODING):
+    """
+    Get the vector columns of the chunks table for an encoding.
+    
+    "vector" always holds the first-stage search code; int8 and binary
+    add a float16 "rerank_vector" used to rescore the top candidates.
+    """
+    if encoding == ENCODING_FLOAT16:
+        return [pa.field("vector", pa.list_(pa.float16(), vector_dim))]
+    if encoding == ENCODING_INT8:
+        return [
+            pa.field("vector", pa.list_(pa.int8(), vector_dim)),
+            pa.field("vector_scale", pa.float32()),
+            pa.field("rerank_vector", pa.list_(pa.float16(), vector_dim)),
+        ]
+    if encoding == ENCODING_BINARY:
+        return [
+            pa.field("vector", pa.list_(pa.uint8(), (vector_dim + 7) // 8)),
+            pa.field("rerank_vector", pa.list_(pa.float16(), vector_dim)),
+        ]
+    return [pa.field("vector", pa.list_(pa.float32(), vector_dim))]
+
+
+def get_chunks_schema(
+    vector_dim: int = DEFAULT_VECTOR_DIM,
+    encoding: str = DEFAULT_VECTOR_ENCODING,
+):
     """
     Get the Arrow schema for the chunks table.
     
@@ -41,11 +122,15 @@ def get_chunks_schema():
     - file_id: parent file reference
     - chunk_index: position in file
     - text: chunk content
-    - vector: embedding (1024 dimensions for BGE-M3)
-    - tokens: lexical tokens (stored as JSON string)
-    - metadata: location info (stored as JSON string)
+    - token_offsets: character offsets of the chunk's tokens (list of
+      structs, see get_token_offsets_type), used to select evidence snippets
+    - vector: embedding (vector_dim dimensions, fixed per table), stored
+      in the given encoding (see get_vector_fields)
+    - metadata: location info (struct, see get_chunk_metadata_type)
     - content_indexed: boolean flag
     - created_at: timestamp
+    
+    Lexical tokens are not stored here; they live in the BM25 index.
     """
     if not PYARROW_AVAILABLE:
         raise ImportError("pyarrow is required for LanceDB schema definition")
@@ -55,14 +140,18 @@ def get_chunks_schema():
         pa.field("file_id", pa.string()),
         pa.field("chunk_index", pa.int32()),
         pa.field("text", pa.string()),
-        pa.field("vector", pa.list_(pa.float32(), 1024)),  # BGE-M3 dimension
-        pa.field("tokens", pa.string()),  # JSON array of tokens
-        pa.field("metadata", pa.string()),  # JSON object
+        pa.field("token_offsets", get_token_offsets_type()),
+        *get_vector_fields(vector_dim, encoding),
+        pa.field("metadata", get_chunk_metadata_type()),
         pa.field("content_indexed", pa.bool_()),
         pa.field("created_at", pa.float64()),
     ])
 
 
+# Columns returned by chunk searches (the vector itself is not needed)
+CHUNK_RESULT_COLUMNS = ["chunk_id", "file_id", "chunk_index", "text", "token_offsets", "metadata"]
+
+
 def get_files_schema():
     """
     Get the Arrow schema for the files table.
@@ -84,9 +173,19 @@ def get_files_schema():
         pa.field("modified_at", pa.float64()),
         pa.field("author", pa.string()),
         pa.field("indexed_at", pa.float64()),
+        pa.field("chunk_count", pa.int32()),
     ])
 
 
+# Scalar indexes on the files table used by metadata filters
+FILES_SCALAR_INDEXES = {
+    "file_id": "BTREE",
+    "extension": "BITMAP",
+    "modified_at": "BTREE",
+    "size_bytes": "BTREE",
+}
+
+
 # =============================================================================
 # LanceDB Store
 # =============================================================================
@@ -96,17 +195,24 @@ class LanceDBStore:
     LanceDB-based storage for vectors and metadata.
     
     Provides:
-    - Vector similarity search (cosine)
+    - Vector similarity search (full precision or quantized + rerank)
     - Metadata filtering
     - File and chunk management
     """
     
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        vector_encoding: Optional[str] = None,
+    ):
         """
         Initialize LanceDB connection.
         
         Args:
             db_path: Path to LanceDB directory. Uses default if None.
+            vector_encoding: Encoding for a newly created chunks table
+                (float32, float16, int8 or binary). An existing table keeps
+                the encoding it was created with.
         """
         if not LANCEDB_AVAILABLE:
             raise ImportError(
@@ -115,10 +221,14 @@ class LanceDBStore:
         
         self.db_path = db_path or get_lancedb_path()
         self.db_path.mkdir(parents=True, exist_ok=True)
+        self.encoding = vector_encoding or DEFAULT_VECTOR_ENCODING
         
         self._db = None
         self._chunks_table: Optional[Table] = None
         self._files_table: Optional[Table] = None
+        
+        # (table version, row IDs, codes, scales) of the unfiltered int8 scan
+        self._int8_codes: Optional[tuple] = None
     
     @property
     def db(self):
@@ -131,35 +241,69 @@ class LanceDBStore:
         """Ensure all required tables exist."""
         table_names = self.db.table_names()
         
-        # Create chunks table if not exists
-        if "chunks" not in table_names:
-            # Create with empty data matching schema
-            schema = get_chunks_schema()
-            self._chunks_table = self.db.create_table(
-                "chunks",
-                schema=schema,
-                mode="overwrite",
-            )
-        else:
+        # Open chunks table (migrating JSON-string metadata). It is only
+        # created by the first add_chunks() call, once the vector
+        # dimension of the embedding model is known.
+        if "chunks" in table_names:
             self._chunks_table = self.db.open_table("chunks")
+            if pa.types.is_string(self._chunks_table.schema.field("metadata").type):
+                self._migrate_json_chunks(self._chunks_table)
+            if "token_offsets" not in self._chunks_table.schema.names:
+                self._add_token_offsets_column()
         
-        # Create files table if not exists
+        # Create files table if not exists (or recreate an empty outdated one)
+        files_schema = get_files_schema()
+        if "files" in table_names:
+            self._files_table = self.db.open_table("files")
+            if self._files_table.schema != files_schema and self._files_table.count_rows() == 0:
+                table_names = [n for n in table_names if n != "files"]
         if "files" not in table_names:
-            schema = get_files_schema()
             self._files_table = self.db.create_table(
                 "files",
-                schema=schema,
+                schema=files_schema,
                 mode="overwrite",
             )
-        else:
-            self._files_table = self.db.open_table("files")
+    
+    def _migrate_json_chunks(self, old_table: Table) -> None:
+        """
+        Rewrite a chunks table that stores metadata/tokens as JSON strings
+        into the structured schema.
+        """
+        struct_fields = [f.name for f in get_chunk_metadata_type()]
+        rows = old_table.to_arrow().to_pylist()
+        for row in rows:
+            row.pop("tokens", None)
+            try:
+                metadata = json.loads(row.get("metadata") or "{}")
+            except json.JSONDecodeError:
+                metadata = {}
+            row["metadata"] = {name: metadata.get(name) for name in struct_fields}
+        
+        schema = get_chunks_schema(old_table.schema.field("vector").type.list_size, "float32")
+        self._chunks_table = self.db.create_table("chunks", schema=schema, mode="overwrite")
+        if rows:
+            self._chunks_table.add(rows)
+        print(f"Migrated {len(rows)} chunks to structured metadata columns")
+    
+    def _add_token_offsets_column(self) -> None:
+        """
+        Add the token_offsets column to a chunks table created before it
+        existed. Chunks indexed without offsets keep leading snippets.
+        """
+        try:
+            self._chunks_table.add_columns(pa.field("token_offsets", get_token_offsets_type()))
+        except Exception as e:
+            # Another store on the same table may have added it concurrently
+            self._chunks_table = self.db.open_table("chunks")
+            if "token_offsets" not in self._chunks_table.schema.names:
+                print(f"Warning: Could not add token offsets column: {e}")
     
     @property
-    def chunks_table(self) -> Table:
-        """Get the chunks table."""
-        if self._chunks_table is None:
+    def chunks_table(self) -> Optional[Table]:
+        """Get the chunks table (None until the first chunks are added)."""
+        if self._files_table is None:
             self._ensure_tables()
-        return self._chunks_table  # type: ignore
+        return self._chunks_table
     
     @property
     def files_table(self) -> Table:
@@ -168,6 +312,47 @@ class LanceDBStore:
             self._ensure_tables()
         return self._files_table  # type: ignore
     
+    @property
+    def vector_dim(self) -> Optional[int]:
+        """Get the vector dimension of the chunks table, if it exists."""
+        if self.chunks_table is None:
+            return None
+        schema = self.chunks_table.schema
+        if "rerank_vector" in schema.names:
+            return schema.field("rerank_vector").type.list_size
+        return schema.field("vector").type.list_size
+    
+    @property
+    def vector_encoding(self) -> str:
+        """Get the vector encoding of the chunks table (or of a new one)."""
+        if self.chunks_table is None:
+            return self.encoding
+        value_type = self.chunks_table.schema.field("vector").type.value_type
+        if pa.types.is_float16(value_type):
+            return ENCODING_FLOAT16
+        if pa.types.is_int8(value_type):
+            return ENCODING_INT8
+        if pa.types.is_uint8(value_type):
+            return ENCODING_BINARY
+        return DEFAULT_VECTOR_ENCODING
+    
+    def get_index_meta(self) -> Dict[str, Any]:
+        """Get the recorded index metadata (embedding model identity)."""
+        meta_path = self.db_path / INDEX_META_FILENAME
+        if not meta_path.exists():
+            return {}
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Warning: Could not read index metadata: {e}")
+            return {}
+    
+    def set_index_meta(self, meta: Dict[str, Any]) -> None:
+        """Record index metadata (embedding model identity)."""
+        with open(self.db_path / INDEX_META_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+    
     # =========================================================================
     # Chunk Operations
     # =========================================================================
@@ -190,6 +375,14 @@ class LanceDBStore:
             if "created_at" not in chunk:
                 chunk["created_at"] = time.time()
         
+        if self.chunks_table is None:
+            self._chunks_table = self.db.create_table(
+                "chunks",
+                schema=get_chunks_schema(len(chunks[0]["vector"]), self.encoding),
+                mode="overwrite",
+            )
+        
+        encode_rows(chunks, self.vector_encoding)
         self.chunks_table.add(chunks)
         return len(chunks)
     
@@ -202,6 +395,10 @@ class LanceDBStore:
         """
         Search for similar chunks by vector.
         
+        Quantized encodings fetch top_k * RERANK_OVERFETCH candidates by
+        their compact code and rescore them from the float16 rerank
+        column; the reported distance is squared L2 in every encoding.
+        
         Args:
             query_vector: Query embedding vector.
             top_k: Number of results to return.
@@ -210,14 +407,194 @@ class LanceDBStore:
         Returns:
             List of matching chunks with scores.
         """
-        query = self.chunks_table.search(query_vector).limit(top_k)
+        if self.chunks_table is None:
+            return []
+        
+        encoding = self.vector_encoding
+        if encoding == ENCODING_INT8:
+            return self._search_int8(query_vector, top_k, filter_expr)
+        
+        if encoding == ENCODING_BINARY:
+            query = (
+                self.chunks_table.search(binarize(np.asarray(query_vector)))
+                .distance_type("hamming")
+                .select(CHUNK_RESULT_COLUMNS + ["rerank_vector"])
+                .limit(top_k * RERANK_OVERFETCH[encoding])
+            )
+        else:
+            query = (
+                self.chunks_table.search(query_vector)
+                .select(CHUNK_RESULT_COLUMNS)
+                .limit(top_k)
+            )
         
         if filter_expr:
             query = query.where(filter_expr)
         
         results = query.to_list()
+        if encoding in RERANKED_ENCODINGS:
+            results = self._rerank(results, query_vector, top_k)
         return results
     
+    def search_chunks_many(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int = 50,
+        filter_expr: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for the chunks closest to each of a batch of query vectors.
+        
+        Float and binary encodings run one multi-vector LanceDB query
+        (a single scan or index probe for the whole batch); int8 scores
+        all queries against the cached codes with one matrix multiply.
+        Distances are the same as search_chunks().
+        
+        Args:
+            query_vectors: Array of shape (n_queries, dim).
+            top_k: Number of results per query.
+            filter_expr: Optional SQL-like filter expression.
+        
+        Returns:
+            One result list per query, in input order.
+        """
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        n_queries = len(query_vectors)
+        if self.chunks_table is None or n_queries == 0:
+            return [[] for _ in range(n_queries)]
+        if n_queries == 1:
+            return [self.search_chunks(query_vectors[0].tolist(), top_k, filter_expr)]
+        
+        encoding = self.vector_encoding
+        if encoding == ENCODING_INT8:
+            return self._search_int8_many(query_vectors, top_k, filter_expr)
+        
+        if encoding == ENCODING_BINARY:
+            query = (
+                self.chunks_table.search(binarize(query_vectors))
+                .distance_type("hamming")
+                .select(CHUNK_RESULT_COLUMNS + ["rerank_vector"])
+                .limit(top_k * RERANK_OVERFETCH[encoding])
+            )
+        else:
+            query = (
+                self.chunks_table.search(query_vectors)
+                .select(CHUNK_RESULT_COLUMNS)
+                .limit(top_k)
+            )
+        
+        if filter_expr:
+            query = query.where(filter_expr)
+        
+        per_query: List[List[Dict[str, Any]]] = [[] for _ in range(n_queries)]
+        for row in query.to_list():
+            per_query[row.pop("query_index")].append(row)
+        if encoding in RERANKED_ENCODINGS:
+            per_query = [
+                self._rerank(results, query_vectors[i], top_k)
+                for i, results in enumerate(per_query)
+            ]
+        return per_query
+    
+    def _search_int8_many(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int,
+        filter_expr: Optional[str],
+    ) -> List[List[Dict[str, Any]]]:
+        """Batched int8 first stage; candidates are fetched once for all queries."""
+        row_ids, codes, scales = self._load_int8_codes(filter_expr)
+        if len(row_ids) == 0:
+            return [[] for _ in range(len(query_vectors))]
+        
+        scores = int8_scores_many(codes, scales, query_vectors)
+        n_candidates = min(top_k * RERANK_OVERFETCH[ENCODING_INT8], len(row_ids))
+        top = np.argpartition(-scores, n_candidates - 1, axis=0)[:n_candidates]
+        
+        rows = (
+            self.chunks_table.take_row_ids(row_ids[np.unique(top)].tolist())
+            .select(CHUNK_RESULT_COLUMNS + ["rerank_vector"])
+            .with_row_id()
+            .to_list()
+        )
+        rows_by_id = {row.pop("_rowid"): row for row in rows}
+        
+        per_query = []
+        for i, query_vector in enumerate(query_vectors):
+            candidates = [
+                dict(rows_by_id[row_id])
+                for row_id in row_ids[top[:, i]].tolist()
+                if row_id in rows_by_id
+            ]
+            per_query.append(self._rerank(candidates, query_vector, top_k))
+        return per_query
+    
+    def _search_int8(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        filter_expr: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """First stage over int8 codes as a NumPy scan, then rerank."""
+        row_ids, codes, scales = self._load_int8_codes(filter_expr)
+        if len(row_ids) == 0:
+            return []
+        
+        scores = int8_scores(codes, scales, np.asarray(query_vector, dtype=np.float32))
+        n_candidates = min(top_k * RERANK_OVERFETCH[ENCODING_INT8], len(scores))
+        top = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        
+        candidates = (
+            self.chunks_table.take_row_ids(row_ids[top].tolist())
+            .select(CHUNK_RESULT_COLUMNS + ["rerank_vector"])
+            .to_list()
+        )
+        return self._rerank(candidates, query_vector, top_k)
+    
+    def _load_int8_codes(self, filter_expr: Optional[str]) -> tuple:
+        """
+        Scan the int8 codes (and row IDs) of matching chunks.
+        
+        The unfiltered scan is cached until the table changes; at about
+        dim + 4 bytes per chunk it is a quarter of the float32 vectors.
+        """
+        version = self.chunks_table.version
+        if filter_expr is None and self._int8_codes is not None:
+            if self._int8_codes[0] == version:
+                return self._int8_codes[1:]
+        
+        query = self.chunks_table.search().select(["vector", "vector_scale"]).with_row_id(True)
+        if filter_expr:
+            query = query.where(filter_expr)
+        codes_table = query.limit(None).to_arrow()
+        
+        dim = codes_table.schema.field("vector").type.list_size
+        row_ids = codes_table["_rowid"].to_numpy()
+        codes = codes_table["vector"].combine_chunks().values.to_numpy().reshape(-1, dim)
+        scales = codes_table["vector_scale"].to_numpy()
+        
+        if filter_expr is None:
+            self._int8_codes = (version, row_ids, codes, scales)
+        return row_ids, codes, scales
+    
+    def _rerank(
+        self,
+        candidates: List[Dict[str, Any]],
+        query_vector: List[float],
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        """Rescore candidates with their float16 rerank vectors."""
+        if not candidates:
+            return []
+        
+        rerank_vectors = np.asarray([c.pop("rerank_vector") for c in candidates], dtype=np.float32)
+        distances = rerank_distances(rerank_vectors, np.asarray(query_vector, dtype=np.float32))
+        for candidate, distance in zip(candidates, distances):
+            candidate["_distance"] = float(distance)
+        
+        candidates.sort(key=lambda c: c["_distance"])
+        return candidates[:top_k]
+    
     def delete_chunks_by_file(self, file_id: str) -> int:
         """
         Delete all chunks for a file.
@@ -228,26 +605,141 @@ class LanceDBStore:
         Returns:
             Number of chunks deleted (approximate).
         """
+        if self.chunks_table is None:
+            return 0
+        
         # LanceDB delete by predicate
         self.chunks_table.delete(f"file_id = '{file_id}'")
         return 0  # LanceDB doesn't return count
     
     def get_chunks_by_file(self, file_id: str) -> List[Dict[str, Any]]:
         """Get all chunks for a file."""
+        if self.chunks_table is None:
+            return []
         results = self.chunks_table.search().where(
             f"file_id = '{file_id}'"
         ).to_list()
         return results
     
+    def get_chunks(self, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get chunks by ID (result columns only, in no particular order)."""
+        if self.chunks_table is None or not chunk_ids:
+            return []
+        ids_str = ", ".join(f"'{cid}'" for cid in chunk_ids)
+        return (
+            self.chunks_table.search()
+            .where(f"chunk_id IN ({ids_str})")
+            .select(CHUNK_RESULT_COLUMNS)
+            .limit(len(chunk_ids))
+            .to_list()
+        )
+    
+    def drop_chunks_table(self) -> None:
+        """Drop the chunks table; it is recreated by the next add_chunks()."""
+        self.db.drop_table("chunks", ignore_missing=True)
+        self._chunks_table = None
+        self._int8_codes = None
+    
+    def _full_vector_column(self) -> str:
+        """Column holding the full-precision vectors of the chunks table."""
+        if "rerank_vector" in self.chunks_table.schema.names:
+            return "rerank_vector"
+        return "vector"
+    
+    def sample_vectors(self, limit: int, seed: int = 0) -> np.ndarray:
+        """
+        Get a random sample of stored vectors at full precision.
+        
+        Args:
+            limit: Maximum number of vectors.
+            seed: Random seed for the sample.
+        
+        Returns:
+            Array of shape (n, vector_dim).
+        """
+        if self.chunks_table is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        
+        total = self.chunks_table.count_rows()
+        rng = np.random.default_rng(seed)
+        offsets = np.sort(rng.choice(total, size=min(limit, total), replace=False))
+        column = self._full_vector_column()
+        
+        table = self.chunks_table.take_offsets(offsets.tolist()).select([column]).to_arrow()
+        if table.num_rows == 0:
+            return np.zeros((0, self.vector_dim), dtype=np.float32)
+        values = table[column].combine_chunks().values.to_numpy(zero_copy_only=False)
+        return values.reshape(table.num_rows, -1).astype(np.float32)
+    
+    def rewrite_vectors(self, transform) -> int:
+        """
+        Rewrite every stored vector through a transform, e.g. a projection.
+        
+        The table is replaced in one overwrite; its dimension follows the
+        transform's output and its encoding is kept.
+        
+        Args:
+            transform: Function mapping an (n, dim) array to (n, new_dim).
+        
+        Returns:
+            Number of chunks rewritten.
+        """
+        if self.chunks_table is None:
+            return 0
+        
+        encoding = self.vector_encoding
+        column = self._full_vector_column()
+        table = self.chunks_table.to_arrow()
+        if table.num_rows == 0:
+            return 0
+        
+        vectors = table[column].combine_chunks().values.to_numpy(zero_copy_only=False)
+        vectors = transform(vectors.reshape(table.num_rows, -1).astype(np.float32))
+        
+        rows = table.drop_columns(
+            [name for name in ("vector", "vector_scale", "rerank_vector") if name in table.schema.names]
+        ).to_pylist()
+        for row, vector in zip(rows, vectors):
+            row["vector"] = vector.tolist()
+        encode_rows(rows, encoding)
+        
+        schema = get_chunks_schema(vectors.shape[1], encoding)
+        self._chunks_table = self.db.create_table(
+            "chunks",
+            data=pa.Table.from_pylist(rows, schema=schema),
+            schema=schema,
+            mode="overwrite",
+        )
+        self._int8_codes = None
+        return len(rows)
+    
     # =========================================================================
     # File Operations
     # =========================================================================
     
     def add_file(self, file_record: Dict[str, Any]) -> None:
         """Add a file record to the store."""
-        if "indexed_at" not in file_record:
-            file_record["indexed_at"] = time.time()
-        self.files_table.add([file_record])
+        self.add_files([file_record])
+    
+    def add_files(self, file_records: List[Dict[str, Any]]) -> int:
+        """
+        Add multiple file records in one write.
+        
+        Args:
+            file_records: List of file dictionaries matching the files schema.
+        
+        Returns:
+            Number of records added.
+        """
+        if not file_records:
+            return 0
+        
+        for file_record in file_records:
+            if "indexed_at" not in file_record:
+                file_record["indexed_at"] = time.time()
+        
+        self.files_table.add(file_records)
+        return len(file_records)
     
     def get_file(self, file_id: str) -> Optional[Dict[str, Any]]:
         """Get a file record by ID."""
@@ -270,9 +762,54 @@ class LanceDBStore:
         self.delete_chunks_by_file(file_id)
         self.files_table.delete(f"file_id = '{file_id}'")
     
+    def delete_files(self, file_ids: List[str]) -> None:
+        """Delete file records (not their chunks) by ID."""
+        if not file_ids:
+            return
+        ids_str = ", ".join(f"'{fid}'" for fid in file_ids)
+        self.files_table.delete(f"file_id IN ({ids_str})")
+    
     def get_all_files(self) -> List[Dict[str, Any]]:
         """Get all file records."""
-        return self.files_table.to_pandas().to_dict("records")
+        return self.files_table.to_arrow().to_pylist()
+    
+    def query_files(
+        self,
+        filter_expr: str,
+        columns: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Scan the files table with a SQL-like filter.
+        
+        Args:
+            filter_expr: Filter expression, evaluated by LanceDB (uses scalar indexes).
+            columns: Optional column projection.
+        
+        Returns:
+            Matching file rows.
+        """
+        query = self.files_table.search().where(filter_expr)
+        if columns:
+            query = query.select(columns)
+        return query.limit(None).to_arrow().to_pylist()
+    
+    def ensure_file_indexes(self) -> None:
+        """Create missing scalar indexes on the files table."""
+        if self.files_table.count_rows() == 0:
+            return
+        
+        indexed_columns = set()
+        for index in self.files_table.list_indices():
+            columns = index["columns"] if isinstance(index, dict) else getattr(index, "columns", [])
+            indexed_columns.update(columns)
+        
+        for column, index_type in FILES_SCALAR_INDEXES.items():
+            if column in indexed_columns:
+                continue
+            try:
+                self.files_table.create_scalar_index(column, index_type=index_type)
+            except Exception as e:
+                print(f"Warning: Could not create index on files.{column}: {e}")
     
     # =========================================================================
     # Utility
@@ -281,8 +818,8 @@ class LanceDBStore:
     def get_stats(self) -> Dict[str, int]:
         """Get storage statistics."""
         try:
-            chunks_count = len(self.chunks_table.to_pandas())
-            files_count = len(self.files_table.to_pandas())
+            files_count = self.files_table.count_rows()
+            chunks_count = self.chunks_table.count_rows() if self.chunks_table is not None else 0
         except Exception:
             chunks_count = 0
             files_count = 0
@@ -298,6 +835,8 @@ class LanceDBStore:
         self.db.drop_table("files", ignore_missing=True)
         self._chunks_table = None
         self._files_table = None
+        self._int8_codes = None
+        (self.db_path / INDEX_META_FILENAME).unlink(missing_ok=True)
         self._ensure_tables()
 
 
@@ -311,6 +850,10 @@ __all__ = [
     "LanceDBStore",
     "get_lancedb_store",
     "get_chunks_schema",
+    "get_vector_fields",
+    "get_chunk_metadata_type",
+    "get_token_offsets_type",
     "get_files_schema",
+    "DEFAULT_VECTOR_DIM",
     "LANCEDB_AVAILABLE",
 ]
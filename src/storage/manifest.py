@@ -3,15 +3,62 @@ Local Finder X v2.0 - Manifest Store
 
 Manages file fingerprints for incremental indexing.
 Tracks which files have been indexed and their modification state.
+
+Fingerprints live in an embedded SQLite database (WAL mode) with
+indexed path and file_id columns. Writes are buffered and upserted in
+batches; diffs against the file system are streamed in batches instead
+of loading the whole manifest into memory.
 """
 
 import json
+import os
+import sqlite3
+import threading
 import time
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Iterable, Iterator
+
+from src.config.paths import get_manifest_path, get_manifest_db_path
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+MANIFEST_SCHEMA_VERSION = "2.1"
+
+# Pending writes are flushed once this many accumulate
+WRITE_BATCH_SIZE = 1000
 
-from src.config.paths import get_manifest_path
+# Number of paths looked up per SELECT when streaming diffs
+LOOKUP_BATCH_SIZE = 500
+
+_CREATE_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        file_id TEXT NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        modified_at REAL NOT NULL,
+        last_indexed_at REAL NOT NULL,
+        content_indexed INTEGER NOT NULL DEFAULT 0,
+        hash TEXT,
+        shard_id TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_files_file_id ON files (file_id)",
+    """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+]
+
+_FINGERPRINT_COLUMNS = (
+    "path, file_id, size_bytes, modified_at, last_indexed_at, content_indexed, hash, shard_id"
+)
 
 
 @dataclass
@@ -23,13 +70,14 @@ class FileFingerprint:
     last_indexed_at: float
     content_indexed: bool = False
     hash: Optional[str] = None
+    shard_id: Optional[str] = None  # Shard holding the file's data
 
 
 @dataclass
 class Manifest:
     """
-    Manifest containing all indexed file fingerprints.
-    Used for incremental indexing decisions.
+    Legacy JSON manifest containing all indexed file fingerprints.
+    Only used to migrate manifest.json into the SQLite store.
     """
     schema_version: str = "2.0"
     files: Dict[str, FileFingerprint] = field(default_factory=dict)
@@ -73,87 +121,321 @@ class Manifest:
         )
 
 
+def _row_to_fingerprint(row: tuple) -> FileFingerprint:
+    """Convert a (path, file_id, ...) row to a FileFingerprint."""
+    return FileFingerprint(
+        file_id=row[1],
+        size_bytes=row[2],
+        modified_at=row[3],
+        last_indexed_at=row[4],
+        content_indexed=bool(row[5]),
+        hash=row[6],
+        shard_id=row[7],
+    )
+
+
+def _fingerprint_to_row(path: str, fp: FileFingerprint) -> tuple:
+    """Convert a FileFingerprint to a row tuple for upserts."""
+    return (
+        path,
+        fp.file_id,
+        fp.size_bytes,
+        fp.modified_at,
+        fp.last_indexed_at,
+        int(fp.content_indexed),
+        fp.hash,
+        fp.shard_id,
+    )
+
+
 class ManifestStore:
     """
     Singleton store for managing the manifest.
     Handles loading, saving, and querying file fingerprints.
+    
+    Changes are buffered in memory and written with batched upserts;
+    save() flushes the buffer and commits.
     """
     
     _instance: Optional["ManifestStore"] = None
-    _manifest: Optional[Manifest] = None
+    _conn: Optional[sqlite3.Connection] = None
     
     def __new__(cls) -> "ManifestStore":
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.RLock()
+            cls._instance._pending = {}
         return cls._instance
     
     def __init__(self):
-        if self._manifest is None:
+        if self._conn is None:
             self.load()
     
     @property
-    def manifest(self) -> Manifest:
-        """Get the current manifest."""
-        if self._manifest is None:
+    def conn(self) -> sqlite3.Connection:
+        """Get the database connection."""
+        if self._conn is None:
             self.load()
-        return self._manifest  # type: ignore
+        return self._conn  # type: ignore
+    
+    def load(self) -> None:
+        """Open the manifest database. Migrates manifest.json on first use."""
+        with self._lock:
+            db_path = get_manifest_db_path()
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _CREATE_STATEMENTS:
+                conn.execute(statement)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+            if "shard_id" not in columns:
+                # Entries from before shard ownership was recorded keep NULL
+                conn.execute("ALTER TABLE files ADD COLUMN shard_id TEXT")
+            conn.commit()
+            
+            self._conn = conn
+            self._pending: Dict[str, Optional[FileFingerprint]] = {}
+            self._generation = int(self._get_meta("index_generation") or 0)
+            
+            if self._get_meta("schema_version") is None:
+                self._set_meta("schema_version", MANIFEST_SCHEMA_VERSION)
+                self._migrate_json()
+                conn.commit()
     
-    def load(self) -> Manifest:
-        """Load manifest from file. Creates new if not exists."""
-        manifest_path = get_manifest_path()
+    def _migrate_json(self) -> None:
+        """One-time migration from the legacy manifest.json."""
+        json_path = get_manifest_path()
+        if not json_path.exists():
+            return
         
-        if manifest_path.exists():
-            try:
-                with open(manifest_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                self._manifest = Manifest.from_dict(data)
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Warning: Could not load manifest, creating new: {e}")
-                self._manifest = Manifest()
-                self.save()
-        else:
-            self._manifest = Manifest()
-            self.save()
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                legacy = Manifest.from_dict(json.load(f))
+        except (json.JSONDecodeError, KeyError, OSError) as e:
+            print(f"Warning: Could not migrate manifest.json, starting empty: {e}")
+            return
+        
+        self._conn.executemany(  # type: ignore
+            f"INSERT OR REPLACE INTO files ({_FINGERPRINT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (_fingerprint_to_row(path, fp) for path, fp in legacy.files.items()),
+        )
+        self._set_meta("last_updated_at", str(legacy.last_updated_at))
         
-        return self._manifest
+        try:
+            json_path.rename(json_path.with_suffix(".json.migrated"))
+        except OSError:
+            pass
+        print(f"Migrated {len(legacy.files)} manifest entries to SQLite")
     
-    def save(self) -> None:
-        """Save current manifest to file."""
-        if self._manifest is None:
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+    
+    def _flush(self) -> None:
+        """Write pending changes with batched upserts/deletes (no commit)."""
+        if not self._pending:
             return
         
-        self._manifest.last_updated_at = time.time()
-        manifest_path = get_manifest_path()
-        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        upserts = [
+            _fingerprint_to_row(path, fp)
+            for path, fp in self._pending.items() if fp is not None
+        ]
+        deletes = [(path,) for path, fp in self._pending.items() if fp is None]
+        
+        if upserts:
+            self.conn.executemany(
+                f"""
+                INSERT INTO files ({_FINGERPRINT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    file_id = excluded.file_id,
+                    size_bytes = excluded.size_bytes,
+                    modified_at = excluded.modified_at,
+                    last_indexed_at = excluded.last_indexed_at,
+                    content_indexed = excluded.content_indexed,
+                    hash = excluded.hash,
+                    shard_id = excluded.shard_id
+                """,
+                upserts,
+            )
+        if deletes:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", deletes)
         
-        with open(manifest_path, "w", encoding="utf-8") as f:
-            json.dump(self._manifest.to_dict(), f, indent=2, ensure_ascii=False)
+        self._pending.clear()
+    
+    def save(self) -> None:
+        """Flush pending changes and commit."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush()
+            self._set_meta("last_updated_at", str(time.time()))
+            self.conn.commit()
+    
+    @property
+    def generation(self) -> int:
+        """Index generation id; changes whenever the indexed data changes."""
+        if self._conn is None:
+            self.load()
+        return self._generation
+    
+    def bump_generation(self) -> int:
+        """Start a new index generation (persisted with the next save)."""
+        with self._lock:
+            self._generation = self.generation + 1
+            self._set_meta("index_generation", str(self._generation))
+            return self._generation
     
     def get_fingerprint(self, path: str) -> Optional[FileFingerprint]:
         """Get fingerprint for a file path."""
-        return self.manifest.files.get(path)
+        with self._lock:
+            if path in self._pending:
+                return self._pending[path]
+            row = self.conn.execute(
+                f"SELECT {_FINGERPRINT_COLUMNS} FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            return _row_to_fingerprint(row) if row else None
+    
+    def get_by_file_id(self, file_id: str) -> Optional[Tuple[str, FileFingerprint]]:
+        """Get (path, fingerprint) for a file ID."""
+        with self._lock:
+            self._flush()
+            row = self.conn.execute(
+                f"SELECT {_FINGERPRINT_COLUMNS} FROM files WHERE file_id = ?", (file_id,)
+            ).fetchone()
+            return (row[0], _row_to_fingerprint(row)) if row else None
     
     def set_fingerprint(self, path: str, fingerprint: FileFingerprint) -> None:
         """Set fingerprint for a file path."""
-        self.manifest.files[path] = fingerprint
+        with self._lock:
+            self._pending[path] = fingerprint
+            if len(self._pending) >= WRITE_BATCH_SIZE:
+                self._flush()
     
     def remove_fingerprint(self, path: str) -> None:
         """Remove fingerprint for a file path."""
-        if path in self.manifest.files:
-            del self.manifest.files[path]
+        with self._lock:
+            self._pending[path] = None
+            if len(self._pending) >= WRITE_BATCH_SIZE:
+                self._flush()
     
     def has_file(self, path: str) -> bool:
         """Check if a file is in the manifest."""
-        return path in self.manifest.files
+        return self.get_fingerprint(path) is not None
     
     def get_all_paths(self) -> List[str]:
         """Get all indexed file paths."""
-        return list(self.manifest.files.keys())
+        return list(self.iter_paths())
+    
+    def iter_paths(self, prefix: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream indexed file paths, optionally limited to a path prefix.
+        
+        Args:
+            prefix: Only yield paths starting with this string.
+        """
+        if prefix:
+            # Range scan on the primary key instead of LIKE (no escaping needed)
+            sql = "SELECT path FROM files WHERE path >= ? AND path < ? ORDER BY path"
+            params: tuple = (prefix, prefix + "\U0010ffff")
+        else:
+            sql = "SELECT path FROM files ORDER BY path"
+            params = ()
+        yield from self._stream(sql, params)
+    
+    def iter_fingerprints(
+        self,
+        paths: Iterable[str],
+        batch_size: int = LOOKUP_BATCH_SIZE,
+    ) -> Iterator[Tuple[str, Optional[FileFingerprint]]]:
+        """
+        Stream stored fingerprints for the given paths.
+        
+        Paths are looked up in batches with one indexed SELECT each.
+        
+        Yields:
+            (path, fingerprint or None) in input order.
+        """
+        batch: List[str] = []
+        for path in paths:
+            batch.append(path)
+            if len(batch) >= batch_size:
+                yield from self._lookup_batch(batch)
+                batch = []
+        if batch:
+            yield from self._lookup_batch(batch)
+    
+    def _lookup_batch(self, paths: List[str]) -> List[Tuple[str, Optional[FileFingerprint]]]:
+        with self._lock:
+            self._flush()
+            placeholders = ", ".join("?" for _ in paths)
+            rows = self.conn.execute(
+                f"SELECT {_FINGERPRINT_COLUMNS} FROM files WHERE path IN ({placeholders})",
+                paths,
+            ).fetchall()
+        found = {row[0]: _row_to_fingerprint(row) for row in rows}
+        return [(path, found.get(path)) for path in paths]
+    
+    def iter_missing_paths(self, current_paths: Iterable[str]) -> Iterator[str]:
+        """
+        Stream indexed paths that are not in current_paths.
+        
+        The current paths are loaded into a temporary table so the
+        anti-join runs inside SQLite.
+        """
+        with self._lock:
+            self._flush()
+            self.conn.execute("DROP TABLE IF EXISTS temp.current_paths")
+            self.conn.execute("CREATE TEMP TABLE current_paths (path TEXT PRIMARY KEY)")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO temp.current_paths (path) VALUES (?)",
+                ((path,) for path in current_paths),
+            )
+        try:
+            yield from self._stream(
+                """
+                SELECT f.path FROM files f
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM temp.current_paths c WHERE c.path = f.path
+                )
+                ORDER BY f.path
+                """,
+                (),
+            )
+        finally:
+            with self._lock:
+                self.conn.execute("DROP TABLE IF EXISTS temp.current_paths")
+    
+    def _stream(self, sql: str, params: tuple, batch_size: int = LOOKUP_BATCH_SIZE) -> Iterator[str]:
+        """Run a single-column query and yield its values in batches."""
+        with self._lock:
+            self._flush()
+            rows = self.conn.execute(sql, params)
+            batch = rows.fetchmany(batch_size)
+        while batch:
+            for row in batch:
+                yield row[0]
+            with self._lock:
+                batch = rows.fetchmany(batch_size)
+    
+    def count(self) -> int:
+        """Get the number of indexed files."""
+        with self._lock:
+            self._flush()
+            return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
     
     def clear(self) -> None:
         """Clear all fingerprints."""
-        self._manifest = Manifest()
-        self.save()
+        with self._lock:
+            self._pending.clear()
+            self.conn.execute("DELETE FROM files")
+            self.save()
 
 
 def compare_fingerprint(
@@ -179,6 +461,37 @@ def compare_fingerprint(
     return False, "unchanged"
 
 
+def iter_files_to_reindex(
+    file_paths: Iterable[str],
+    manifest_store: Optional[ManifestStore] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Stream the reindex decision for each file.
+    
+    Args:
+        file_paths: File paths to check.
+        manifest_store: Optional manifest store instance.
+    
+    Yields:
+        (path, reason) where reason is "new_file", "size_changed",
+        "modified" or "unchanged". Missing files are skipped.
+    """
+    store = manifest_store or ManifestStore()
+    
+    for path, stored in store.iter_fingerprints(file_paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        
+        _, reason = compare_fingerprint(
+            current_size=stat.st_size,
+            current_mtime=stat.st_mtime,
+            stored=stored,
+        )
+        yield path, reason
+
+
 def get_files_to_reindex(
     file_paths: List[str],
     manifest_store: Optional[ManifestStore] = None,
@@ -193,35 +506,39 @@ def get_files_to_reindex(
     Returns:
         Tuple of (new_files, modified_files, unchanged_files)
     """
-    store = manifest_store or ManifestStore()
-    
     new_files = []
     modified_files = []
     unchanged_files = []
     
-    for path in file_paths:
-        p = Path(path)
-        if not p.exists():
-            continue
-        
-        stat = p.stat()
-        stored = store.get_fingerprint(path)
-        needs_reindex, reason = compare_fingerprint(
-            current_size=stat.st_size,
-            current_mtime=stat.st_mtime,
-            stored=stored,
-        )
-        
+    for path, reason in iter_files_to_reindex(file_paths, manifest_store):
         if reason == "new_file":
             new_files.append(path)
-        elif needs_reindex:
-            modified_files.append(path)
-        else:
+        elif reason == "unchanged":
             unchanged_files.append(path)
+        else:
+            modified_files.append(path)
     
     return new_files, modified_files, unchanged_files
 
 
+def iter_deleted_files(
+    current_paths: Iterable[str],
+    manifest_store: Optional[ManifestStore] = None,
+) -> Iterator[str]:
+    """
+    Stream files that are in manifest but no longer exist on disk.
+    
+    Args:
+        current_paths: Currently existing file paths.
+        manifest_store: Optional manifest store instance.
+    
+    Yields:
+        Deleted file paths.
+    """
+    store = manifest_store or ManifestStore()
+    yield from store.iter_missing_paths(current_paths)
+
+
 def get_deleted_files(
     current_paths: List[str],
     manifest_store: Optional[ManifestStore] = None,
@@ -236,11 +553,7 @@ def get_deleted_files(
     Returns:
         List of deleted file paths.
     """
-    store = manifest_store or ManifestStore()
-    current_set = set(current_paths)
-    stored_paths = store.get_all_paths()
-    
-    return [p for p in stored_paths if p not in current_set]
+    return list(iter_deleted_files(current_paths, manifest_store))
 
 
 __all__ = [
@@ -248,6 +561,8 @@ __all__ = [
     "Manifest",
     "ManifestStore",
     "compare_fingerprint",
+    "iter_files_to_reindex",
     "get_files_to_reindex",
+    "iter_deleted_files",
     "get_deleted_files",
 ]
@@ -0,0 +1,146 @@
+"""
+Local Finder X v2.0 - Vector Quantization
+
+Compact vector encodings for the chunks table.
+
+- float32: full precision (default)
+- float16: half precision, searched directly by LanceDB
+- int8:    scalar-quantized codes with a per-vector scale, scanned with NumPy
+- binary:  sign bits packed into bytes, searched by Hamming distance
+
+int8 and binary codes are only used for the first search stage. A
+float16 copy of each vector is kept in a separate column and the top
+candidates are rescored against it.
+"""
+
+from typing import List, Dict, Any
+
+import numpy as np
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+ENCODING_FLOAT32 = "float32"
+ENCODING_FLOAT16 = "float16"
+ENCODING_INT8 = "int8"
+ENCODING_BINARY = "binary"
+
+VECTOR_ENCODINGS = (ENCODING_FLOAT32, ENCODING_FLOAT16, ENCODING_INT8, ENCODING_BINARY)
+DEFAULT_VECTOR_ENCODING = ENCODING_FLOAT32
+
+# Encodings whose first stage is rescored from the float16 rerank column
+RERANKED_ENCODINGS = (ENCODING_INT8, ENCODING_BINARY)
+
+# First-stage candidates per requested result for reranked encodings.
+# Sign bits lose more ranking information than int8, so binary fetches more.
+RERANK_OVERFETCH = {
+    ENCODING_INT8: 4,
+    ENCODING_BINARY: 10,
+}
+
+
+# =============================================================================
+# Encoding
+# =============================================================================
+
+def quantize_int8(vectors: np.ndarray) -> tuple:
+    """
+    Scalar-quantize vectors to int8 with a per-vector scale.
+    
+    Returns:
+        (codes, scales) where vectors ~= codes * scales[:, None].
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.round(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def binarize(vectors: np.ndarray) -> np.ndarray:
+    """Pack the sign bits of vectors into uint8 codes (dim / 8 bytes each)."""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def encode_rows(rows: List[Dict[str, Any]], encoding: str) -> None:
+    """
+    Replace the float "vector" of chunk rows with the encoded columns.
+    
+    Args:
+        rows: Chunk rows with a float "vector" list (modified in place).
+        encoding: Target vector encoding.
+    """
+    if encoding not in RERANKED_ENCODINGS:
+        return
+    
+    vectors = np.asarray([row["vector"] for row in rows], dtype=np.float32)
+    halves = vectors.astype(np.float16)
+    
+    if encoding == ENCODING_INT8:
+        codes, scales = quantize_int8(vectors)
+        for row, code, scale, half in zip(rows, codes, scales, halves):
+            row["vector"] = code
+            row["vector_scale"] = float(scale)
+            row["rerank_vector"] = half
+    else:
+        codes = binarize(vectors)
+        for row, code, half in zip(rows, codes, halves):
+            row["vector"] = code
+            row["rerank_vector"] = half
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+    """Approximate inner products between int8 codes and a float query."""
+    return (codes.astype(np.float32) @ query_vector) * scales
+
+
+def int8_scores_many(
+    codes: np.ndarray,
+    scales: np.ndarray,
+    query_vectors: np.ndarray,
+    block_rows: int = 16384,
+) -> np.ndarray:
+    """
+    Approximate inner products between int8 codes and a batch of queries.
+    
+    Codes are widened to float32 one block of rows at a time, so memory
+    stays at block_rows * dim floats plus the (n_codes, n_queries) result.
+    """
+    query_matrix = np.asarray(query_vectors, dtype=np.float32).T
+    scores = np.empty((len(codes), query_matrix.shape[1]), dtype=np.float32)
+    for start in range(0, len(codes), block_rows):
+        end = start + block_rows
+        block = codes[start:end].astype(np.float32) @ query_matrix
+        scores[start:end] = block * scales[start:end, None]
+    return scores
+
+
+def rerank_distances(rerank_vectors: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+    """
+    Exact squared L2 distances from float16 rerank vectors to the query.
+    
+    Matches the distance LanceDB reports for float vectors, so scores
+    are comparable across encodings.
+    """
+    diff = rerank_vectors.astype(np.float32) - query_vector
+    return np.einsum("ij,ij->i", diff, diff)
+
+
+__all__ = [
+    "ENCODING_FLOAT32",
+    "ENCODING_FLOAT16",
+    "ENCODING_INT8",
+    "ENCODING_BINARY",
+    "VECTOR_ENCODINGS",
+    "DEFAULT_VECTOR_ENCODING",
+    "RERANKED_ENCODINGS",
+    "RERANK_OVERFETCH",
+    "quantize_int8",
+    "binarize",
+    "encode_rows",
+    "int8_scores",
+    "int8_scores_many",
+    "rerank_distances",
+]
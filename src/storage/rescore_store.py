@@ -0,0 +1,156 @@
+"""
+Local Finder X v2.0 - Rescore Vector Store
+
+Cache of large-model chunk vectors for two-tier search.
+
+Chunks are indexed with the small (recall) model only; vectors of the
+large rescoring model are computed the first time a chunk reaches the
+rescoring stage and kept here, keyed by (model, chunk_id), in an
+embedded SQLite database.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.config.paths import get_rescore_db_path
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Chunk IDs per SELECT / DELETE statement
+LOOKUP_BATCH_SIZE = 500
+
+_CREATE_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS vectors (
+        model TEXT NOT NULL,
+        chunk_id TEXT NOT NULL,
+        file_id TEXT NOT NULL,
+        vector BLOB NOT NULL,
+        PRIMARY KEY (model, chunk_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_vectors_file_id ON vectors (file_id)",
+]
+
+
+# =============================================================================
+# Rescore Vector Store
+# =============================================================================
+
+class RescoreVectorStore:
+    """SQLite store of lazily computed large-model chunk vectors."""
+    
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Initialize the store.
+        
+        Args:
+            db_path: Database file. Uses get_rescore_db_path() if None.
+        """
+        self.db_path = db_path or get_rescore_db_path()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Get the database connection (opened on first use)."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _CREATE_STATEMENTS:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def get_many(self, model: str, chunk_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Get cached vectors of a model.
+        
+        Returns:
+            Dict of chunk_id -> float32 vector for the chunks found.
+        """
+        vectors: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(chunk_ids), LOOKUP_BATCH_SIZE):
+                batch = chunk_ids[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT chunk_id, vector FROM vectors "
+                    f"WHERE model = ? AND chunk_id IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for chunk_id, blob in rows:
+                    vectors[chunk_id] = np.frombuffer(blob, dtype=np.float32)
+        return vectors
+    
+    def put_many(self, model: str, items: Iterable[Tuple[str, str, np.ndarray]]) -> None:
+        """
+        Store vectors of a model.
+        
+        Args:
+            model: Model name.
+            items: (chunk_id, file_id, vector) tuples.
+        """
+        rows = [
+            (model, chunk_id, file_id, np.asarray(vector, dtype=np.float32).tobytes())
+            for chunk_id, file_id, vector in items
+        ]
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vectors (model, chunk_id, file_id, vector) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+    
+    def delete_by_files(self, file_ids: List[str]) -> None:
+        """Delete the vectors of files (all models)."""
+        with self._lock:
+            for start in range(0, len(file_ids), LOOKUP_BATCH_SIZE):
+                batch = file_ids[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                self.conn.execute(f"DELETE FROM vectors WHERE file_id IN ({placeholders})", batch)
+            self.conn.commit()
+    
+    def count(self, model: Optional[str] = None) -> int:
+        """Count cached vectors (of one model, or all)."""
+        with self._lock:
+            if model is None:
+                return self.conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM vectors WHERE model = ?", (model,)
+            ).fetchone()[0]
+    
+    def clear(self) -> None:
+        """Delete all cached vectors."""
+        with self._lock:
+            self.conn.execute("DELETE FROM vectors")
+            self.conn.commit()
+
+
+# Singleton instance
+_rescore_store: Optional[RescoreVectorStore] = None
+
+
+def get_rescore_store() -> RescoreVectorStore:
+    """Get the singleton rescore vector store."""
+    global _rescore_store
+    if _rescore_store is None:
+        _rescore_store = RescoreVectorStore()
+    return _rescore_store
+
+
+__all__ = [
+    "RescoreVectorStore",
+    "get_rescore_store",
+]
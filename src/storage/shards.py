@@ -0,0 +1,578 @@
+"""
+Local Finder X v2.0 - Index Shards
+
+Per-root partitioning of the content index.
+Each indexed root folder owns a shard directory with its own LanceDB
+tables and BM25 segment, so a root can be dropped or re-indexed
+without touching the rest of the index.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Callable, TypeVar, Set, Iterable, Tuple
+
+import numpy as np
+
+from src.config.paths import get_shards_dir, get_lancedb_path, get_bm25_path
+from src.config.settings import get_settings
+from src.core.embedding import EmbeddingProjection
+from src.storage.vector_store import VectorStore
+from src.storage.bm25_store import BM25Store, CorpusStats
+from src.storage.lancedb_store import LanceDBStore, LANCEDB_AVAILABLE
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+SHARD_INFO_FILENAME = "shard.json"
+SHARD_LANCEDB_DIRNAME = "lancedb"
+SHARD_BM25_FILENAME = "bm25.bin"
+
+# Embedding projection shared by all shards (in the shards directory),
+# so vectors of every shard live in the same space
+INDEX_PROJECTION_FILENAME = "projection.npz"
+
+# Prefix for shard directories that are being deleted
+TRASH_PREFIX = ".trash-"
+
+# Upper bound for parallel shard searches
+MAX_SEARCH_WORKERS = 4
+
+# Rows copied per batch when migrating the legacy chunks table
+LEGACY_MIGRATION_BATCH = 5000
+
+T = TypeVar("T")
+
+
+# =============================================================================
+# Path Helpers
+# =============================================================================
+
+def normalize_root(root: str) -> str:
+    """Normalize a root folder path for comparison and hashing."""
+    return os.path.normcase(os.path.abspath(root))
+
+
+def get_shard_id(root: str) -> str:
+    """Get the stable shard ID for a root folder."""
+    return hashlib.sha1(normalize_root(root).encode("utf-8")).hexdigest()[:16]
+
+
+def is_under_root(path: str, root: str) -> bool:
+    """Check if a path is the root itself or lies below it."""
+    norm_path = normalize_root(path)
+    norm_root = normalize_root(root)
+    if norm_path == norm_root:
+        return True
+    return norm_path.startswith(norm_root.rstrip(os.sep) + os.sep)
+
+
+# =============================================================================
+# Index Shard
+# =============================================================================
+
+class IndexShard:
+    """
+    A self-contained slice of the index for one root folder.
+    
+    Layout:
+        <shards_dir>/<shard_id>/shard.json   - root folder and creation time
+        <shards_dir>/<shard_id>/lancedb/     - chunk vectors and file records
+        <shards_dir>/<shard_id>/bm25.bin     - BM25 segment
+        <shards_dir>/projection.npz          - projection of all shards
+    """
+    
+    def __init__(self, shard_id: str, root: str, shard_dir: Path):
+        self.shard_id = shard_id
+        self.root = root
+        self.shard_dir = shard_dir
+        self._vector_store: Optional[VectorStore] = None
+        self._bm25_store: Optional[BM25Store] = None
+    
+    @property
+    def vector_store(self) -> VectorStore:
+        """Lazy-load the shard's vector store."""
+        if self._vector_store is None:
+            self._vector_store = VectorStore(
+                db_path=self.shard_dir / SHARD_LANCEDB_DIRNAME,
+                vector_encoding=get_settings().indexing.vector_encoding,
+                projection_path=self.shard_dir.parent / INDEX_PROJECTION_FILENAME,
+            )
+        return self._vector_store
+    
+    @property
+    def bm25_store(self) -> BM25Store:
+        """Lazy-load the shard's BM25 segment."""
+        if self._bm25_store is None:
+            self._bm25_store = BM25Store(self.shard_dir / SHARD_BM25_FILENAME)
+        return self._bm25_store
+    
+    def contains(self, path: str) -> bool:
+        """Check if a file path belongs under this shard's root."""
+        return is_under_root(path, self.root)
+    
+    def save(self) -> None:
+        """Persist the shard's BM25 segment."""
+        if self._bm25_store is not None:
+            self._bm25_store.save()
+    
+    def write_info(self) -> None:
+        """Write the shard descriptor file."""
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        info = {
+            "schema_version": "2.0",
+            "shard_id": self.shard_id,
+            "root": self.root,
+            "created_at": time.time(),
+        }
+        with open(self.shard_dir / SHARD_INFO_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2, ensure_ascii=False)
+    
+    @classmethod
+    def from_dir(cls, shard_dir: Path) -> Optional["IndexShard"]:
+        """Load a shard from its directory, or None if it is not a shard."""
+        info_path = shard_dir / SHARD_INFO_FILENAME
+        if not info_path.exists():
+            return None
+        try:
+            with open(info_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+            return cls(
+                shard_id=info.get("shard_id", shard_dir.name),
+                root=info["root"],
+                shard_dir=shard_dir,
+            )
+        except (json.JSONDecodeError, KeyError, OSError) as e:
+            print(f"Warning: Could not load shard {shard_dir.name}: {e}")
+            return None
+
+
+# =============================================================================
+# Sharded Store Views
+# =============================================================================
+
+class ShardedVectorStore:
+    """
+    Read-only vector store view that fans out over all shards.
+    
+    Exposes the same search() contract as VectorStore so retrievers
+    do not need to know about sharding.
+    """
+    
+    def __init__(self, manager: "ShardManager"):
+        self._manager = manager
+    
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 50,
+        file_ids: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search every shard in parallel and merge by distance."""
+        per_shard = self._manager.map_shards(
+            lambda shard: shard.vector_store.search(query_vector, top_k=top_k, file_ids=file_ids)
+        )
+        merged = [r for results in per_shard for r in results]
+        merged.sort(key=lambda r: r.get("score", 0.0))
+        return merged[:top_k]
+    
+    def search_many(
+        self,
+        query_vectors,
+        top_k: int = 50,
+        file_ids: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Batch-search every shard in parallel and merge per query by distance."""
+        per_shard = self._manager.map_shards(
+            lambda shard: shard.vector_store.search_many(query_vectors, top_k=top_k, file_ids=file_ids)
+        )
+        merged = []
+        for i in range(len(query_vectors)):
+            results = [r for shard_results in per_shard for r in shard_results[i]]
+            results.sort(key=lambda r: r.get("score", 0.0))
+            merged.append(results[:top_k])
+        return merged
+    
+    def get_chunks(self, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get chunks by ID from every shard."""
+        per_shard = self._manager.map_shards(lambda shard: shard.vector_store.get_chunks(chunk_ids))
+        return [chunk for chunks in per_shard for chunk in chunks]
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get storage statistics summed over all shards."""
+        totals: Dict[str, int] = {}
+        for stats in self._manager.map_shards(lambda shard: shard.vector_store.get_stats()):
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+class ShardedBM25Store:
+    """
+    Read-only BM25 view that fans out over all shard segments.
+    
+    Exposes the same search() contract as BM25Store. Every segment is
+    scored with the corpus statistics of the whole index, so the merged
+    scores are comparable.
+    """
+    
+    def __init__(self, manager: "ShardManager"):
+        self._manager = manager
+    
+    def corpus_stats(self, terms: Iterable[str]) -> CorpusStats:
+        """Get the corpus statistics summed over all segments."""
+        terms = set(terms)
+        stats = CorpusStats()
+        for shard_stats in self._manager.map_shards(lambda shard: shard.bm25_store.corpus_stats(terms)):
+            stats.add(shard_stats)
+        return stats
+    
+    def search(
+        self,
+        query_tokens: List[str],
+        top_k: int = 50,
+        file_ids: Optional[Set[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search every BM25 segment in parallel and merge by score."""
+        stats = self.corpus_stats(query_tokens)
+        per_shard = self._manager.map_shards(
+            lambda shard: shard.bm25_store.search(
+                query_tokens, top_k=top_k, file_ids=file_ids, stats=stats
+            )
+        )
+        merged = [r for results in per_shard for r in results]
+        merged.sort(key=lambda r: r.get("score", 0.0), reverse=True)
+        return merged[:top_k]
+    
+    def search_many(
+        self,
+        queries_tokens: List[List[str]],
+        top_k: int = 50,
+        file_ids: Optional[Set[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Batch-search every BM25 segment in parallel and merge per query by score."""
+        stats = self.corpus_stats(t for tokens in queries_tokens for t in tokens)
+        per_shard = self._manager.map_shards(
+            lambda shard: shard.bm25_store.search_many(
+                queries_tokens, top_k=top_k, file_ids=file_ids, stats=stats
+            )
+        )
+        merged = []
+        for i in range(len(queries_tokens)):
+            results = [r for shard_results in per_shard for r in shard_results[i]]
+            results.sort(key=lambda r: r.get("score", 0.0), reverse=True)
+            merged.append(results[:top_k])
+        return merged
+    
+    def vocabulary(self) -> Dict[str, int]:
+        """Get the terms of all segments with summed document frequencies."""
+        merged: Dict[str, int] = {}
+        for vocabulary in self._manager.map_shards(lambda shard: shard.bm25_store.vocabulary()):
+            for term, doc_freq in vocabulary.items():
+                merged[term] = merged.get(term, 0) + doc_freq
+        return merged
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get index statistics summed over all segments."""
+        totals: Dict[str, int] = {}
+        for stats in self._manager.map_shards(lambda shard: shard.bm25_store.get_stats()):
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+# =============================================================================
+# Shard Manager
+# =============================================================================
+
+class ShardManager:
+    """
+    Registry of index shards, one per indexed root folder.
+    
+    Shards are discovered by scanning the shards directory, so adding or
+    dropping a shard never rewrites a shared registry file.
+    """
+    
+    def __init__(self, shards_dir: Optional[Path] = None):
+        """
+        Initialize the shard manager.
+        
+        Args:
+            shards_dir: Directory holding shard folders. Uses default if None.
+        """
+        self.shards_dir = shards_dir or get_shards_dir()
+        self._shards: Optional[Dict[str, IndexShard]] = None
+        self._lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.vector_store = ShardedVectorStore(self)
+        self.bm25_store = ShardedBM25Store(self)
+    
+    def load(self) -> None:
+        """Scan the shards directory and load all shards."""
+        with self._lock:
+            shards: Dict[str, IndexShard] = {}
+            self.shards_dir.mkdir(parents=True, exist_ok=True)
+            for entry in self.shards_dir.iterdir():
+                if not entry.is_dir():
+                    continue
+                if entry.name.startswith(TRASH_PREFIX):
+                    # Leftover from an interrupted drop
+                    shutil.rmtree(entry, ignore_errors=True)
+                    continue
+                shard = IndexShard.from_dir(entry)
+                if shard is not None:
+                    shards[shard.shard_id] = shard
+            self._shards = shards
+    
+    @property
+    def shards(self) -> List[IndexShard]:
+        """Get all loaded shards."""
+        if self._shards is None:
+            self.load()
+        return list(self._shards.values())  # type: ignore
+    
+    def get_shard(self, root: str) -> Optional[IndexShard]:
+        """Get the shard for a root folder, if it exists."""
+        if self._shards is None:
+            self.load()
+        return self._shards.get(get_shard_id(root))  # type: ignore
+    
+    def get_shard_by_id(self, shard_id: str) -> Optional[IndexShard]:
+        """Get a shard by its ID, if it exists."""
+        if self._shards is None:
+            self.load()
+        return self._shards.get(shard_id)  # type: ignore
+    
+    def get_or_create_shard(self, root: str) -> IndexShard:
+        """Get the shard for a root folder, creating it if needed."""
+        with self._lock:
+            shard = self.get_shard(root)
+            if shard is None:
+                shard_id = get_shard_id(root)
+                shard = IndexShard(
+                    shard_id=shard_id,
+                    root=os.path.abspath(root),
+                    shard_dir=self.shards_dir / shard_id,
+                )
+                shard.write_info()
+                self._shards[shard_id] = shard  # type: ignore
+            return shard
+    
+    def shard_for_path(self, path: str) -> Optional[IndexShard]:
+        """
+        Find the shard that owns a file path.
+        
+        With nested roots the deepest matching root wins.
+        """
+        best: Optional[IndexShard] = None
+        for shard in self.shards:
+            if shard.contains(path):
+                if best is None or len(normalize_root(shard.root)) > len(normalize_root(best.root)):
+                    best = shard
+        return best
+    
+    def drop_shard(self, root: str) -> bool:
+        """
+        Drop the shard for a root folder.
+        
+        The shard directory is renamed out of the way, which is a single
+        metadata operation; the files are deleted by a background thread
+        (or by the next load if the process exits first).
+        
+        Returns:
+            True if a shard was dropped.
+        """
+        with self._lock:
+            shard = self.get_shard(root)
+            if shard is None:
+                return False
+            
+            del self._shards[shard.shard_id]  # type: ignore
+            trash_dir = self.shards_dir / f"{TRASH_PREFIX}{shard.shard_id}-{int(time.time() * 1000)}"
+            try:
+                shard.shard_dir.rename(trash_dir)
+            except OSError:
+                # Cannot move it aside; delete in place before the shard
+                # directory can be reused
+                shutil.rmtree(shard.shard_dir, ignore_errors=True)
+                return True
+        
+        threading.Thread(
+            target=shutil.rmtree,
+            args=(trash_dir,),
+            kwargs={"ignore_errors": True},
+            name="shard-drop",
+            daemon=True,
+        ).start()
+        return True
+    
+    @property
+    def projection(self) -> Optional[EmbeddingProjection]:
+        """Embedding projection applied to the vectors of all shards."""
+        return EmbeddingProjection.load(self.shards_dir / INDEX_PROJECTION_FILENAME)
+    
+    def sample_vectors(self, limit: int) -> np.ndarray:
+        """
+        Get a random sample of stored vectors across all shards.
+        
+        Up to limit vectors are drawn from each shard, then subsampled
+        together.
+        """
+        samples = [s for s in self.map_shards(lambda shard: shard.vector_store.sample_vectors(limit)) if len(s)]
+        if not samples:
+            return np.zeros((0, 0), dtype=np.float32)
+        sample = np.concatenate(samples)
+        if len(sample) > limit:
+            sample = sample[np.random.default_rng().choice(len(sample), limit, replace=False)]
+        return sample
+    
+    def set_projection(self, projection: EmbeddingProjection) -> int:
+        """
+        Project the stored vectors of every shard and use the projection
+        for all of them from now on.
+        
+        The shared parameters file is written last, so an interrupted
+        rewrite leaves shards whose vectors no longer match the recorded
+        layout; they are re-indexed by the next run.
+        
+        Returns:
+            Number of chunks rewritten.
+        """
+        with self._lock:
+            count = sum(shard.vector_store.apply_projection(projection) for shard in self.shards)
+            projection.save(self.shards_dir / INDEX_PROJECTION_FILENAME)
+            return count
+    
+    def clear_projection(self) -> None:
+        """Forget the shared projection (stored vectors are not rewritten)."""
+        with self._lock:
+            (self.shards_dir / INDEX_PROJECTION_FILENAME).unlink(missing_ok=True)
+            for shard in self.shards:
+                if shard._vector_store is not None:
+                    shard._vector_store.apply_projection(None)
+    
+    def map_shards(self, fn: Callable[[IndexShard], T]) -> List[T]:
+        """
+        Apply a function to every shard in parallel.
+        
+        Shards that raise are reported and skipped so that one broken
+        shard does not fail the whole search.
+        """
+        shards = self.shards
+        if not shards:
+            return []
+        
+        def _safe(shard: IndexShard) -> Optional[T]:
+            try:
+                return fn(shard)
+            except Exception as e:
+                print(f"Shard {shard.shard_id} ({shard.root}) error: {e}")
+                return None
+        
+        if len(shards) == 1:
+            results = [_safe(shards[0])]
+        else:
+            results = list(self._get_executor().map(_safe, shards))
+        return [r for r in results if r is not None]
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazy-create the shard search thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=MAX_SEARCH_WORKERS,
+                thread_name_prefix="shard-search",
+            )
+        return self._executor
+    
+    def has_legacy_index(self) -> bool:
+        """Check for a pre-sharding single-table index."""
+        if get_bm25_path().exists():
+            return True
+        return any(get_lancedb_path().iterdir())
+    
+    def migrate_legacy_index(self, owners: Dict[str, IndexShard]) -> Tuple[int, int]:
+        """
+        Copy the pre-sharding single-table index into shards.
+        
+        BM25 documents and chunk rows are moved to the shard owning
+        their file; data of files without an owner is left behind. The
+        legacy index itself is not deleted (see drop_legacy_index).
+        
+        Args:
+            owners: File ID -> shard owning the file.
+        
+        Returns:
+            (BM25 documents, chunks) copied.
+        """
+        legacy_bm25 = BM25Store(get_bm25_path())
+        documents: Dict[str, List[tuple]] = {}
+        for doc in legacy_bm25.index.documents:
+            shard = owners.get(doc.file_id)
+            if doc.doc_id and shard is not None:
+                documents.setdefault(shard.shard_id, []).append(
+                    (doc.doc_id, doc.file_id, doc.tokens, doc.is_file_level)
+                )
+        doc_count = 0
+        for shard_id, shard_documents in documents.items():
+            shard = self.get_shard_by_id(shard_id)
+            doc_count += shard.bm25_store.add_documents(shard_documents)  # type: ignore
+            shard.save()  # type: ignore
+        
+        chunk_count = 0
+        if LANCEDB_AVAILABLE:
+            # Opening the store migrates JSON metadata to the current schema
+            chunks_table = LanceDBStore(get_lancedb_path()).chunks_table
+            if chunks_table is not None:
+                for batch in chunks_table.to_arrow().to_batches(LEGACY_MIGRATION_BATCH):
+                    rows: Dict[str, List[Dict[str, Any]]] = {}
+                    for row in batch.to_pylist():
+                        shard = owners.get(row["file_id"])
+                        if shard is not None and row.get("vector") is not None:
+                            rows.setdefault(shard.shard_id, []).append(row)
+                    for shard_id, shard_rows in rows.items():
+                        shard = self.get_shard_by_id(shard_id)
+                        chunk_count += shard.vector_store.store.add_chunks(shard_rows)  # type: ignore
+        return doc_count, chunk_count
+    
+    def drop_legacy_index(self) -> None:
+        """Delete the pre-sharding single-table index."""
+        bm25_path = get_bm25_path()
+        if bm25_path.exists():
+            bm25_path.unlink()
+        shutil.rmtree(get_lancedb_path(), ignore_errors=True)
+    
+    def clear(self) -> None:
+        """Drop every shard."""
+        for shard in self.shards:
+            self.drop_shard(shard.root)
+
+
+# Singleton instance
+_shard_manager: Optional[ShardManager] = None
+
+
+def get_shard_manager() -> ShardManager:
+    """Get the singleton shard manager instance."""
+    global _shard_manager
+    if _shard_manager is None:
+        _shard_manager = ShardManager()
+    return _shard_manager
+
+
+__all__ = [
+    "IndexShard",
+    "ShardManager",
+    "ShardedVectorStore",
+    "ShardedBM25Store",
+    "get_shard_manager",
+    "get_shard_id",
+    "normalize_root",
+    "is_under_root",
+]
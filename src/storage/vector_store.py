@@ -5,15 +5,62 @@ High-level wrapper for LanceDB vector operations.
 Provides a clean interface for indexing and search operations.
 """
 
-import json
+import os
 import time
 from typing import List, Optional, Dict, Any
 from dataclasses import asdict
+from pathlib import Path
 
-from src.core.schemas import ChunkRecord, ChunkMetadata
+import numpy as np
+
+from src.core.schemas import (
+    ChunkRecord, ChunkMetadata, FileRecord, Fingerprint, IndexStats, SourceType,
+    SearchFilters,
+)
+from src.core.embedding import EmbeddingProjection
+from src.core.snippets import encode_token_offsets
 from src.storage.lancedb_store import LanceDBStore, LANCEDB_AVAILABLE
 
 
+# Projection parameters stored next to the chunks table
+PROJECTION_FILENAME = "projection.npz"
+
+
+def _sql_str(value: str) -> str:
+    """Quote a string literal for a LanceDB filter expression."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def build_files_filter(filters: SearchFilters) -> Optional[str]:
+    """
+    Translate SearchFilters into a files-table filter expression.
+    
+    Args:
+        filters: Metadata filters.
+    
+    Returns:
+        Filter expression, or None if no filter is set.
+    """
+    clauses = []
+    
+    if filters.extensions:
+        exts = ", ".join(_sql_str(ext.lower()) for ext in filters.extensions)
+        clauses.append(f"extension IN ({exts})")
+    if filters.modified_after is not None:
+        clauses.append(f"modified_at >= {float(filters.modified_after)}")
+    if filters.modified_before is not None:
+        clauses.append(f"modified_at < {float(filters.modified_before)}")
+    if filters.min_size_bytes is not None:
+        clauses.append(f"size_bytes >= {int(filters.min_size_bytes)}")
+    if filters.max_size_bytes is not None:
+        clauses.append(f"size_bytes <= {int(filters.max_size_bytes)}")
+    if filters.folder:
+        folder = os.path.join(filters.folder, "")
+        clauses.append(f"starts_with(path, {_sql_str(folder)})")
+    
+    return " AND ".join(clauses) if clauses else None
+
+
 class VectorStore:
     """
     High-level vector store adapter.
@@ -22,14 +69,30 @@ class VectorStore:
     and handles serialization/deserialization of ChunkRecords.
     """
     
-    def __init__(self, lancedb_store: Optional[LanceDBStore] = None):
+    def __init__(
+        self,
+        lancedb_store: Optional[LanceDBStore] = None,
+        db_path: Optional[Path] = None,
+        vector_encoding: Optional[str] = None,
+        projection_path: Optional[Path] = None,
+    ):
         """
         Initialize the vector store.
         
         Args:
             lancedb_store: Optional LanceDB store instance.
+            db_path: LanceDB directory used when the store is created lazily.
+            vector_encoding: Vector encoding for new chunks tables
+                (float32, float16, int8 or binary).
+            projection_path: Projection parameters file, if shared with
+                other stores (defaults to one in the LanceDB directory).
         """
         self._store = lancedb_store
+        self._db_path = db_path
+        self._vector_encoding = vector_encoding
+        self._projection_path = projection_path
+        self._projection: Optional[EmbeddingProjection] = None
+        self._projection_loaded = False
     
     @property
     def store(self) -> LanceDBStore:
@@ -37,9 +100,55 @@ class VectorStore:
         if self._store is None:
             if not LANCEDB_AVAILABLE:
                 raise ImportError("LanceDB is not available")
-            self._store = LanceDBStore()
+            self._store = LanceDBStore(self._db_path, vector_encoding=self._vector_encoding)
         return self._store
     
+    @property
+    def projection_path(self) -> Path:
+        """File holding the projection parameters."""
+        return self._projection_path or self.store.db_path / PROJECTION_FILENAME
+    
+    @property
+    def projection(self) -> Optional[EmbeddingProjection]:
+        """Lazy-load the projection applied to this store's vectors."""
+        if not self._projection_loaded:
+            self._projection = EmbeddingProjection.load(self.projection_path)
+            self._projection_loaded = True
+        return self._projection
+    
+    def apply_projection(self, projection: Optional[EmbeddingProjection]) -> int:
+        """
+        Project all stored vectors and use the projection from now on,
+        without saving it (the owner of a shared projection file does).
+        
+        Returns:
+            Number of chunks rewritten.
+        """
+        count = 0
+        if projection is not None:
+            count = self.store.rewrite_vectors(projection.apply)
+        self._projection = projection
+        self._projection_loaded = True
+        return count
+    
+    def set_projection(self, projection: EmbeddingProjection) -> int:
+        """
+        Project all stored vectors and use the projection from now on.
+        
+        Args:
+            projection: Projection whose input matches the stored vectors.
+        
+        Returns:
+            Number of chunks rewritten.
+        """
+        count = self.apply_projection(projection)
+        projection.save(self.projection_path)
+        return count
+    
+    def sample_vectors(self, limit: int) -> np.ndarray:
+        """Get a random sample of stored vectors (for fitting a projection)."""
+        return self.store.sample_vectors(limit)
+    
     def add_chunk(self, chunk: ChunkRecord) -> None:
         """
         Add a single chunk to the store.
@@ -53,43 +162,47 @@ class VectorStore:
         """
         Add multiple chunks to the store.
         
+        Chunks without an embedding are skipped; they stay searchable
+        through BM25 and would only pollute ANN results as zero vectors.
+        
         Args:
             chunks: List of ChunkRecords to add.
         
         Returns:
             Number of chunks added.
         """
-        if not chunks:
-            return 0
+        chunks = [chunk for chunk in chunks if chunk.embedding]
+        vectors = [chunk.embedding for chunk in chunks]
+        if chunks and self.projection is not None:
+            vectors = self.projection.apply(np.asarray(vectors)).tolist()
         
         records = []
-        for chunk in chunks:
-            # Serialize metadata to JSON string
-            metadata_dict = {
-                "page": chunk.metadata.page,
-                "slide": chunk.metadata.slide,
-                "slide_title": chunk.metadata.slide_title,
-                "sheet": chunk.metadata.sheet,
-                "row_range": chunk.metadata.row_range,
-                "header_path": chunk.metadata.header_path,
-                "subject": chunk.metadata.subject,
-                "date": chunk.metadata.date,
-                "sender": chunk.metadata.sender,
-            }
-            
+        for chunk, vector in zip(chunks, vectors):
             record = {
                 "chunk_id": chunk.chunk_id,
                 "file_id": chunk.file_id,
                 "chunk_index": chunk.chunk_index,
                 "text": chunk.text,
-                "vector": chunk.embedding or [0.0] * 1024,  # Default zero vector
-                "tokens": json.dumps(chunk.tokens or []),
-                "metadata": json.dumps(metadata_dict),
+                "token_offsets": encode_token_offsets(chunk.token_offsets),
+                "vector": vector,
+                "metadata": {
+                    "page": chunk.metadata.page,
+                    "slide": chunk.metadata.slide,
+                    "slide_title": chunk.metadata.slide_title,
+                    "sheet": chunk.metadata.sheet,
+                    "row_range": chunk.metadata.row_range,
+                    "header_path": chunk.metadata.header_path,
+                    "subject": chunk.metadata.subject,
+                    "date": chunk.metadata.date,
+                    "sender": chunk.metadata.sender,
+                },
                 "content_indexed": True,
                 "created_at": time.time(),
             }
             records.append(record)
         
+        if not records:
+            return 0
         return self.store.add_chunks(records)
     
     def search(
@@ -97,6 +210,7 @@ class VectorStore:
         query_vector: List[float],
         top_k: int = 50,
         file_ids: Optional[List[str]] = None,
+        metadata_filter: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for similar chunks.
@@ -105,15 +219,32 @@ class VectorStore:
             query_vector: Query embedding vector.
             top_k: Number of results to return.
             file_ids: Optional list of file IDs to filter by.
+            metadata_filter: Optional location constraints pushed down to
+                the metadata struct, e.g. {"page": 3} or {"sheet": "요약"}.
         
         Returns:
             List of search results with chunk info and scores.
         """
-        filter_expr = None
+        # Queries are projected like the stored vectors
+        if self.projection is not None and len(query_vector) == self.projection.input_dim:
+            query_vector = self.projection.apply(np.asarray(query_vector)).tolist()
+        
+        # Vectors from a model with another dimension cannot be compared
+        if self.store.vector_dim != len(query_vector):
+            return []
+        
+        clauses = []
         if file_ids:
             # Build filter for specific files
             ids_str = ", ".join(f"'{fid}'" for fid in file_ids)
-            filter_expr = f"file_id IN ({ids_str})"
+            clauses.append(f"file_id IN ({ids_str})")
+        if metadata_filter:
+            for key, value in metadata_filter.items():
+                if isinstance(value, str):
+                    clauses.append(f"metadata.{key} = {_sql_str(value)}")
+                else:
+                    clauses.append(f"metadata.{key} = {int(value)}")
+        filter_expr = " AND ".join(clauses) if clauses else None
         
         results = self.store.search_chunks(
             query_vector=query_vector,
@@ -121,36 +252,49 @@ class VectorStore:
             filter_expr=filter_expr,
         )
         
-        # Parse results and add score info
-        parsed_results = []
+        # Metadata arrives as a dict from the struct column; only the
+        # distance needs renaming
         for result in results:
-            # Parse metadata JSON
-            metadata = {}
-            if result.get("metadata"):
-                try:
-                    metadata = json.loads(result["metadata"])
-                except json.JSONDecodeError:
-                    pass
-            
-            # Parse tokens JSON
-            tokens = []
-            if result.get("tokens"):
-                try:
-                    tokens = json.loads(result["tokens"])
-                except json.JSONDecodeError:
-                    pass
-            
-            parsed_results.append({
-                "chunk_id": result.get("chunk_id"),
-                "file_id": result.get("file_id"),
-                "chunk_index": result.get("chunk_index"),
-                "text": result.get("text"),
-                "tokens": tokens,
-                "metadata": metadata,
-                "score": result.get("_distance", 0.0),  # LanceDB returns _distance
-            })
+            result["metadata"] = result.get("metadata") or {}
+            result["score"] = result.pop("_distance", 0.0)  # LanceDB returns _distance
         
-        return parsed_results
+        return results
+    
+    def search_many(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int = 50,
+        file_ids: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar chunks of a batch of query vectors.
+        
+        Args:
+            query_vectors: Array of shape (n_queries, dim).
+            top_k: Number of results per query.
+            file_ids: Optional list of file IDs to filter by.
+        
+        Returns:
+            One result list per query (same format as search()).
+        """
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        if self.projection is not None and query_vectors.shape[-1] == self.projection.input_dim:
+            query_vectors = self.projection.apply(query_vectors)
+        
+        if len(query_vectors) == 0 or self.store.vector_dim != query_vectors.shape[-1]:
+            return [[] for _ in range(len(query_vectors))]
+        
+        filter_expr = None
+        if file_ids:
+            ids_str = ", ".join(f"'{fid}'" for fid in file_ids)
+            filter_expr = f"file_id IN ({ids_str})"
+        
+        per_query = self.store.search_chunks_many(query_vectors, top_k, filter_expr)
+        for results in per_query:
+            for result in results:
+                result["metadata"] = result.get("metadata") or {}
+                result["score"] = result.pop("_distance", 0.0)
+        return per_query
     
     def delete_by_file(self, file_id: str) -> None:
         """
@@ -173,6 +317,169 @@ class VectorStore:
         """
         return self.store.get_chunks_by_file(file_id)
     
+    def get_chunks(self, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get chunks by ID.
+        
+        Args:
+            chunk_ids: Chunk IDs to look up.
+        
+        Returns:
+            Chunk dictionaries (chunk_id, file_id, chunk_index, text,
+            token_offsets, metadata) of the chunks found.
+        """
+        chunks = self.store.get_chunks(chunk_ids)
+        for chunk in chunks:
+            chunk["metadata"] = chunk.get("metadata") or {}
+        return chunks
+    
+    def ensure_embedding_model(self, model_name: str, dimension: int) -> bool:
+        """
+        Record the embedding model that produces this store's vectors.
+        
+        Args:
+            model_name: Embedding model name.
+            dimension: Embedding dimension of the model.
+        
+        Returns:
+            False if the store already holds vectors from another model,
+            dimension or encoding (the caller must re-index), True otherwise.
+        """
+        meta = self.store.get_index_meta()
+        vector_dim = self.store.vector_dim
+        has_vectors = vector_dim is not None and self.store.chunks_table.count_rows() > 0
+        
+        stored_dim = dimension
+        if self.projection is not None:
+            if self.projection.input_dim != dimension:
+                return False
+            stored_dim = self.projection.output_dim
+        
+        if has_vectors:
+            if vector_dim != stored_dim or self.store.vector_encoding != self.store.encoding:
+                return False
+            recorded = meta.get("embedding_model")
+            if recorded and recorded != model_name:
+                return False
+        elif vector_dim is not None and (
+            vector_dim != stored_dim or self.store.vector_encoding != self.store.encoding
+        ):
+            # Empty table with the old layout: recreate on next add
+            self.store.drop_chunks_table()
+        
+        if (
+            meta.get("embedding_model") != model_name
+            or meta.get("vector_dim") != dimension
+            or meta.get("vector_encoding") != self.store.encoding
+        ):
+            self.store.set_index_meta({
+                "embedding_model": model_name,
+                "vector_dim": dimension,
+                "vector_encoding": self.store.encoding,
+                "recorded_at": time.time(),
+            })
+        return True
+    
+    def get_embedding_model_info(self) -> Dict[str, Any]:
+        """Get the recorded embedding model name and dimension."""
+        return self.store.get_index_meta()
+    
+    # =========================================================================
+    # File Records
+    # =========================================================================
+    
+    def add_files(self, files: List[FileRecord]) -> int:
+        """
+        Add file records to the files table.
+        
+        Args:
+            files: List of FileRecords to add.
+        
+        Returns:
+            Number of records added.
+        """
+        records = [
+            {
+                "file_id": f.file_id,
+                "path": f.path,
+                "filename": f.filename,
+                "extension": f.extension,
+                "source": f.source.value,
+                "content_indexed": f.content_indexed,
+                "size_bytes": f.size_bytes,
+                "created_at": f.created_at,
+                "modified_at": f.modified_at,
+                "author": f.author,
+                "indexed_at": f.index_stats.last_indexed_at or time.time(),
+                "chunk_count": f.index_stats.chunk_count,
+            }
+            for f in files
+        ]
+        return self.store.add_files(records)
+    
+    def delete_files(self, file_ids: List[str]) -> None:
+        """
+        Delete file records from the files table.
+        
+        Args:
+            file_ids: IDs of the files to delete.
+        """
+        self.store.delete_files(file_ids)
+    
+    def filter_file_ids(self, filters: SearchFilters) -> List[str]:
+        """
+        Get IDs of files matching metadata filters.
+        
+        The filter runs as a columnar scan over the files table and
+        uses its scalar indexes where available.
+        
+        Args:
+            filters: Metadata filters.
+        
+        Returns:
+            List of matching file IDs.
+        """
+        filter_expr = build_files_filter(filters)
+        if filter_expr is None:
+            return [row["file_id"] for row in self.store.get_all_files()]
+        rows = self.store.query_files(filter_expr, columns=["file_id"])
+        return [row["file_id"] for row in rows]
+    
+    def ensure_file_indexes(self) -> None:
+        """Create missing scalar indexes used by metadata filters."""
+        self.store.ensure_file_indexes()
+    
+    def get_all_files(self) -> List[FileRecord]:
+        """
+        Load all file records from the files table.
+        
+        Returns:
+            List of FileRecords.
+        """
+        files = []
+        for row in self.store.get_all_files():
+            files.append(FileRecord(
+                file_id=row["file_id"],
+                source=SourceType(row.get("source") or "local"),
+                content_indexed=bool(row.get("content_indexed")),
+                path=row.get("path") or "",
+                filename=row.get("filename") or "",
+                extension=row.get("extension") or "",
+                size_bytes=row.get("size_bytes") or 0,
+                created_at=row.get("created_at") or 0.0,
+                modified_at=row.get("modified_at") or 0.0,
+                author=row.get("author"),
+                fingerprint=Fingerprint(
+                    size_bytes=row.get("size_bytes") or 0,
+                    modified_at=row.get("modified_at") or 0.0,
+                ),
+                index_stats=IndexStats(
+                    chunk_count=row.get("chunk_count") or 0,
+                    last_indexed_at=row.get("indexed_at") or 0.0,
+                ),
+            ))
+        return files
+    
     def get_stats(self) -> Dict[str, int]:
         """Get storage statistics."""
         return self.store.get_stats()
@@ -180,6 +487,9 @@ class VectorStore:
     def clear(self) -> None:
         """Clear all data from the store."""
         self.store.clear()
+        if self._projection_path is None:
+            (self.store.db_path / PROJECTION_FILENAME).unlink(missing_ok=True)
+            self._projection = None
 
 
 # Singleton instance
@@ -197,4 +507,5 @@ def get_vector_store() -> VectorStore:
 __all__ = [
     "VectorStore",
     "get_vector_store",
+    "build_files_filter",
 ]
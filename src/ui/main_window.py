@@ -13,7 +13,7 @@ try:
         QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
         QPushButton, QStackedWidget, QLabel, QFrame, QSizePolicy
     )
-    from PyQt6.QtCore import Qt, QSize
+    from PyQt6.QtCore import Qt, QSize, QTimer
     from PyQt6.QtGui import QIcon, QFont
     PYQT6_AVAILABLE = True
 except ImportError:
@@ -300,6 +300,18 @@ def run_app():
     
     window = MainWindow()
     window.show()
+    
+    # Load the embedding model once the window is up, and keep it
+    # loaded while the application is in the foreground
+    from src.core.model_warmup import start_model_warmup, get_model_warmup
+    app.applicationStateChanged.connect(
+        lambda state: get_model_warmup().set_foreground(
+            state == Qt.ApplicationState.ApplicationActive
+        )
+    )
+    get_model_warmup().set_foreground(True)
+    QTimer.singleShot(0, start_model_warmup)
+    
     return app.exec()
 
 
@@ -5,8 +5,14 @@ Local Finder X v2.0 - Search Page
 Based on PRD UI specifications.
 """
 
+import html
+import threading
 from typing import Optional, List
 
+from src.config.settings import get_settings, save_settings
+from src.core.schemas import SearchResponse, FileHit, Evidence
+from src.core.search_engine import SEARCH_MODES, MODE_SMART, get_search_engine
+
 try:
     from PyQt6.QtWidgets import (
         QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
@@ -14,7 +20,7 @@ try:
         QFrame, QListWidget, QListWidgetItem, QTextEdit,
         QComboBox, QSizePolicy
     )
-    from PyQt6.QtCore import Qt, pyqtSignal
+    from PyQt6.QtCore import Qt, pyqtSignal, QTimer
     from PyQt6.QtGui import QFont
     PYQT6_AVAILABLE = True
 except ImportError:
@@ -23,6 +29,14 @@ except ImportError:
     pyqtSignal = lambda *args: None
 
 
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Typing pause after which the full (dense) search runs
+TYPING_PAUSE_MS = 300
+
+
 # =============================================================================
 # Styles
 # =============================================================================
@@ -88,6 +102,48 @@ QComboBox {
 """
 
 
+# =============================================================================
+# Response Conversion
+# =============================================================================
+
+def evidence_to_dict(evidence: Evidence) -> dict:
+    """Convert an Evidence to the dict shown by EvidenceCard."""
+    return {
+        "snippet": evidence.snippet,
+        "highlights": evidence.highlights,
+        "location": {
+            "page": evidence.location.page,
+            "slide": evidence.location.slide,
+            "sheet": evidence.location.sheet,
+        },
+        "score": evidence.scores.final,
+    }
+
+
+def snippet_to_html(snippet: str, highlights: List[tuple]) -> str:
+    """Escape a snippet and mark its highlighted ranges."""
+    parts = []
+    pos = 0
+    for start, end in highlights:
+        parts.append(html.escape(snippet[pos:start]))
+        parts.append(f'<b style="color: #ffffff;">{html.escape(snippet[start:end])}</b>')
+        pos = end
+    parts.append(html.escape(snippet[pos:]))
+    return "".join(parts)
+
+
+def hit_to_dict(hit: FileHit) -> dict:
+    """Convert a FileHit to the dict shown by ResultItem."""
+    return {
+        "file_id": hit.file.file_id,
+        "filename": hit.file.filename,
+        "path": hit.file.path,
+        "score": hit.score,
+        "content_indexed": hit.content_available,
+        "evidences": [evidence_to_dict(e) for e in hit.evidences],
+    }
+
+
 # =============================================================================
 # Left Panel - Results List
 # =============================================================================
@@ -216,7 +272,14 @@ class LeftPanel(QFrame if PYQT6_AVAILABLE else object):
 class EvidenceCard(QFrame if PYQT6_AVAILABLE else object):
     """Single evidence card."""
     
-    def __init__(self, snippet: str, location: str = "", score: float = 0.0, parent=None):
+    def __init__(
+        self,
+        snippet: str,
+        location: str = "",
+        score: float = 0.0,
+        highlights: Optional[List[tuple]] = None,
+        parent=None,
+    ):
         if not PYQT6_AVAILABLE:
             return
         super().__init__(parent)
@@ -238,8 +301,11 @@ class EvidenceCard(QFrame if PYQT6_AVAILABLE else object):
             loc_label.setStyleSheet("color: #6366f1; font-size: 11px; margin-bottom: 5px;")
             layout.addWidget(loc_label)
         
-        # Snippet
+        # Snippet (query-term matches in bold)
         snippet_label = QLabel(snippet)
+        if highlights:
+            snippet_label.setTextFormat(Qt.TextFormat.RichText)
+            snippet_label.setText(snippet_to_html(snippet, highlights))
         snippet_label.setStyleSheet("color: #ccccdd; font-size: 13px; line-height: 1.5;")
         snippet_label.setWordWrap(True)
         layout.addWidget(snippet_label)
@@ -312,6 +378,7 @@ class CenterPanel(QFrame if PYQT6_AVAILABLE else object):
                 snippet=evidence.get("snippet", ""),
                 location=location,
                 score=evidence.get("score", 0.0),
+                highlights=evidence.get("highlights"),
             )
             self.cards_layout.insertWidget(self.cards_layout.count() - 1, card)
 
@@ -325,6 +392,7 @@ class RightPanel(QFrame if PYQT6_AVAILABLE else object):
     
     if PYQT6_AVAILABLE:
         search_requested = pyqtSignal(str, str)  # query, mode
+        query_edited = pyqtSignal(str, str)  # query, mode (every keystroke)
     
     def __init__(self, parent=None):
         if not PYQT6_AVAILABLE:
@@ -349,8 +417,10 @@ class RightPanel(QFrame if PYQT6_AVAILABLE else object):
         mode_layout.addWidget(mode_label)
         
         self.mode_combo = QComboBox()
-        self.mode_combo.addItems(["FAST", "SMART", "ASSIST"])
-        self.mode_combo.setCurrentIndex(1)  # Default to SMART
+        self.mode_combo.addItems(SEARCH_MODES)
+        mode = get_settings().search.mode.upper()
+        self.mode_combo.setCurrentText(mode if mode in SEARCH_MODES else MODE_SMART)
+        self.mode_combo.currentTextChanged.connect(self._on_mode_changed)
         mode_layout.addWidget(self.mode_combo)
         mode_layout.addStretch()
         
@@ -360,6 +430,7 @@ class RightPanel(QFrame if PYQT6_AVAILABLE else object):
         self.query_input = QLineEdit()
         self.query_input.setPlaceholderText("검색어를 입력하세요...")
         self.query_input.returnPressed.connect(self._on_search)
+        self.query_input.textEdited.connect(self._on_text_edited)
         layout.addWidget(self.query_input)
         
         # Search button
@@ -375,12 +446,21 @@ class RightPanel(QFrame if PYQT6_AVAILABLE else object):
         history_label.setStyleSheet("color: #666680; font-size: 12px; margin-top: 20px;")
         layout.addWidget(history_label)
     
+    def _on_mode_changed(self, mode: str):
+        """Remember the selected mode as the default."""
+        get_settings().search.mode = mode
+        save_settings()
+    
     def _on_search(self):
         """Handle search request."""
         query = self.query_input.text().strip()
         mode = self.mode_combo.currentText()
         if query:
             self.search_requested.emit(query, mode)
+    
+    def _on_text_edited(self, text: str):
+        """Forward keystrokes for search-as-you-type."""
+        self.query_edited.emit(text, self.mode_combo.currentText())
 
 
 # =============================================================================
@@ -388,13 +468,34 @@ class RightPanel(QFrame if PYQT6_AVAILABLE else object):
 # =============================================================================
 
 class SearchPage(QWidget if PYQT6_AVAILABLE else object):
-    """Main search page with 3-panel layout."""
+    """
+    Main search page with 3-panel layout.
+    
+    Searches run on a background thread using
+    SearchEngine.search_stream(): the lexical results are shown as soon
+    as they arrive and replaced by the fused ranking with evidences.
+    
+    While typing, every keystroke cancels the in-flight search and runs
+    a lexical prefix search (search_as_you_type); the full search starts
+    once typing pauses for TYPING_PAUSE_MS.
+    """
+    
+    if PYQT6_AVAILABLE:
+        response_ready = pyqtSignal(int, object)  # search id, SearchResponse
     
     def __init__(self, parent=None):
         if not PYQT6_AVAILABLE:
             return
         super().__init__(parent)
         self.setStyleSheet(SEARCH_PAGE_STYLE)
+        self._search_id = 0
+        self._cancel_event: Optional[threading.Event] = None
+        self._typed_query = ("", MODE_SMART)
+        
+        self._pause_timer = QTimer(self)
+        self._pause_timer.setSingleShot(True)
+        self._pause_timer.setInterval(TYPING_PAUSE_MS)
+        self._pause_timer.timeout.connect(self._on_typing_paused)
         
         layout = QHBoxLayout(self)
         layout.setContentsMargins(20, 20, 20, 20)
@@ -414,26 +515,77 @@ class SearchPage(QWidget if PYQT6_AVAILABLE else object):
         
         # Connect signals
         self.right_panel.search_requested.connect(self._on_search)
+        self.right_panel.query_edited.connect(self._on_query_edited)
+        self.response_ready.connect(self._on_response)
+    
+    def _start(self, target, *args):
+        """Cancel the in-flight search and run target on a worker thread."""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        self._search_id += 1
+        self._cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=target,
+            args=(self._search_id, self._cancel_event, *args),
+            name="search-page",
+            daemon=True,
+        )
+        thread.start()
     
     def _on_search(self, query: str, mode: str):
-        """Handle search request."""
-        # TODO: Connect to actual search engine
-        print(f"Search: '{query}' in mode {mode}")
+        """Start a full search (responses of earlier searches are dropped)."""
+        self._pause_timer.stop()
+        self._start(self._run_search, query, mode)
+    
+    def _on_query_edited(self, query: str, mode: str):
+        """Prefix search on every keystroke; full search after a pause."""
+        self._pause_timer.stop()
+        if not query.strip():
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+            self._search_id += 1
+            self.left_panel.set_results([])
+            return
         
-        # Demo results
-        demo_results = [
-            {"filename": "Q4_예산계획.xlsx", "path": "/Users/docs/Q4_예산계획.xlsx", "score": 0.95, "content_indexed": True},
-            {"filename": "프로젝트_현황.pptx", "path": "/Users/docs/프로젝트_현황.pptx", "score": 0.82, "content_indexed": True},
-            {"filename": "계약서_v2.docx", "path": "/Users/docs/계약서_v2.docx", "score": 0.75, "content_indexed": True},
-        ]
-        self.left_panel.set_results(demo_results)
+        self._typed_query = (query.strip(), mode)
+        self._start(self._run_as_you_type, query)
+        self._pause_timer.start()
+    
+    def _on_typing_paused(self):
+        self._on_search(*self._typed_query)
+    
+    def _run_search(self, search_id: int, cancel_event: threading.Event, query: str, mode: str):
+        """Stream responses to the UI thread (runs on a worker thread)."""
+        engine = get_search_engine()
+        for response in engine.search_stream(query, mode=mode, cancel_event=cancel_event):
+            if cancel_event.is_set():
+                return  # superseded by a newer search
+            self.response_ready.emit(search_id, response)
+    
+    def _run_as_you_type(self, search_id: int, cancel_event: threading.Event, query: str):
+        """Prefix search of the typed query (runs on a worker thread)."""
+        response = get_search_engine().search_as_you_type(query)
+        if not cancel_event.is_set():
+            self.response_ready.emit(search_id, response)
+    
+    def _on_response(self, search_id: int, response: SearchResponse):
+        """Show a preliminary or final response."""
+        if search_id != self._search_id:
+            return
+        if response.error:
+            print(f"Search error: {response.error}")
+            return
+        
+        results = [hit_to_dict(hit) for hit in response.results]
+        self.left_panel.set_results(results)
         
-        # Demo evidence
-        demo_evidences = [
-            {"snippet": "Q4 예산 계획에 따르면 마케팅 부서의 예산은 전년 대비 15% 증가하였습니다.", "location": {"sheet": "요약"}, "score": 0.9},
-            {"snippet": "신규 프로젝트 런칭을 위한 예산 배분이 필요합니다.", "location": {"sheet": "상세"}, "score": 0.7},
-        ]
-        self.center_panel.set_evidences("Q4_예산계획.xlsx", demo_evidences)
+        # Evidences of the top file (the preliminary ranking has none)
+        if not response.is_final:
+            return
+        if results:
+            self.center_panel.set_evidences(results[0]["filename"], results[0]["evidences"])
+        else:
+            self.center_panel.set_evidences("검색 결과가 없습니다", [])
 
 
 __all__ = [
@@ -443,4 +595,7 @@ __all__ = [
     "RightPanel",
     "ResultItem",
     "EvidenceCard",
+    "hit_to_dict",
+    "evidence_to_dict",
+    "snippet_to_html",
 ]